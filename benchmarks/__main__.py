@@ -0,0 +1,71 @@
+"""Run the micro-benchmarks and compare them to the stored baseline.
+
+    python -m benchmarks [--output results.json] [--save_baseline] [--only item_vn ...]
+"""
+
+import json
+import sys
+import tempfile
+from argparse import ArgumentParser
+from .suite import BASELINE_PATH, BENCHMARKS, REPEAT, TOLERANCE, compare, run_suite
+
+
+def main() -> int:
+    """Main function
+
+    Returns:
+        int: exit status, 1 if a benchmark regressed.
+    """
+
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--only", nargs="+", default=None, choices=list(BENCHMARKS),
+                        help="Benchmarks to run (all by default)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplier of the synthetic input sizes")
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help="Timed runs of each benchmark (the median is kept)")
+    parser.add_argument("--output", default=None,
+                        help="Write the results (JSON) to a file")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline to compare against")
+    parser.add_argument("--save_baseline", action="store_true",
+                        help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Slowdown relative to the baseline reported as a regression")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_suite(directory, args.only, args.scale, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as output_handler:
+            json.dump(results, output_handler, indent=4)
+
+    try:
+        with open(args.baseline, "r", encoding="utf8") as baseline_handler:
+            baseline = json.load(baseline_handler)
+
+    except FileNotFoundError:
+        baseline = {}
+
+    regressed = False
+    print(f"{'Benchmark':<20}{'ns/op':>14}{'vs baseline':>14}")
+
+    for name, ns_per_op, ratio, slower in compare(results, baseline, args.tolerance):
+        versus = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<20}{ns_per_op:>14.1f}{versus:>14}{'  REGRESSION' if slower else ''}")
+        regressed = regressed or slower
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf8") as baseline_handler:
+            json.dump(results, baseline_handler, indent=4)
+
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Load test of `check.py multiple` against the mock server, at increasing concurrency
+
+    python -m benchmarks.loadtest --concurrency 1 4 16 64 --rows 2000 \\
+        --latency lognormal:0.05,0.5 --error_rate 0.01 --output loadtest.json
+"""
+
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, BooleanOptionalAction
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils import load_config
+from .mock_server import add_mock_arguments, mock_settings
+from .suite import create_students
+
+# Root of the repository, where check.py lives.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds to wait for the mock server to listen.
+STARTUP_TIMEOUT = 120.0
+
+# Latency quantiles reported.
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def histogram_quantile(buckets: Dict[str, int], quantile: float) -> Optional[float]:
+    """Estimate a quantile from a latency histogram, as Prometheus does.
+
+    Args:
+        buckets (Dict[str, int]): responses per bucket, by upper bound (`+Inf` last).
+        quantile (float): the quantile (0 to 1).
+
+    Returns:
+        Optional[float]: the latency, interpolated within its bucket. None if empty.
+    """
+
+    total = sum(buckets.values())
+
+    if total == 0:
+        return None
+
+    rank = quantile * total
+    cumulative, lower = 0, 0.0
+
+    for bound, count in buckets.items():
+        if bound == "+Inf":
+            return lower
+
+        if cumulative + count >= rank and count > 0:
+            return lower + (float(bound) - lower) * (rank - cumulative) / count
+
+        cumulative += count
+        lower = float(bound)
+
+    return lower
+
+
+def create_rows(students: List[Dict[str, Any]], count: int, valid_ratio: float,
+                seed: int) -> List[Tuple[str, str]]:
+    """Rows of the checked .csv file, by Student ID or name, valid or not.
+
+    Args:
+        students (List[Dict[str, Any]]): students of the mock server.
+        count (int): number of rows.
+        valid_ratio (float): share of rows matching a student.
+        seed (int): seed of the rows.
+
+    Returns:
+        List[Tuple[str, str]]: the rows.
+    """
+
+    rng = random.Random(seed)
+    rows = []
+
+    for _ in range(count):
+        student = rng.choice(students)
+        name = student["masv"] if rng.random() < 0.5 else student["hoten"]
+        degree_id = student["sobang"] if rng.random() < valid_ratio \
+            else f"SOBANG/{rng.randrange(10 ** 8):08}"
+
+        rows.append((name, degree_id))
+
+    return rows
+
+
+def port_in_use(host: str, port: int) -> bool:
+    """Tell whether something already listens on a port."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        return probe.connect_ex((host, port)) == 0
+
+
+def wait_for_port(host: str, port: int, process: subprocess.Popen) -> None:
+    """Wait until the mock server listens.
+
+    Raises:
+        RuntimeError: the server exited or did not listen in time.
+    """
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The mock server exited")
+
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+
+        except OSError:
+            time.sleep(0.2)
+
+    raise RuntimeError("The mock server did not start in time")
+
+
+def run_level(args: Any, directory: str, concurrency: int) -> Dict[str, Any]:
+    """Run `check.py multiple` at a concurrency level.
+
+    Returns:
+        Dict[str, Any]: throughput, latency quantiles, responses by status and retries.
+    """
+
+    metrics_path = os.path.join(directory, f"metrics.{concurrency}.json")
+
+    started_at = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "check.py"),
+                    "--config", os.path.join(directory, "config.json"),
+                    "--engine", args.engine, "--format", "jsonl", "--no-cache", "--no-snapshot",
+                    "--output_file", os.path.join(directory, f"output.{concurrency}.jsonl"),
+                    "--metrics", metrics_path,
+                    "multiple", "--file", os.path.join(directory, "check.csv"),
+                    "--workers", str(concurrency)],
+                   check=True, stdout=subprocess.DEVNULL, cwd=directory)
+    wall = time.perf_counter() - started_at
+
+    with open(metrics_path, "r", encoding="utf8") as metrics_handler:
+        metrics = json.load(metrics_handler)
+
+    result = {
+        "concurrency": concurrency,
+        "wall": wall,
+        "rows_per_second": metrics["rows_per_second"],
+        "requests": metrics["requests"],
+        "retries": metrics["retries"],
+    }
+
+    for quantile in QUANTILES:
+        result[f"p{int(quantile * 100)}"] = histogram_quantile(
+            metrics["latency"]["buckets"], quantile)
+
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main function"""
+
+    parser = ArgumentParser(prog="python -m benchmarks.loadtest")
+    parser.add_argument("--config", default=os.path.join(ROOT, "configs", "config.json"),
+                        help="Config of check.py (its API URL is replaced by the mock server)")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the mock server")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                        help="Worker counts to run check.py with")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows of the checked .csv file")
+    parser.add_argument("--valid_ratio", type=float, default=0.5,
+                        help="Share of rows matching a student")
+    parser.add_argument("--engine", default="sync", choices=["sync", "async"],
+                        help="Request engine of check.py")
+    parser.add_argument("--rate_limit", default=None, action=BooleanOptionalAction,
+                        help="Keep the client-side rate limiter (as set in the config by default)")
+    parser.add_argument("--output", default=None, help="Write the results (JSON) to a file")
+    add_mock_arguments(parser)
+
+    args = parser.parse_args(argv)
+    settings = mock_settings(args)
+
+    rows = create_rows(create_students(args.students, args.seed), args.rows,
+                       args.valid_ratio, args.seed)
+
+    config = load_config(args.config)
+    config["api_url"] = f"http://127.0.0.1:{args.port}/dstn"
+
+    if args.rate_limit is not None:
+        config.setdefault("rate_limit", {})["enabled"] = args.rate_limit
+
+    # Otherwise the load would go to whatever already listens there.
+    if port_in_use("127.0.0.1", args.port):
+        parser.error(f"Port {args.port} is already in use")
+
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "benchmarks.mock_server", "--port", str(args.port)]
+        + [f"--{key}={value}" for key, value in settings.items()],
+        cwd=ROOT, stdout=subprocess.DEVNULL)
+
+    results = []
+
+    try:
+        wait_for_port("127.0.0.1", args.port, server)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "config.json"), "w", encoding="utf8") as handler:
+                json.dump(config, handler)
+
+            with open(os.path.join(directory, "check.csv"), "w", encoding="utf8") as handler:
+                for name, degree_id in rows:
+                    print(f'"{name}",{degree_id}', file=handler)
+
+            print(f"{'Workers':>8}{'Rows/s':>10}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}"
+                  f"{'Retries':>9}  Responses")
+
+            for concurrency in args.concurrency:
+                result = run_level(args, directory, concurrency)
+                results.append(result)
+
+                print(f"{concurrency:>8}{result['rows_per_second']:>10.1f}"
+                      + "".join(f"{result[key] or 0.0:>10.3f}" for key in ["p50", "p95", "p99"])
+                      + f"{result['retries']:>9}  {result['requests']}")
+
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as output_handler:
+            json.dump({"settings": settings, "engine": args.engine, "rows": args.rows,
+                       "results": results}, output_handler, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Local stand-in for the DSSVTN endpoint, with latency and fault injection
+
+    python -m benchmarks.mock_server --port 8765 --students 10000 \\
+        --latency lognormal:0.05,0.5 --error_rate 0.01 --max_rate 200
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from argparse import ArgumentParser
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from src.utils import normalize_degree_id, normalize_name
+from .suite import create_students
+
+# Default settings of the mock server.
+DEFAULT_MOCK = {
+    "students": 10000,
+    "seed": 0,
+    "latency": "fixed:0",
+    "error_rate": 0.0,
+    "max_rate": 0.0,
+    "slow_body_rate": 0.0,
+    "slow_body_time": 1.0,
+}
+
+# Chunks a slow body is sent in.
+SLOW_BODY_CHUNKS = 10
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Parse a latency distribution.
+
+    Supported distributions (in seconds):
+        - `fixed:D`: always D.
+        - `uniform:A,B`: between A and B.
+        - `exponential:MEAN`: exponential of mean MEAN.
+        - `lognormal:MEDIAN,SIGMA`: log-normal of median MEDIAN, with a long tail
+          growing with SIGMA.
+
+    Args:
+        spec (str): the distribution, e.g. `lognormal:0.05,0.5`.
+        rng (random.Random): random generator.
+
+    Returns:
+        Callable[[], float]: draws a latency.
+
+    Raises:
+        ValueError: unknown distribution or wrong parameters.
+    """
+
+    name, _, arguments = spec.partition(":")
+    values = [float(value) for value in arguments.split(",") if value]
+
+    distributions = {
+        "fixed": (1, lambda delay: delay),
+        "uniform": (2, rng.uniform),
+        "exponential": (1, lambda mean: rng.expovariate(1 / mean) if mean > 0 else 0.0),
+        "lognormal": (2, lambda median, sigma: rng.lognormvariate(math.log(median), sigma)),
+    }
+
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise ValueError(f"Unknown latency distribution {spec!r}")
+
+    draw = distributions[name][1]
+
+    return lambda: draw(*values)
+
+
+class MockDSTN:  # pylint: disable=too-many-instance-attributes
+    """Answer DSSVTN queries (`masv`, `sobang`, `rows`, `page`, `sord`) from generated students.
+
+    `masv` matches the Student ID or the name of a student, both normalized as
+    the client does.
+    """
+
+    # Generated students, as the API sends them.
+    students: List[Dict[str, Any]]
+
+    # Students by (normalized Student ID or name, normalized degree ID).
+    index: Dict[Tuple[str, str], List[Dict[str, Any]]]
+
+    # Share of requests answered with a 500.
+    error_rate: float
+
+    # Requests per second served, beyond which 429 is answered (0 for no limit).
+    max_rate: float
+
+    # Share of responses whose body is sent slowly, and the time it takes.
+    slow_body_rate: float
+    slow_body_time: float
+
+    # Responses sent, by status code.
+    served: Dict[int, int]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        settings = dict(DEFAULT_MOCK)
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+
+        self.rng = random.Random(settings["seed"])
+        self.latency = parse_latency(settings["latency"], self.rng)
+        self.error_rate = settings["error_rate"]
+        self.max_rate = settings["max_rate"]
+        self.slow_body_rate = settings["slow_body_rate"]
+        self.slow_body_time = settings["slow_body_time"]
+
+        self.students = create_students(settings["students"], settings["seed"])
+        self.index = defaultdict(list)
+
+        for student in self.students:
+            degree_id = normalize_degree_id(student["sobang"])
+            self.index[(normalize_name(student["masv"]), degree_id)].append(student)
+            self.index[(normalize_name(student["hoten"]), degree_id)].append(student)
+
+        self.served = defaultdict(int)
+
+        # Token bucket of the throttling.
+        self.tokens = self.max_rate
+        self.refilled_at = time.monotonic()
+
+    def throttled(self) -> bool:
+        """Take a token for a request, telling whether it is over the rate."""
+
+        if self.max_rate <= 0:
+            return False
+
+        now = time.monotonic()
+        self.tokens = min(self.max_rate, self.tokens + (now - self.refilled_at) * self.max_rate)
+        self.refilled_at = now
+
+        if self.tokens < 1:
+            return True
+
+        self.tokens -= 1
+        return False
+
+    def find(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """Response body of a query.
+
+        Args:
+            query (Dict[str, str]): query parameters.
+
+        Returns:
+            Dict[str, Any]: `total` and the `rows` of the page asked.
+        """
+
+        matches = self.index.get((normalize_name(query.get("masv", None)),
+                                  normalize_degree_id(query.get("sobang", None))), [])
+
+        if query.get("sord", "desc") == "desc":
+            matches = matches[::-1]
+
+        rows = int(query.get("rows", None) or 10)
+        start = (int(query.get("page", None) or 1) - 1) * rows
+
+        return {"total": len(matches), "rows": matches[start:start + rows]}
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """GET /dstn : answer a query, after the injected latency and faults."""
+
+        if self.throttled():
+            self.served[429] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+
+        await asyncio.sleep(self.latency())
+
+        if self.rng.random() < self.error_rate:
+            self.served[500] += 1
+            return web.Response(status=500, text="Internal Server Error")
+
+        body = json.dumps(self.find(request.query), ensure_ascii=False).encode("utf8")
+        self.served[200] += 1
+
+        if self.rng.random() >= self.slow_body_rate:
+            return web.Response(body=body, content_type="application/json")
+
+        # Headers right away, then the body a chunk at a time.
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        response.content_length = len(body)
+        await response.prepare(request)
+
+        size = -(-len(body) // SLOW_BODY_CHUNKS)
+
+        for start in range(0, len(body), size):
+            await response.write(body[start:start + size])
+            await asyncio.sleep(self.slow_body_time / SLOW_BODY_CHUNKS)
+
+        await response.write_eof()
+        return response
+
+    async def handle_stats(self, _: web.Request) -> web.Response:
+        """GET /stats : responses sent, by status code."""
+
+        return web.json_response({str(status): count for status, count in self.served.items()})
+
+    def create_app(self) -> web.Application:
+        """Create the server.
+
+        Returns:
+            web.Application: the server, answering queries at `/dstn`.
+        """
+
+        app = web.Application()
+        app.router.add_get("/dstn", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+
+        return app
+
+
+def add_mock_arguments(parser: ArgumentParser) -> None:
+    """Add the settings of the mock server to a parser.
+
+    Args:
+        parser (ArgumentParser): the parser.
+    """
+
+    parser.add_argument("--students", type=int, default=DEFAULT_MOCK["students"],
+                        help="Number of generated students")
+    parser.add_argument("--seed", type=int, default=DEFAULT_MOCK["seed"],
+                        help="Seed of the generated students and the injected faults")
+    parser.add_argument("--latency", default=DEFAULT_MOCK["latency"],
+                        help="Latency distribution: fixed:D, uniform:A,B, exponential:MEAN "
+                        "or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--error_rate", type=float, default=DEFAULT_MOCK["error_rate"],
+                        help="Share of requests answered with a 500")
+    parser.add_argument("--max_rate", type=float, default=DEFAULT_MOCK["max_rate"],
+                        help="Requests per second served before answering 429 (0 for no limit)")
+    parser.add_argument("--slow_body_rate", type=float, default=DEFAULT_MOCK["slow_body_rate"],
+                        help="Share of responses whose body is sent slowly")
+    parser.add_argument("--slow_body_time", type=float, default=DEFAULT_MOCK["slow_body_time"],
+                        help="Seconds taken to send a slow body")
+
+
+def mock_settings(args: Any) -> Dict[str, Any]:
+    """Settings of the mock server, from parsed arguments."""
+
+    return {key: getattr(args, key) for key in DEFAULT_MOCK}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main function"""
+
+    parser = ArgumentParser(prog="python -m benchmarks.mock_server")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    add_mock_arguments(parser)
+
+    args = parser.parse_args(argv)
+    mock = MockDSTN(**mock_settings(args))
+
+    web.run_app(mock.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Micro-benchmarks of the CPU-side hot paths, run locally without network"""
+
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from faker import Faker
+from src.dstn import DSTNItem, DSTNListItem, DSTNListRequest, DSTNSingleRequest
+from src.utils import load_config, load_csv
+from tests.factory.student_factory import StudentFactory
+
+# Path to the stored baseline.
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Timed runs of each benchmark (the median is kept).
+REPEAT = 5
+
+# Slowdown (relative to the baseline) reported as a regression.
+TOLERANCE = 0.3
+
+# Size of the synthetic inputs, multiplied by the scale of a run.
+SIZES = {
+    "students": 2000,
+    "list_items": 100000,
+    "csv_rows": 100000,
+    "config_loads": 200,
+    "queries": 5000,
+}
+
+# Settings of the requests answered by the canned session.
+REQUEST_CONFIG = {
+    "api_url": "http://localhost/dstn",
+    "headers": {},
+    "results": {"rows": 10, "page": 1, "sord": "desc"},
+}
+
+# Directory holding the configs benchmarked.
+CONFIG_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "configs")
+
+
+class CannedResponse:  # pylint: disable=too-few-public-methods
+    """Response of the canned session: only what the engines read from a response."""
+
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, content: bytes) -> None:
+        self.status_code = 200
+        self.content = content
+
+
+class CannedSession:  # pylint: disable=too-few-public-methods
+    """Answer queries with bodies encoded in advance, so only the client side is timed.
+
+    A stand-in for `requests.Session`, local to the benchmarks so that they do not
+    depend on the fakes of the test suite.
+    """
+
+    # Encoded responses, by degree ID.
+    bodies: Dict[str, bytes]
+
+    def __init__(self, students: Iterable[Dict[str, str]]) -> None:
+        """Initialization"""
+
+        self.bodies = {
+            student["sobang"]: json.dumps({"total": 1, "rows": [student]},
+                                          ensure_ascii=False).encode("utf8")
+            for student in students
+        }
+        self.empty = b'{"total": 0, "rows": []}'
+
+    def get(self, url: str, params: Dict[str, str], **kwargs) -> CannedResponse:
+        """Answer a GET request."""
+
+        _ = url, kwargs
+
+        return CannedResponse(self.bodies.get(params["sobang"], self.empty))
+
+
+def create_students(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Generate the same students on every run.
+
+    Args:
+        count (int): number of students.
+        seed (int, optional): seed of the generated data. Defaults to 0.
+
+    Returns:
+        List[Dict[str, str]]: the students, as the API sends them.
+    """
+
+    random.seed(seed)
+    Faker.seed(seed)
+    factory = StudentFactory()
+
+    return [factory.create_student() for _ in range(count)]
+
+
+def bench_item(language: str) -> Callable[[Dict[str, int], str], Tuple[Callable, int]]:
+    """DSTNItem construction."""
+
+    def setup(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+        students = create_students(sizes["students"])
+
+        return lambda: [DSTNItem(json=student, language=language) for student in students], \
+            len(students)
+
+    return setup
+
+
+def bench_get_string(language: str) -> Callable[[Dict[str, int], str], Tuple[Callable, int]]:
+    """DSTNItem.get_string."""
+
+    def setup(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+        items = [DSTNItem(json=student, language=language)
+                 for student in create_students(sizes["students"])]
+
+        return lambda: [item.get_string() for item in items], len(items)
+
+    return setup
+
+
+def create_list_items(count: int) -> List[DSTNListItem]:
+    """Generate validation results."""
+
+    return [DSTNListItem(name=f"Nguyễn Văn {index}", degree_id=f"QH{index:06}",
+                         status=index % 3 == 0) for index in range(count)]
+
+
+def bench_list_item_str(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+    """DSTNListItem.__str__."""
+
+    items = create_list_items(sizes["list_items"])
+
+    return lambda: [str(item) for item in items], len(items)
+
+
+def bench_list_item_asdict(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+    """DSTNListItem.asdict."""
+
+    items = create_list_items(sizes["list_items"])
+
+    return lambda: [item.asdict() for item in items], len(items)
+
+
+def bench_load_csv(sizes: Dict[str, int], directory: str) -> Tuple[Callable, int]:
+    """load_csv of a large file."""
+
+    path = os.path.join(directory, "check.csv")
+
+    with open(path, "w", encoding="utf8") as csv_handler:
+        for index in range(sizes["csv_rows"]):
+            print(f"Nguyễn Văn {index},QH{index:06}", file=csv_handler)
+
+    return lambda: load_csv(path), sizes["csv_rows"]
+
+
+def bench_load_config(extension: str) -> Callable[[Dict[str, int], str], Tuple[Callable, int]]:
+    """load_config of the shipped config."""
+
+    def setup(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+        path = os.path.join(CONFIG_DIRECTORY, f"config.{extension}")
+        count = sizes["config_loads"]
+
+        return lambda: [load_config(path) for _ in range(count)], count
+
+    return setup
+
+
+def bench_request_get(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+    """DSTNRequest.get of canned responses (sending, status check, JSON decoding)."""
+
+    students = create_students(min(sizes["queries"], sizes["students"]))
+    req = DSTNSingleRequest(session=CannedSession(students), **REQUEST_CONFIG)
+    queries = [req.query_params(student["masv"], student["sobang"]) for student in students]
+
+    return lambda: [req.get(params) for params in queries], len(queries)
+
+
+def bench_request_check(sizes: Dict[str, int], _: str) -> Tuple[Callable, int]:
+    """DSTNListRequest.check of canned responses (counting results only)."""
+
+    students = create_students(min(sizes["queries"], sizes["students"]))
+    req = DSTNListRequest(session=CannedSession(students[::2]), **REQUEST_CONFIG)
+    rows = [(student["masv"], student["sobang"]) for student in students]
+
+    return lambda: [req.check(*row) for row in rows], len(rows)
+
+
+# Benchmarks, by name.
+BENCHMARKS = {
+    "item_vn": bench_item("vn"),
+    "item_en": bench_item("en"),
+    "get_string_vn": bench_get_string("vn"),
+    "get_string_en": bench_get_string("en"),
+    "list_item_str": bench_list_item_str,
+    "list_item_asdict": bench_list_item_asdict,
+    "load_csv": bench_load_csv,
+    "load_config_json": bench_load_config("json"),
+    "load_config_yaml": bench_load_config("yaml"),
+    "request_get": bench_request_get,
+    "request_check": bench_request_check,
+}
+
+
+def run_suite(directory: str, names: Optional[Iterable[str]] = None, scale: float = 1.0,
+              repeat: int = REPEAT) -> Dict[str, Any]:
+    """Run the benchmarks.
+
+    Args:
+        directory (str): directory for the synthetic input files.
+        names (Optional[Iterable[str]], optional): benchmarks to run. Defaults to None (all).
+        scale (float, optional): multiplier of the input sizes. Defaults to 1.0.
+        repeat (int, optional): timed runs of each benchmark. Defaults to REPEAT.
+
+    Returns:
+        Dict[str, Any]: environment of the run and, by benchmark, its operations and
+            timings (seconds, nanoseconds per operation for the median run).
+    """
+
+    sizes = {key: max(1, int(size * scale)) for key, size in SIZES.items()}
+    results = {}
+
+    for name in names or BENCHMARKS:
+        function, ops = BENCHMARKS[name](sizes, directory)
+
+        # Warm up caches (imports, interned layouts) before timing.
+        function()
+        timings = []
+
+        # As timeit does, the garbage collector is kept out of the timings (its pauses
+        # depend on everything else alive in the process, not on the code timed).
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+
+            try:
+                started_at = time.perf_counter()
+                function()
+                timings.append(time.perf_counter() - started_at)
+
+            finally:
+                gc.enable()
+
+        median = statistics.median(timings)
+
+        results[name] = {
+            "ops": ops,
+            "best": min(timings),
+            "median": median,
+            "ns_per_op": median / ops * 1e9,
+        }
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "benchmarks": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = TOLERANCE) -> List[Tuple[str, float, Optional[float], bool]]:
+    """Compare a run to the baseline.
+
+    Args:
+        results (Dict[str, Any]): results of the run (see `run_suite`).
+        baseline (Dict[str, Any]): results of the baseline run.
+        tolerance (float, optional): slowdown tolerated. Defaults to TOLERANCE.
+
+    Returns:
+        List[Tuple[str, float, Optional[float], bool]]: name, nanoseconds per operation,
+            ratio to the baseline (None if not in the baseline) and whether it regressed.
+    """
+
+    comparison = []
+
+    for name, result in results["benchmarks"].items():
+        reference = baseline.get("benchmarks", {}).get(name, None)
+        ratio = result["ns_per_op"] / reference["ns_per_op"] if reference else None
+
+        comparison.append((name, result["ns_per_op"], ratio,
+                           ratio is not None and ratio > 1 + tolerance))
+
+    return comparison
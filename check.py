@@ -6,10 +6,25 @@ Author(s):
     - Xuong L. Tran <xuong@trhgquan.xyz>
 """
 
-from argparse import ArgumentParser
-from typing import Dict
-from src.dstn import DSTNSingleRequest, DSTNListRequest
-from src.utils import load_config, load_csv, FAIL, OKGREEN, ENDC
+import os
+import sys
+from argparse import ArgumentParser, BooleanOptionalAction
+from contextlib import ExitStack
+from typing import Dict, Iterable, Optional, Tuple
+from src.dstn import DSTNSingleRequest, DSTNListRequest, DSTNListItem
+from src.errors import error_settings
+from src.journal import Journal, pending_rows
+from src.export import EXPORT_BUFFER, EXPORTERS, LIST_COLUMNS, Exporter, get_exporter
+from src.metrics import METRICS
+from src.profiling import PROFILER, capture
+from src.render import STYLES, ItemRenderer
+from src.shard import iter_list_records, merge_shards, parse_shard, shard_rows
+from src.snapshot import DEFAULT_SNAPSHOT, SnapshotStore, iter_json_records
+from src.utils import load_config, iter_csv, FAIL, OKGREEN, ENDC
+
+# The async engine, the crawler and the server (and asyncio/aiohttp with them) are only
+# imported by the modes using them, to keep the startup of the others short.
+# pylint: disable=import-outside-toplevel
 
 
 def handle_single_request(config: Dict[str, str], args: Dict[str, str]) -> None:
@@ -27,29 +42,107 @@ def handle_single_request(config: Dict[str, str], args: Dict[str, str]) -> None:
     config.update({
         "student_name": args.student_name,
         "degree_id": args.degree_id,
-        "language": args.language
+        "language": args.language,
+        "all_pages": args.all_pages,
+        "workers": args.workers,
+        "concurrency": args.workers
     })
 
-    req = DSTNSingleRequest(**config)
+    if args.engine == "async":
+        import asyncio
+        from src.async_dstn import AsyncDSTNSingleRequest
 
-    record_list = req.process()
+        with PROFILER.phase("build"):
+            req = AsyncDSTNSingleRequest(**config)
 
-    # Print record to file (if required from arguments)
-    if args.output_file is not None:
-        with open(args.output_file, "w+", encoding="utf8") as output_handler:
-            for record in record_list:
-                print(record, file=output_handler)
+        record_list = asyncio.run(req.process())
+
+    else:
+        with PROFILER.phase("build"):
+            req = DSTNSingleRequest(**config)
+
+        record_list = req.process()
+
+    with ExitStack() as stack:
+        output_handler = sys.stdout
+
+        # Print record to file (if required from arguments)
+        if args.output_file is not None:
+            output_handler = stack.enter_context(open(
+                args.output_file, "w+", encoding="utf8", buffering=EXPORT_BUFFER))
 
+        if args.format == "table":
+            ItemRenderer(style=args.style).write(record_list, output_handler)
+
+        else:
+            with PROFILER.phase("write"):
+                get_exporter(args.format, output_handler).write_all(record_list)
+
+    if args.output_file is not None:
         print(f"Results has been written to {args.output_file}")
 
-    else:
-        for record in record_list:
-            print(record)
+    if not req.complete and record_list:
+        print(f"Only {len(record_list)} records were fetched: a page failed, "
+              "the results are partial", file=sys.stderr)
+
+
+def print_record(record: DSTNListItem, exporter: Optional[Exporter],
+                 journal: Optional[Journal] = None) -> None:
+    """Print a validation result, to the screen (colored) or through an exporter.
+
+    Args:
+        record (DSTNListItem): the validation result.
+        exporter (Optional[Exporter]): exporter to the output (None for the colored screen).
+        journal (Optional[Journal], optional): journal recording the result. Defaults to None.
+    """
+
+    if journal is not None:
+        journal.append(record)
+
+    with PROFILER.phase("write"):
+        if exporter is not None:
+            exporter.write(record)
+            return
+
+        record_dict = record.asdict()
+        if record_dict["status"]:
+            print(f"{OKGREEN}\u2714 {record_dict['name']}/{record_dict['degree_id']}" \
+                f" - VALID{ENDC}")
+
+        else:
+            print(f"{FAIL}\u2718 {record_dict['name']}/{record_dict['degree_id']}" \
+                f" - INVALID{ENDC}")
+
+
+def read_student_list(args: Dict[str, str]) -> Iterable[Tuple[str, ...]]:
+    """Read the rows to check (of this shard only, if any)
+
+    Args:
+        args (Dict[str, str]): args get from argparse
+
+    Returns:
+        Iterable[Tuple[str, ...]]: the rows, read lazily in streaming mode.
+    """
+
+    student_list = iter_csv(args.file)
+
+    # Only the rows of this shard, for a batch spread across several machines.
+    if args.shard is not None:
+        student_list = shard_rows(student_list, *parse_shard(args.shard))
+
+    if args.stream:
+        return student_list
+
+    with PROFILER.phase("load_csv"):
+        return list(student_list)
 
 
 def handle_multiple_request(config: Dict[str, str], args: Dict[str, str]) -> None:
     """Handling multiple check request
 
+    Results are written as soon as they are available. In streaming mode the
+    .csv file is read lazily and the output file is flushed after each line.
+
     Args:
         config (Dict[str, str]): config dictionary - retrieved from json/yaml
         args (Dict[str, str]): args get from argparse
@@ -58,35 +151,312 @@ def handle_multiple_request(config: Dict[str, str], args: Dict[str, str]) -> Non
         - Xuong L. Tran <xuong@trhgquan.xyz>
     """
 
-    student_list = load_csv(args.file)
+    student_list = read_student_list(args)
 
-    # Add student list to list of parameters
-    config["student_list"] = student_list
+    # Journal of completed rows, to resume an interrupted run.
+    journal_path = args.journal
 
-    req = DSTNListRequest(**config)
+    if journal_path is None and args.output_file is not None:
+        journal_path = f"{args.output_file}.journal"
 
-    record_list = req.process()
+    journal = Journal(journal_path) if journal_path is not None else None
 
-    # Print result to csv file.
-    if args.output_file is None:
+    # Loaded once: opening the journal to resume reuses what has been read here.
+    record_list = journal.load() if journal is not None and args.resume else []
+
+    if record_list:
+        student_list = pending_rows(student_list, record_list)
+
+    # Add student list and concurrency settings to list of parameters
+    config.update({
+        "student_list": student_list,
+        "workers": args.workers,
+        "concurrency": args.workers,
+        "ordered": not args.unordered
+    })
+
+    with ExitStack() as stack:
+        exporter = None
+
+        # Print result to the output file (or to the screen, in a structured format).
+        if args.output_file is not None:
+            output_handler = stack.enter_context(open(
+                args.output_file, "w+", encoding="utf8",
+                buffering=1 if args.stream else EXPORT_BUFFER))
+            exporter = get_exporter(args.format, output_handler, LIST_COLUMNS)
+
+        elif args.format != "table":
+            exporter = get_exporter(args.format, sys.stdout, LIST_COLUMNS)
+
+        if journal is not None:
+            journal.open(resume=args.resume)
+            stack.callback(journal.close)
+
+        # Results recorded before the interruption come first.
         for record in record_list:
-            record_dict = record.asdict()
-            if record_dict["status"]:
-                print(f"{OKGREEN}\u2714 {record_dict['name']}/{record_dict['degree_id']}" \
-                    f" - VALID{ENDC}")
+            print_record(record, exporter)
 
-            else:
-                print(f"{FAIL}\u2718 {record_dict['name']}/{record_dict['degree_id']}" \
-                    f" - INVALID{ENDC}")
+        if args.engine == "async":
+            import asyncio
+            from src.async_dstn import AsyncDSTNListRequest
 
-    else:
-        with open(args.output_file, "w+", encoding="utf8") as output_handler:
-            print("Name,Degree ID,Status", file=output_handler)
-            for record in record_list:
-                print(record, file=output_handler)
+            with PROFILER.phase("build"):
+                req = AsyncDSTNListRequest(**config)
 
+            async def write_records() -> None:
+                async for record in req.stream():
+                    print_record(record, exporter, journal)
+
+            asyncio.run(write_records())
+
+        else:
+            with PROFILER.phase("build"):
+                req = DSTNListRequest(**config)
+
+            for record in req.stream():
+                print_record(record, exporter, journal)
+
+        # The run has completed, nothing left to resume.
+        if journal is not None:
+            journal.close(remove=True)
+
+    if args.output_file is not None:
         print(f"Status has been written to {args.output_file}")
 
+    print_summary(req, args)
+
+
+def print_summary(req: DSTNListRequest, args: Dict[str, str]) -> None:
+    """Report the request rate and the rows left unchecked, once a batch has run
+
+    Args:
+        req (DSTNListRequest): the request which checked the batch (of either engine).
+        args (Dict[str, str]): args get from argparse
+    """
+
+    # Report the rate the limiter settled on (away from results written to the screen).
+    if req.limiter is not None:
+        print(f"Request rate: {req.limiter.rate:.2f} requests/s",
+              file=sys.stderr if args.output_file is None else sys.stdout)
+
+    if req.failed:
+        print(f"{len(req.failed)} rows could not be checked, added to {req.retry_path} "
+              "(check them again with `check.py retry`)", file=sys.stderr)
+
+
+def handle_retry(config: Dict[str, str], args: Dict[str, str]) -> None:
+    """Handling retry request
+
+    The rows whose lookup failed (added to the retry file by multiple mode) are
+    checked again, as in multiple mode. Those failing once more are written
+    back to the retried file (the one of `--file`, if any).
+
+    Args:
+        config (Dict[str, str]): config dictionary - retrieved from json/yaml
+        args (Dict[str, str]): args get from argparse
+    """
+
+    path = args.file or error_settings(config.get("errors", None))["retry_path"]
+    retrying = f"{path}.retrying"
+
+    # Rows are moved aside first, so that the retry file only gets the rows failing again.
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf8") as retry_handler, \
+                open(retrying, "a", encoding="utf8") as retrying_handler:
+            retrying_handler.write(retry_handler.read())
+
+        os.remove(path)
+
+    # Left by an interrupted retry, if the retry file is gone.
+    if not os.path.exists(retrying):
+        print(f"No rows to retry in {path}")
+        return
+
+    # Rows failing again go back to the file being retried.
+    config["errors"] = dict(config.get("errors", None) or {}, retry_path=path)
+
+    args.file = retrying
+    handle_multiple_request(config, args)
+    os.remove(retrying)
+
+
+def handle_snapshot_build(config: Dict[str, str], args: Dict[str, str]) -> None:
+    """Handling snapshot build request
+
+    Records are imported from .json files of previously fetched results and/or
+    fetched from the API for a range of Student IDs.
+
+    Args:
+        config (Dict[str, str]): config dictionary - retrieved from json/yaml
+        args (Dict[str, str]): args get from argparse
+    """
+
+    snapshot = dict(DEFAULT_SNAPSHOT, **config.get("snapshot", {}))
+    path = args.path or snapshot["path"]
+
+    # The snapshot being built must not answer its own queries.
+    config["snapshot"] = dict(snapshot, enabled=False)
+
+    store = SnapshotStore(path=path)
+
+    for filename in args.json or []:
+        print(f"Imported {store.add(iter_json_records(filename))} records from {filename}")
+
+    if args.crawl is not None:
+        from src.crawl import DSTNCrawlRequest
+
+        first, last = args.crawl
+
+        config.update({
+            "student_ids": (str(student_id).zfill(len(first))
+                            for student_id in range(int(first), int(last) + 1)),
+            "workers": args.workers
+        })
+
+        req = DSTNCrawlRequest(**config)
+        print(f"Fetched {store.add(req.stream())} records from {first} to {last}")
+
+    print(f"Snapshot {path} holds {store.count()} records")
+    store.close()
+
+
+def handle_merge(args: Dict[str, str]) -> None:
+    """Handling merge request
+
+    The results of the shards of a multiple-mode batch are put back into the
+    order of the .csv file. Rows without a result are left out and reported.
+
+    Args:
+        args (Dict[str, str]): args get from argparse
+    """
+
+    missing = []
+
+    with ExitStack() as stack:
+        shard_records = [
+            iter_list_records(stack.enter_context(open(filename, "r", encoding="utf8",
+                                                       newline="")), args.format)
+            for filename in args.inputs
+        ]
+
+        output_handler = sys.stdout
+
+        if args.output_file is not None:
+            output_handler = stack.enter_context(open(
+                args.output_file, "w+", encoding="utf8", buffering=EXPORT_BUFFER))
+
+        exporter = get_exporter(args.format, output_handler, LIST_COLUMNS)
+        exporter.write_all(merge_shards(iter_csv(args.file), shard_records, missing))
+
+    if args.output_file is not None:
+        print(f"Status has been written to {args.output_file}")
+
+    if missing:
+        print(f"{len(missing)} rows have no result (failed, see the retry file of their "
+              "shard, or their shard did not complete):", file=sys.stderr)
+
+        for row in missing:
+            print(f"  {row[0]},{row[1]}", file=sys.stderr)
+
+
+def handle_serve(config: Dict[str, str], args: Dict[str, str]) -> None:
+    """Handling serve request
+
+    Args:
+        config (Dict[str, str]): config dictionary - retrieved from json/yaml
+        args (Dict[str, str]): args get from argparse
+    """
+
+    from src.server import serve
+
+    serve(config, host=args.host, port=args.port)
+
+
+def override_config(config: Dict[str, str], args: Dict[str, str]) -> Dict[str, str]:
+    """Apply the command line switches to the config
+
+    Args:
+        config (Dict[str, str]): config dictionary - retrieved from json/yaml
+        args (Dict[str, str]): args get from argparse
+
+    Returns:
+        Dict[str, str]: the config.
+    """
+
+    # Cache switches override the config.
+    cache = config.setdefault("cache", {})
+
+    if args.cache is not None:
+        cache["enabled"] = args.cache
+
+    if args.refresh:
+        cache["refresh"] = True
+
+    # Snapshot switch overrides the config.
+    if args.snapshot is not None:
+        config.setdefault("snapshot", {})["enabled"] = args.snapshot
+
+    return config
+
+
+def handle_mode(config: Dict[str, str], args: Dict[str, str]) -> None:
+    """Handling the request of the chosen mode
+
+    Args:
+        config (Dict[str, str]): config dictionary - retrieved from json/yaml
+        args (Dict[str, str]): args get from argparse
+    """
+
+    # Single mode
+    if args.mode == "single":
+        handle_single_request(config, args)
+
+    # Multiple mode
+    elif args.mode == "multiple":
+        handle_multiple_request(config, args)
+
+    # Snapshot mode
+    elif args.mode == "snapshot":
+        handle_snapshot_build(config, args)
+
+    # Retry mode
+    elif args.mode == "retry":
+        handle_retry(config, args)
+
+    # Merge mode
+    elif args.mode == "merge":
+        handle_merge(args)
+
+    # Serve mode
+    elif args.mode == "serve":
+        handle_serve(config, args)
+
+
+def run(args: Dict[str, str]) -> None:
+    """Run the chosen mode, profiled and/or measured if required
+
+    Args:
+        args (Dict[str, str]): args get from argparse
+    """
+
+    profile = args.profile or args.profile_cpu is not None or args.profile_memory is not None
+
+    if profile:
+        PROFILER.enable()
+
+    with capture(args.profile_cpu, args.profile_memory):
+        # Load config from file.
+        with PROFILER.phase("load_config"):
+            config = override_config(load_config(args.config), args)
+
+        handle_mode(config, args)
+
+    if profile:
+        print(PROFILER.report(), file=sys.stderr)
+
+    if args.metrics is not None:
+        METRICS.dump(args.metrics)
+
 
 def main():
     """Main function
@@ -102,6 +472,27 @@ def main():
                         help="Config file (config.json/config.yaml)")
     parser.add_argument("--output_file", default=None,
                         help="Path to output file (printing to screen by default)")
+    parser.add_argument("--format", default="table", choices=list(EXPORTERS),
+                        help="Output format (table, or jsonl/csv/tsv with every field)")
+    parser.add_argument("--engine", default="sync", choices=["sync", "async"],
+                        help="Request engine (thread-based sync or asyncio)")
+    parser.add_argument("--cache", default=None, action=BooleanOptionalAction,
+                        help="Use the local result cache (as set in the config by default)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached results, query the API and update the cache")
+    parser.add_argument("--snapshot", default=None, action=BooleanOptionalAction,
+                        help="Answer from the offline snapshot before asking the API "
+                        "(as set in the config by default)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report the wall-clock and CPU time of each phase of the run")
+    parser.add_argument("--profile_cpu", default=None,
+                        help="Profile the run with cProfile and write the report to a file")
+    parser.add_argument("--profile_memory", default=None,
+                        help="Trace the memory allocations of the run "
+                        "and write the report to a file")
+    parser.add_argument("--metrics", default=None,
+                        help="Dump the request metrics to a file at the end of the run "
+                        "(JSON for a .json file, Prometheus text format otherwise)")
 
     sub_parsers = parser.add_subparsers(dest="mode", required=True)
 
@@ -112,25 +503,72 @@ def main():
     single.add_argument("--degree_id", default=None,
                         help="Degree ID no.")
     single.add_argument("--language", default="vn", help="Language (en/vn)")
+    single.add_argument("--all_pages", action="store_true",
+                        help="Fetch every page of the result instead of the first one")
+    single.add_argument("--workers", type=int, default=4,
+                        help="Number of pages fetched concurrently (with --all_pages)")
+    single.add_argument("--style", default="table", choices=STYLES,
+                        help="Output style (tables, or plain tab-separated lines for piping)")
 
     # Multiple mode
     multiple = sub_parsers.add_parser("multiple")
     multiple.add_argument("--file", default=None,
                           help="Path to the .csv file to check")
+    multiple.add_argument("--workers", type=int, default=1,
+                          help="Number of lookups sent concurrently (in-flight limit for async)")
+    multiple.add_argument("--unordered", action="store_true",
+                          help="Write results as soon as they complete instead of in input order")
+    multiple.add_argument("--stream", action="store_true",
+                          help="Read the .csv file lazily and flush each result to the output file")
+    multiple.add_argument("--journal", default=None,
+                          help="Journal of completed rows (OUTPUT_FILE.journal by default)")
+    multiple.add_argument("--resume", action="store_true",
+                          help="Skip the rows recorded in the journal by an interrupted run")
+    multiple.add_argument("--shard", default=None, metavar="i/N",
+                          help="Only check the i-th of N disjoint parts of the .csv file")
+
+    # Retry mode
+    retry = sub_parsers.add_parser("retry")
+    retry.add_argument("--file", default=None,
+                       help="Rows whose lookup failed (errors.retry_path of the config "
+                       "by default)")
+    retry.add_argument("--workers", type=int, default=1,
+                       help="Number of lookups sent concurrently (in-flight limit for async)")
+    retry.add_argument("--unordered", action="store_true",
+                       help="Write results as soon as they complete instead of in input order")
+    retry.set_defaults(stream=False, journal=None, resume=False, shard=None)
+
+    # Merge mode
+    merge = sub_parsers.add_parser("merge")
+    merge.add_argument("--file", required=True,
+                       help="Path to the .csv file the shards were run on")
+    merge.add_argument("inputs", nargs="+",
+                       help="Output files of the shards (written in --format)")
+
+    # Snapshot mode
+    snapshot = sub_parsers.add_parser("snapshot")
+    snapshot_parsers = snapshot.add_subparsers(dest="action", required=True)
+
+    build = snapshot_parsers.add_parser("build")
+    build.add_argument("--path", default=None,
+                       help="Path to the snapshot (as set in the config by default)")
+    build.add_argument("--json", nargs="+", default=None,
+                       help="Import previously fetched results (.json/.jsonl files)")
+    build.add_argument("--crawl", nargs=2, default=None, metavar=("FIRST", "LAST"),
+                       help="Fetch the records of a range of Student IDs from the API")
+    build.add_argument("--workers", type=int, default=1,
+                       help="Number of lookups sent concurrently while crawling")
+
+    # Serve mode
+    server = sub_parsers.add_parser("serve")
+    server.add_argument("--host", default=None,
+                        help="Address to listen on (as set in the config by default)")
+    server.add_argument("--port", type=int, default=None,
+                        help="Port to listen on (as set in the config by default)")
 
     args = parser.parse_args()
 
-    # Load config from file.
-    config = load_config(args.config)
-
-    # Single mode
-    if args.mode == "single":
-        handle_single_request(config, args)
-
-    # Multiple mode
-    elif args.mode == "multiple":
-        handle_multiple_request(config, args)
-
+    run(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,510 @@
+"""asyncio counterparts of the DSTN request classes
+
+The engine-agnostic parts are shared with `src.dstn` (see `src.base`), only
+sending the requests and running them concurrently are done differently.
+"""
+
+import asyncio
+from abc import abstractmethod
+from contextlib import asynccontextmanager
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import aiohttp
+from .base import Attempt, BaseDSTNListRequest, BaseDSTNRequest, BaseDSTNSingleRequest, \
+    STREAM_WINDOW
+from .coalesce import AsyncSingleFlight
+from .exception import NotFoundException, HTTPException
+from .item import DSTNItem, DSTNListItem
+from .metrics import METRICS
+from .profiling import PROFILER
+from .session import connection_settings
+
+
+class BufferedResponse:  # pylint: disable=too-few-public-methods
+    """Status and body of an aiohttp response, kept after the connection is released."""
+
+    # HTTP status code.
+    status_code: int
+
+    # Raw body of the response.
+    content: bytes
+
+    def __init__(self, status_code: int, content: bytes) -> None:
+        """Initialization"""
+
+        self.status_code = status_code
+        self.content = content
+
+
+class AsyncDSTNRequest(BaseDSTNRequest):
+    """Abstract asynchronous request class"""
+
+    # Connection settings (see `src.session`).
+    connection: Dict[str, Any]
+
+    # Maximum number of lookups in flight.
+    concurrency: int
+
+    # Non-blocking HTTP session.
+    session: Optional[aiohttp.ClientSession]
+
+    # Identical queries in flight (may be shared with other requests).
+    flights: AsyncSingleFlight
+
+    def __init__(self, **kwargs) -> None:
+        """Initialize"""
+
+        super().__init__(**kwargs)
+
+        self.connection = connection_settings(kwargs.get("connection", None))
+        self.concurrency = max(1, kwargs.get("concurrency", None)
+                               or self.connection["pool_maxsize"])
+        self.semaphore = kwargs.get("semaphore", None) or asyncio.Semaphore(self.concurrency)
+
+        # Sessions given by the caller are never closed by this class.
+        self.session = kwargs.get("session", None)
+        self.owns_session = False
+
+        self.flights = kwargs.get("flights", None) or AsyncSingleFlight()
+
+    async def open(self) -> bool:
+        """Create the HTTP session if there is none yet.
+
+        Returns:
+            bool: True if a new session has been created.
+        """
+
+        if self.session is not None:
+            return False
+
+        limit = max(self.concurrency, self.connection["pool_maxsize"])
+
+        connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit,
+            force_close=not self.connection["keep_alive"],
+        )
+
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.connection["timeout"]),
+        )
+        self.owns_session = True
+
+        return True
+
+    async def close(self) -> None:
+        """Close the HTTP session if it was created by this class."""
+
+        if self.owns_session and self.session is not None:
+            await self.session.close()
+
+            self.session = None
+            self.owns_session = False
+
+    async def __aenter__(self) -> "AsyncDSTNRequest":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for the circuit breaker and the rate limiter, then hold a slot of the
+        scheduler while the block runs.
+
+        The slot is only taken once the request may be sent: a throttled request
+        never keeps requests of a higher priority waiting.
+        """
+
+        if self.breaker is not None:
+            self.breaker.before_request()
+
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+
+        if self.scheduler is None:
+            yield
+            return
+
+        async with self.scheduler.slot_async(self.priority):
+            yield
+
+    async def send(self, params: Dict[str, str]) -> BufferedResponse:
+        """Send a GET request, retrying timeouts, connection errors and retryable statuses.
+
+        A slot is only held while a request is in flight, not while waiting for a retry.
+
+        Args:
+            params (Dict[str, str]): query parameters of this request.
+
+        Returns:
+            BufferedResponse: the last response received.
+        """
+
+        # aiohttp only accepts str, int or float as query values.
+        query = {key: value for key, value in params.items() if value is not None}
+
+        attempt = 0
+
+        while True:
+            async with self.semaphore, self.slot():
+                with Attempt(self, attempt) as sent:
+                    try:
+                        async with self.session.get(self.api_url, params=query,
+                                                    headers=self.headers) as raw_response:
+                            response = BufferedResponse(raw_response.status,
+                                                        await raw_response.read())
+
+                    except asyncio.TimeoutError as timeout_exception_handler:
+                        raise HTTPException("Connection timeout") from timeout_exception_handler
+
+                    # Connection refused or reset, body cut short, ...
+                    except aiohttp.ClientError as connection_exception_handler:
+                        raise HTTPException("Connection error") from connection_exception_handler
+
+                    if sent.answered(response):
+                        return response
+
+            METRICS.retried()
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    async def fetch(self, params: Dict[str, str]) -> Any:
+        """Get the decoded response of a query, from the cache or from the API.
+
+        Args:
+            params (Dict[str, str]): query parameters of this request.
+
+        Returns:
+            Any: decoded response.
+        """
+
+        response_json = self.cached_json(params)
+
+        if response_json is None:
+            response_json = self.decode_json(params, await self.send(params))
+
+        return response_json
+
+    async def get(self, params: Optional[Dict[str, str]] = None) -> Any:
+        """Sending a GET request, waiting for a free slot if too many are in flight.
+
+        Queries matching a record of the snapshot are answered locally. Identical
+        queries sent at the same time share a single request.
+
+        Args:
+            params (Optional[Dict[str, str]], optional): query parameters of this request.
+                Defaults to None (using `self.params`).
+
+        Returns:
+            Any: response data.
+        """
+
+        with PROFILER.phase("get"):
+            params, response_json = self.resolve(params)
+
+            if response_json is None:
+                response_json = await self.flights.call(self.flight_key(params),
+                                                        lambda: self.fetch(params))
+
+        return self.found(response_json)
+
+    async def fetch_total(self, params: Dict[str, str]) -> int:
+        """Get the number of results of a query, from the cache or from the API.
+
+        Args:
+            params (Dict[str, str]): query parameters of this request.
+
+        Returns:
+            int: number of results.
+        """
+
+        total = self.cached_total(params)
+
+        if total is None:
+            total = self.decode_total(params, await self.send(params))
+
+        return total
+
+    async def get_total(self, params: Optional[Dict[str, str]] = None) -> int:
+        """Count the results of a query, asking the API for the smallest page.
+
+        Only the `total` field of the response is read, the records are not decoded.
+
+        Args:
+            params (Optional[Dict[str, str]], optional): query parameters of this request.
+                Defaults to None (using `self.params`).
+
+        Returns:
+            int: number of results.
+        """
+
+        with PROFILER.phase("get"):
+            params, total = self.resolve_total(params)
+
+            if total is None:
+                total = await self.flights.call(self.flight_key(params, "total"),
+                                                lambda: self.fetch_total(params))
+
+        return total
+
+    @abstractmethod
+    async def process(self):
+        """Processing data (abstract method)"""
+
+
+class AsyncDSTNSingleRequest(BaseDSTNSingleRequest, AsyncDSTNRequest):
+    """Processing a single user check, asynchronously"""
+
+    async def fetch_page(self, page: int, rows: int) -> List[Dict[str, Any]]:
+        """Fetch a page of the result.
+
+        Args:
+            page (int): page number (1-based).
+            rows (int): page size.
+
+        Returns:
+            List[Dict[str, Any]]: rows of the page.
+        """
+
+        try:
+            return (await self.get(self.build_params(page=page, rows=rows)))["rows"]
+
+        # The result shrank since the first page.
+        except NotFoundException:
+            return []
+
+    async def iter_pages(self) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Fetch the first page, then (if `all_pages`) the other ones concurrently.
+
+        Yields:
+            Tuple[int, List[Dict[str, Any]]]: position of the first row of a page and
+                its rows, as pages arrive.
+        """
+
+        response_json = await self.get()
+        start, rows, pages = self.plan(response_json)
+        done = start + len(response_json["rows"])
+
+        yield start, response_json["rows"]
+
+        waiting = {asyncio.ensure_future(self.fetch_page(page, rows)): (page - 1) * rows
+                   for page in pages}
+
+        try:
+            while waiting:
+                finished, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in finished:
+                    yield self.new_rows(done, waiting.pop(task), task.result())
+
+        finally:
+            for task in waiting:
+                task.cancel()
+
+    async def process(self) -> List[DSTNItem]:
+        """Processing to get the result.
+
+        Returns:
+            List[DSTNItem]: List of DSTNItem results from the API call.
+        """
+
+        record_list = []
+        self.complete = True
+        opened = await self.open()
+
+        try:
+            # Rows are added as pages arrive, then put back in result order.
+            async for offset, rows in self.iter_pages():
+                self.add_page(record_list, offset, rows)
+
+        except (NotFoundException, HTTPException) as error:
+            self.lookup_failed(error)
+
+        finally:
+            if opened:
+                await self.close()
+
+        return self.sorted_records(record_list)
+
+
+class AsyncDSTNListRequest(BaseDSTNListRequest, AsyncDSTNRequest):
+    """Processing a list of users, asynchronously"""
+
+    async def check(self, name: str, degree_id: str) -> Optional[DSTNListItem]:
+        """Check a single row of the list.
+
+        Args:
+            name (str): student name (or Student ID).
+            degree_id (str): degree ID.
+
+        Returns:
+            Optional[DSTNListItem]: validation result, None if the request failed.
+        """
+
+        params = self.query_params(name, degree_id)
+
+        try:
+            if self.fast_check:
+                total = await self.get_total(params)
+
+            else:
+                total = (await self.get(params))["total"]
+
+        except (NotFoundException, HTTPException) as error:
+            return self.check_failed(name, degree_id, error)
+
+        return DSTNListItem(name=name, degree_id=degree_id, status=total > 0)
+
+    async def iter_results(self, rows: Iterable[Tuple[str, str]]
+                           ) -> AsyncIterator[Optional[DSTNListItem]]:
+        """Check every row, at most `concurrency` at a time.
+
+        Rows are read lazily and only a few per slot are pending at any time, so
+        `rows` can be a generator over a file of any size. Duplicates of a
+        recent row (once normalized) are only checked once, their result is repeated
+        for each of them.
+
+        Args:
+            rows (Iterable[Tuple[str, str]]): the rows (`student_list`, or the failed ones).
+
+        Yields:
+            Optional[DSTNListItem]: validation result of each row, None if the request failed.
+        """
+
+        opened = await self.open()
+
+        try:
+            async for item in self.iter_checks(rows):
+                yield item
+
+        finally:
+            if opened:
+                await self.close()
+
+    def lookup(self, row: Tuple[str, str],
+               checked: "OrderedDict[Tuple[str, str], asyncio.Task]") -> asyncio.Task:
+        """Schedule the check of a row, reusing the one of a recent duplicate.
+
+        Args:
+            row (Tuple[str, str]): the row to check.
+            checked (OrderedDict[Tuple[str, str], asyncio.Task]): tasks of the recent
+                distinct rows.
+
+        Returns:
+            asyncio.Task: task returning the result of the row.
+        """
+
+        key, task = self.recent(checked, row)
+
+        if task is None:
+            task = asyncio.ensure_future(self.check(*row))
+            self.remember(checked, key, task)
+
+        return task
+
+    async def iter_checks(self, rows: Iterable[Tuple[str, str]]
+                          ) -> AsyncIterator[Optional[DSTNListItem]]:
+        """Schedule the checks a few rows ahead, then yield the result of every row.
+
+        Yields:
+            Optional[DSTNListItem]: validation result of each row, None if the request failed.
+        """
+
+        checked = OrderedDict()
+
+        try:
+            if self.ordered:
+                async for item in self.iter_ordered(rows, checked):
+                    yield item
+
+            else:
+                async for item in self.iter_unordered(rows, checked):
+                    yield item
+
+        finally:
+            for task in checked.values():
+                task.cancel()
+
+    async def iter_ordered(self, rows: Iterable[Tuple[str, str]],
+                           checked: "OrderedDict[Tuple[str, str], asyncio.Task]"
+                           ) -> AsyncIterator[Optional[DSTNListItem]]:
+        """Yield the result of every row, in input order."""
+
+        pending = deque()
+
+        for row in rows:
+            pending.append((row, self.lookup(row, checked)))
+
+            if len(pending) >= self.concurrency * STREAM_WINDOW:
+                row, task = pending.popleft()
+                yield self.settle(row, await task)
+
+        while pending:
+            row, task = pending.popleft()
+            yield self.settle(row, await task)
+
+    async def iter_unordered(self, rows: Iterable[Tuple[str, str]],
+                             checked: "OrderedDict[Tuple[str, str], asyncio.Task]"
+                             ) -> AsyncIterator[Optional[DSTNListItem]]:
+        """Yield the result of every row, as soon as it is available."""
+
+        # Rows waiting for each task.
+        waiting = defaultdict(list)
+
+        for row in rows:
+            waiting[self.lookup(row, checked)].append(row)
+
+            if len(waiting) < self.concurrency * STREAM_WINDOW:
+                continue
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                for waiting_row in waiting.pop(task):
+                    yield self.settle(waiting_row, task.result())
+
+        while waiting:
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                for waiting_row in waiting.pop(task):
+                    yield self.settle(waiting_row, task.result())
+
+    async def stream(self) -> AsyncIterator[DSTNListItem]:
+        """Yield the validation results as soon as they are available.
+
+        Rows whose request failed are checked once more at the end of the batch
+        (their results come last, `merge_shards` matches results to rows by query),
+        those failing again are added to `retry_path`.
+
+        Yields:
+            DSTNListItem: validation result (SID, DegreeId, Status), rows whose request
+                failed are skipped.
+        """
+
+        async for item in self.iter_results(self.student_list):
+            METRICS.row_checked()
+
+            if item is not None:
+                yield item
+
+        retried = self.take_failed()
+
+        if retried:
+            async for item in self.iter_results(retried):
+                if item is not None:
+                    yield item
+
+        self.save_failed()
+
+    async def process(self) -> List[DSTNListItem]:
+        """Processing to get the result.
+
+        Returns:
+            List[DSTNListItem]: List of validation result (SID, DegreeId, Status)
+        """
+
+        return [item async for item in self.stream()]
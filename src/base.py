@@ -0,0 +1,716 @@
+"""Parts of the DSTN request classes shared by the sync and asyncio engines
+
+Everything here is independent of the way requests are sent: building the
+queries, reading the cache and the snapshot, decoding the responses, the
+bookkeeping of each attempt, planning pages and settling the rows of a list.
+`src.dstn` and `src.async_dstn` only add the sending and the concurrency.
+"""
+
+from __future__ import annotations
+import json
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from .cache import ResultCache, get_cache, make_key
+from .errors import ErrorJournal, error_settings, get_error_journal, log_http_error, save_rows
+from .exception import NotFoundException, HTTPException
+from .item import DSTNItem, DSTNListItem
+from .limiter import AdaptiveRateLimiter, get_limiter
+from .metrics import METRICS
+from .profiling import PROFILER
+from .retry import CircuitBreaker, RetryPolicy, get_circuit_breaker
+from .scheduler import BULK, INTERACTIVE, PriorityScheduler, get_scheduler
+from .snapshot import SnapshotStore, get_snapshot
+from .utils import normalize_degree_id, normalize_name, normalize_row
+
+# Rows pending per worker when checking a list.
+STREAM_WINDOW = 4
+
+# Distinct rows whose result is remembered to answer their duplicates.
+DEDUP_WINDOW = 100000
+
+# Largest page asked for when fetching every page of a result (`results.max_rows`).
+MAX_ROWS = 100
+
+# `total` field of a raw response, read without decoding the records.
+TOTAL_PATTERN = re.compile(rb'"total"\s*:\s*(\d+)')
+
+
+def extract_total(body: Any) -> int:
+    """Read the number of results of a raw response, without decoding its records.
+
+    Args:
+        body (Any): raw JSON response (bytes or str).
+
+    Returns:
+        int: the `total` field of the response.
+    """
+
+    if isinstance(body, str):
+        body = body.encode("utf8")
+
+    match = TOTAL_PATTERN.search(body)
+
+    # Unexpected layout, fall back to the full decoder.
+    if match is None:
+        return json.loads(body)["total"]
+
+    return int(match.group(1))
+
+
+def plan_pages(total: int, fetched: int, max_rows: int,
+               start: int = 0) -> Tuple[int, List[int]]:
+    """Plan the requests fetching the rest of a result, once its first page is known.
+
+    Pages of `fetched` rows (the first page) or of `max_rows` rows, whichever
+    takes the fewest requests, are used. A bigger page overlaps the first one:
+    its rows already fetched are skipped.
+
+    Args:
+        total (int): number of rows of the result.
+        fetched (int): number of rows of the first page.
+        max_rows (int): largest page size.
+        start (int, optional): position of the first row of the first page (the rows
+            before it are not wanted). Defaults to 0.
+
+    Returns:
+        Tuple[int, List[int]]: page size and the (1-based) pages to fetch.
+    """
+
+    done = start + fetched
+
+    if fetched <= 0 or done >= total:
+        return fetched, []
+
+    plans = []
+
+    for rows in sorted({fetched, max(fetched, min(max_rows, total))}):
+        pages = list(range(done // rows + 1, -(-total // rows) + 1))
+        plans.append((len(pages), rows, pages))
+
+    _, rows, pages = min(plans)
+
+    return rows, pages
+
+
+def relabel(row: Tuple[str, str],
+            result: Optional[DSTNListItem]) -> Optional[DSTNListItem]:
+    """Label a result with the row it answers.
+
+    Rows which normalize to the same query share a single lookup, but each of
+    them keeps its own name and degree ID in the output.
+
+    Args:
+        row (Tuple[str, str]): the row.
+        result (Optional[DSTNListItem]): result of its lookup, None if the request failed.
+
+    Returns:
+        Optional[DSTNListItem]: validation result of the row, None if the request failed.
+    """
+
+    if result is None:
+        return None
+
+    return result.relabel(*row)
+
+
+class Attempt:
+    """An attempt at sending a request, counted while the block sends it.
+
+    The block raises `HTTPException` on a timeout or a connection error (a
+    body cut short included): the error is swallowed if the request is to be
+    retried. Any other error (e.g. a cancelled lookup) still ends the request.
+    """
+
+    __slots__ = ("request", "attempt", "started_at")
+
+    def __init__(self, request: "BaseDSTNRequest", attempt: int) -> None:
+        """Initialization
+
+        Args:
+            request (BaseDSTNRequest): request sent.
+            attempt (int): number of attempts already made.
+        """
+
+        self.request = request
+        self.attempt = attempt
+        self.started_at = 0.0
+
+    def __enter__(self) -> "Attempt":
+        self.started_at = time.monotonic()
+        METRICS.request_sent()
+
+        return self
+
+    def __exit__(self, exc_type, *_) -> bool:
+        if exc_type is None:
+            return False
+
+        self.request.record(None, self.started_at)
+
+        return issubclass(exc_type, HTTPException) \
+            and self.request.retry.should_retry(None, self.attempt)
+
+    def answered(self, response: Any) -> bool:
+        """Record the response received, telling if it is the final one.
+
+        Args:
+            response (Any): response received (with a `status_code`).
+
+        Returns:
+            bool: False if the request is to be retried.
+        """
+
+        self.request.record(response.status_code, self.started_at)
+
+        return not self.request.retry.should_retry(response.status_code, self.attempt)
+
+
+class BaseDSTNRequest:  # pylint: disable=too-many-instance-attributes
+    """Settings, queries and responses of a request, whatever the engine sending it"""
+
+    # Base API URL
+    api_url: str
+
+    # Result parameters
+    results: Dict[str, str]
+
+    # Headers for the request.
+    headers: Dict[str, str]
+
+    # Query parameter
+    params: Dict[str, str]
+
+    # Adaptive rate limiter shared by requests to the same API (None if disabled).
+    limiter: Optional[AdaptiveRateLimiter]
+
+    # Retry policy of failed requests.
+    retry: RetryPolicy
+
+    # Circuit breaker shared by requests to the same API (None if disabled).
+    breaker: Optional[CircuitBreaker]
+
+    # Scheduler of the requests to the same API, by priority (None if disabled).
+    scheduler: Optional[PriorityScheduler]
+
+    # Priority class of the requests (see `src.scheduler`).
+    priority: str = BULK
+
+    # Persistent cache of responses (None if disabled).
+    cache: Optional[ResultCache]
+
+    # Offline snapshot of records, asked before the API (None if disabled).
+    snapshot: Optional[SnapshotStore]
+
+    # Journal of the failed lookups, shared by every request (None if disabled).
+    errors: Optional[ErrorJournal]
+
+    # Normalize names and degree IDs before querying.
+    normalize: bool
+
+    def __init__(self, **kwargs) -> None:
+        """Initialize
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+        """
+
+        # Base API URL
+        self.api_url = kwargs.get("api_url", None)
+
+        # Result parameters
+        self.results = kwargs.get("results", None)
+
+        # Headers for the request.
+        self.headers = kwargs.get("headers", None)
+
+        # Query parameter
+        self.params = {
+            "rows": self.results["rows"],
+            "page": self.results["page"],
+            "sord": self.results["sord"],
+        }
+
+        self.limiter = kwargs.get("limiter", None)
+
+        if self.limiter is None:
+            self.limiter = get_limiter(self.api_url, kwargs.get("rate_limit", None))
+
+        self.retry = RetryPolicy(**kwargs.get("retry", None) or {})
+        self.breaker = get_circuit_breaker(self.api_url, kwargs.get("circuit_breaker", None))
+
+        self.scheduler = get_scheduler(self.api_url, kwargs.get("scheduler", None))
+        self.priority = kwargs.get("priority", None) or self.priority
+        self.cache = get_cache(kwargs.get("cache", None))
+        self.snapshot = get_snapshot(kwargs.get("snapshot", None))
+        self.errors = get_error_journal(kwargs.get("errors", None))
+        self.normalize = kwargs.get("normalize", True)
+
+    def build_params(self, **kwargs) -> Dict[str, str]:
+        """Build a new query from the default parameters, leaving `self.params` untouched.
+
+        Returns:
+            Dict[str, str]: query parameters of a single lookup.
+        """
+
+        params = dict(self.params)
+        params.update(kwargs)
+
+        return params
+
+    def query_params(self, name: Optional[str], degree_id: Optional[str]) -> Dict[str, str]:
+        """Build the query of a student, normalizing the name and degree ID if enabled.
+
+        Args:
+            name (Optional[str]): student name (or Student ID).
+            degree_id (Optional[str]): degree ID.
+
+        Returns:
+            Dict[str, str]: query parameters of the lookup.
+        """
+
+        with PROFILER.phase("build"):
+            if self.normalize:
+                name, degree_id = normalize_name(name), normalize_degree_id(degree_id)
+
+            return self.build_params(masv=name, sobang=degree_id)
+
+    def flight_key(self, params: Dict[str, str], *kind: str) -> Tuple[str, ...]:
+        """Key of a query among the identical ones in flight.
+
+        Args:
+            params (Dict[str, str]): query parameters.
+            kind (str): what is asked for (nothing for the decoded response).
+
+        Returns:
+            Tuple[str, ...]: key of the query.
+        """
+
+        return (self.api_url, *kind, make_key(params))
+
+    def record(self, status_code: Optional[int], started_at: float) -> None:
+        """Feed the outcome of a request to the metrics, the rate limiter and the circuit breaker.
+
+        Args:
+            status_code (Optional[int]): HTTP status code, None for a timeout or connection error.
+            started_at (float): when the request has been sent (`time.monotonic`).
+        """
+
+        latency = time.monotonic() - started_at
+        METRICS.response_received(status_code, latency)
+
+        if self.limiter is not None:
+            self.limiter.feedback(status_code, latency)
+
+        if self.breaker is not None:
+            self.breaker.record(self.retry.is_failure(status_code))
+
+    def resolve(self, params: Optional[Dict[str, str]]) -> Tuple[Dict[str, str], Optional[Any]]:
+        """Get the query to send and its answer from the snapshot, if it has one.
+
+        Args:
+            params (Optional[Dict[str, str]]): query parameters (None for `self.params`).
+
+        Returns:
+            Tuple[Dict[str, str], Optional[Any]]: the query, and its response if the
+                snapshot answers it.
+        """
+
+        if params is None:
+            params = self.params
+
+        return params, self.snapshot.find(params) if self.snapshot is not None else None
+
+    def resolve_total(self, params: Optional[Dict[str, str]]
+                      ) -> Tuple[Dict[str, str], Optional[int]]:
+        """Get the query counting the results of a query (asking for the smallest page)
+        and its answer from the snapshot, if it has one.
+
+        Args:
+            params (Optional[Dict[str, str]]): query parameters (None for `self.params`).
+
+        Returns:
+            Tuple[Dict[str, str], Optional[int]]: the query, and its number of results
+                if the snapshot answers it.
+        """
+
+        params = dict(params if params is not None else self.params, rows=1, page=1)
+        response_json = self.snapshot.find(params) if self.snapshot is not None else None
+
+        return params, response_json["total"] if response_json is not None else None
+
+    def cached_json(self, params: Dict[str, str]) -> Optional[Any]:
+        """Get the decoded response of a query from the cache.
+
+        Args:
+            params (Dict[str, str]): query parameters.
+
+        Returns:
+            Optional[Any]: decoded response, None if it is not cached.
+        """
+
+        body = self.cache.get(params) if self.cache is not None else None
+
+        if body is None:
+            return None
+
+        with PROFILER.phase("json_decode"):
+            return json.loads(body)
+
+    def decode_json(self, params: Dict[str, str], response: Any) -> Any:
+        """Decode the response of the API to a query, then cache it.
+
+        Args:
+            params (Dict[str, str]): query parameters.
+            response (Any): response received (with a `status_code` and a raw `content`).
+
+        Returns:
+            Any: decoded response.
+        """
+
+        # HTTP error (invalid requests, missing parameters, etc.)
+        if response.status_code != 200:
+            raise HTTPException(response=response)
+
+        try:
+            with PROFILER.phase("json_decode"):
+                response_json = json.loads(response.content)
+
+            total, _ = response_json["total"], response_json["rows"]
+            body = response.content.decode("utf8")
+
+        except (ValueError, KeyError, TypeError) as decode_exception_handler:
+            raise self.malformed(response) from decode_exception_handler
+
+        if self.cache is not None:
+            self.cache.put(params, body, total > 0)
+
+        return response_json
+
+    def cached_total(self, params: Dict[str, str]) -> Optional[int]:
+        """Get the number of results of a query from the cache.
+
+        Args:
+            params (Dict[str, str]): query parameters.
+
+        Returns:
+            Optional[int]: number of results, None if the query is not cached.
+        """
+
+        body = self.cache.get(params) if self.cache is not None else None
+
+        return extract_total(body) if body is not None else None
+
+    def decode_total(self, params: Dict[str, str], response: Any) -> int:
+        """Read the number of results of the response of the API to a query, then cache it.
+
+        Only the `total` field of the response is read, the records are not decoded.
+
+        Args:
+            params (Dict[str, str]): query parameters.
+            response (Any): response received (with a `status_code` and a raw `content`).
+
+        Returns:
+            int: number of results.
+        """
+
+        # HTTP error (invalid requests, missing parameters, etc.)
+        if response.status_code != 200:
+            raise HTTPException(response=response)
+
+        try:
+            with PROFILER.phase("json_decode"):
+                total = extract_total(response.content)
+
+            body = response.content.decode("utf8")
+
+        except (ValueError, KeyError, TypeError) as decode_exception_handler:
+            raise self.malformed(response) from decode_exception_handler
+
+        if self.cache is not None:
+            self.cache.put(params, body, total > 0)
+
+        return total
+
+    def malformed(self, response: Any) -> HTTPException:
+        """Count a response which is not a DSTN result as a failed request.
+
+        A proxy error page or a body cut short may come with a 200 status: the
+        lookup then fails like any other upstream error (error journal, retry
+        at the end of the batch).
+
+        Args:
+            response (Any): response received (with a `status_code` and a raw `content`).
+
+        Returns:
+            HTTPException: error to raise.
+        """
+
+        if self.breaker is not None:
+            self.breaker.record(True)
+
+        return HTTPException("Malformed response", response=response)
+
+    @staticmethod
+    def found(response_json: Any) -> Any:
+        """Check that a response has results.
+
+        Args:
+            response_json (Any): decoded response.
+
+        Returns:
+            Any: the response.
+        """
+
+        # No result (fake degree, wrong name, etc.)
+        if response_json["total"] == 0:
+            raise NotFoundException("No results found")
+
+        return response_json
+
+
+class BaseDSTNSingleRequest(BaseDSTNRequest):
+    """Query and records of a single user check, whatever the engine sending it"""
+
+    # Language used in the report.
+    language: str
+
+    # Fetch every page of the result (not only the first one).
+    all_pages: bool
+
+    # Someone is waiting for the result: go ahead of the lookups of a batch.
+    priority: str = INTERACTIVE
+
+    # Every page asked for was fetched (False if one of them failed).
+    complete: bool
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization
+
+        Author(s):
+            - Quan H. Tran <quan@trhgquan.xyz>
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+        """
+
+        super().__init__(**kwargs)
+
+        self.language = kwargs.get("language", None)
+        self.all_pages = kwargs.get("all_pages", False)
+        self.complete = True
+
+        # Update masv and sobang to parameters
+        self.params = self.query_params(kwargs.get("student_name", None),
+                                        kwargs.get("degree_id", None))
+
+    def plan(self, response_json: Any) -> Tuple[int, int, List[int]]:
+        """Plan the pages to fetch once the first one has arrived.
+
+        Args:
+            response_json (Any): decoded first page.
+
+        Returns:
+            Tuple[int, int, List[int]]: position of the first row of the first page (the
+                rows before the configured page are not wanted), page size and the
+                (1-based) pages to fetch (none without `all_pages`).
+        """
+
+        start = (int(self.params["page"]) - 1) * int(self.params["rows"])
+
+        if not self.all_pages:
+            return start, 0, []
+
+        rows, pages = plan_pages(response_json["total"], len(response_json["rows"]),
+                                 self.results.get("max_rows", MAX_ROWS), start)
+
+        return start, rows, pages
+
+    @staticmethod
+    def new_rows(done: int, offset: int,
+                 rows: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Leave out the rows of a page fetched already (by the first page).
+
+        Args:
+            done (int): position of the first row not fetched with the first page.
+            offset (int): position of the first row of the page.
+            rows (List[Dict[str, Any]]): rows of the page.
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: position of the first row left and the rows left.
+        """
+
+        skip = max(0, done - offset)
+
+        return offset + skip, rows[skip:]
+
+    def add_page(self, record_list: List[Tuple[int, DSTNItem]], offset: int,
+                 rows: List[Dict[str, Any]]) -> None:
+        """Add the records of a page, with their position in the result."""
+
+        with PROFILER.phase("item"):
+            for index, record in enumerate(rows, start=offset):
+                record_list.append((index, DSTNItem(json=record, language=self.language)))
+
+    def lookup_failed(self, error: Exception) -> None:
+        """Report a lookup without records, or a page which could not be fetched.
+
+        The records of the pages fetched are kept, `complete` tells they are partial.
+
+        Args:
+            error (Exception): a `NotFoundException` or an `HTTPException`.
+        """
+
+        # No records found
+        if isinstance(error, NotFoundException):
+            print(error)
+            return
+
+        # Error while playing with HTTP
+        self.complete = False
+        log_http_error(error, self.errors, "single", (self.params["masv"], self.params["sobang"]))
+
+    @staticmethod
+    def sorted_records(record_list: List[Tuple[int, DSTNItem]]) -> List[DSTNItem]:
+        """Put the records back in result order (pages arrive in any order)."""
+
+        return [item for _, item in sorted(record_list, key=lambda row: row[0])]
+
+
+class BaseDSTNListRequest(BaseDSTNRequest):
+    """Rows and results of a list of users, whatever the engine checking them"""
+
+    # Student list read from .csv file (any iterable, possibly a generator).
+    student_list: Iterable[Tuple[str, str]]
+
+    # Return results in input order (or as soon as they complete).
+    ordered: bool
+
+    # Only count the results of each row, instead of fetching their records.
+    fast_check: bool
+
+    # Rows whose lookup failed, retried at the end of the batch.
+    failed: Deque[Tuple[str, str]]
+
+    # Retry the failed rows once at the end of the batch.
+    retry_failed: bool
+
+    # .csv file the rows still failing are added to (for `check.py retry`).
+    retry_path: Optional[str]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        super().__init__(**kwargs)
+
+        self.student_list = kwargs.get("student_list", None)
+        self.ordered = kwargs.get("ordered", True)
+        self.fast_check = kwargs.get("fast_check", True)
+
+        errors = error_settings(kwargs.get("errors", None))
+        self.failed = deque()
+        self.retry_failed = errors["retry"]
+        self.retry_path = errors["retry_path"]
+
+    def check_failed(self, name: str, degree_id: str,
+                     error: Exception) -> Optional[DSTNListItem]:
+        """Get the result of a row whose lookup raised.
+
+        Args:
+            name (str): student name (or Student ID).
+            degree_id (str): degree ID.
+            error (Exception): a `NotFoundException` or an `HTTPException`.
+
+        Returns:
+            Optional[DSTNListItem]: validation result, None if the request failed.
+        """
+
+        # No records found
+        if isinstance(error, NotFoundException):
+            return DSTNListItem(name=name, degree_id=degree_id, status=False)
+
+        # Error while playing with HTTP (the row is retried later on)
+        log_http_error(error, self.errors, "multiple", (name, degree_id))
+
+        return None
+
+    def settle(self, row: Tuple[str, str],
+               result: Optional[DSTNListItem]) -> Optional[DSTNListItem]:
+        """Label the result of a row, queueing the row for a retry if its lookup failed.
+
+        Args:
+            row (Tuple[str, str]): the row.
+            result (Optional[DSTNListItem]): result of its lookup, None if the request failed.
+
+        Returns:
+            Optional[DSTNListItem]: validation result of the row, None if the request failed.
+        """
+
+        if result is None:
+            self.failed.append(row)
+
+        return relabel(row, result)
+
+    def recent(self, checked: OrderedDict[Tuple[str, str], Any],
+               row: Tuple[str, str]) -> Tuple[Tuple[str, str], Optional[Any]]:
+        """Find the pending result of a recent duplicate of a row.
+
+        Args:
+            checked (OrderedDict[Tuple[str, str], Any]): pending results of the recent
+                distinct rows (futures or tasks).
+            row (Tuple[str, str]): the row to check.
+
+        Returns:
+            Tuple[Tuple[str, str], Optional[Any]]: key of the row and the pending result
+                of its duplicate, None if there is none.
+        """
+
+        key = normalize_row(row) if self.normalize else row
+        result = checked.get(key, None)
+
+        if result is not None:
+            checked.move_to_end(key)
+
+        return key, result
+
+    @staticmethod
+    def remember(checked: OrderedDict[Tuple[str, str], Any], key: Tuple[str, str],
+                 result: Any) -> None:
+        """Keep the pending result of a row, for its duplicates, forgetting the oldest one.
+
+        Args:
+            checked (OrderedDict[Tuple[str, str], Any]): pending results of the recent
+                distinct rows.
+            key (Tuple[str, str]): key of the row.
+            result (Any): its pending result (a future or a task).
+        """
+
+        checked[key] = result
+
+        if len(checked) > DEDUP_WINDOW:
+            checked.popitem(last=False)
+
+    def take_failed(self) -> List[Tuple[str, str]]:
+        """Take the rows to check once more at the end of the batch.
+
+        Returns:
+            List[Tuple[str, str]]: rows whose lookup failed (none if they are not retried).
+        """
+
+        if not self.retry_failed:
+            return []
+
+        rows, self.failed = list(self.failed), deque()
+
+        return rows
+
+    def save_failed(self) -> None:
+        """Add the rows still failing to `retry_path` (for `check.py retry`)."""
+
+        if self.failed and self.retry_path is not None:
+            save_rows(self.retry_path, self.failed)
@@ -0,0 +1,225 @@
+"""Persistent (SQLite) cache of DSTN API responses"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from .metrics import METRICS
+
+# Default cache settings, overridden by the `cache` block of the config.
+DEFAULT_CACHE = {
+    "enabled": False,
+    "path": ".dstn_cache.sqlite3",
+    "positive_ttl": 365 * 24 * 3600,
+    "negative_ttl": 24 * 3600,
+    "max_entries": 1000000,
+    "refresh": False,
+}
+
+# Query parameters identifying a lookup.
+KEY_PARAMS = ("masv", "sobang", "rows", "page", "sord")
+
+# Check the cache size once every this many writes.
+EVICTION_INTERVAL = 1000
+
+# Save the access times of the hits once this many are pending.
+ACCESS_FLUSH_INTERVAL = 1000
+
+# Caches already opened, keyed by settings.
+_CACHES: Dict[Tuple[Any, ...], "ResultCache"] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def make_key(params: Dict[str, Any]) -> str:
+    """Build the cache key of a query.
+
+    Args:
+        params (Dict[str, Any]): query parameters.
+
+    Returns:
+        str: cache key.
+    """
+
+    return json.dumps([params.get(key, None) for key in KEY_PARAMS], ensure_ascii=False)
+
+
+class ResultCache:
+    """Raw JSON responses of the API, stored in SQLite.
+
+    Found and not found results expire after `positive_ttl` and `negative_ttl`
+    seconds. Once there are more than `max_entries` results, the least recently
+    used ones are evicted. Hits do not write to the database: their access times
+    are saved along with the next write (or eviction, or once enough are pending).
+    """
+
+    # Cache settings (see `DEFAULT_CACHE`).
+    settings: Dict[str, Any]
+
+    # Access times of the hits not saved yet, by key.
+    accessed: Dict[str, float]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.settings = dict(DEFAULT_CACHE)
+        self.settings.update(kwargs)
+
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.accessed = {}
+
+        self.connection = sqlite3.connect(self.settings["path"], check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, found INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        self.connection.commit()
+
+    def get(self, params: Dict[str, Any]) -> Optional[str]:
+        """Get the cached response of a query, counting hits and misses.
+
+        Args:
+            params (Dict[str, Any]): query parameters.
+
+        Returns:
+            Optional[str]: raw JSON response, None if missing, expired or refreshing.
+        """
+
+        body = self.read(params)
+        METRICS.cache_lookup(body is not None)
+
+        return body
+
+    def read(self, params: Dict[str, Any]) -> Optional[str]:
+        """Read the cached response of a query.
+
+        Args:
+            params (Dict[str, Any]): query parameters.
+
+        Returns:
+            Optional[str]: raw JSON response, None if missing, expired or refreshing.
+        """
+
+        if self.settings["refresh"]:
+            return None
+
+        key = make_key(params)
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, found, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            body, found, created_at = row
+            ttl = self.settings["positive_ttl"] if found else self.settings["negative_ttl"]
+
+            if now - created_at > ttl:
+                return None
+
+            self.accessed[key] = now
+
+            if len(self.accessed) >= ACCESS_FLUSH_INTERVAL:
+                self.flush_accessed()
+                self.connection.commit()
+
+        return body
+
+    def put(self, params: Dict[str, Any], body: str, found: bool) -> None:
+        """Save the response of a query.
+
+        Args:
+            params (Dict[str, Any]): query parameters.
+            body (str): raw JSON response.
+            found (bool): True if the query has results.
+        """
+
+        now = time.time()
+
+        with self.lock:
+            self.flush_accessed()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (make_key(params), body, int(found), now, now),
+            )
+            self.connection.commit()
+
+            self.writes += 1
+
+            if self.writes % EVICTION_INTERVAL == 1:
+                self.evict()
+
+    def flush_accessed(self) -> None:
+        """Save the pending access times of the hits (in the current transaction).
+
+        Must be called with the lock held.
+        """
+
+        if self.accessed:
+            self.connection.executemany(
+                "UPDATE results SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self.accessed.items()])
+            self.accessed.clear()
+
+    def evict(self) -> None:
+        """Remove the least recently used results beyond `max_entries`.
+
+        Must be called with the lock held.
+        """
+
+        self.flush_accessed()
+
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.settings["max_entries"]
+
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)", (excess,))
+
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Close the database."""
+
+        with self.lock:
+            self.flush_accessed()
+            self.connection.commit()
+            self.connection.close()
+
+
+def get_cache(cache: Optional[Dict[str, Any]] = None) -> Optional[ResultCache]:
+    """Get the cache shared by every request using the same cache settings.
+
+    Args:
+        cache (Optional[Dict[str, Any]], optional): `cache` block of the config.
+            Defaults to None.
+
+    Returns:
+        Optional[ResultCache]: the shared cache, None if caching is disabled.
+    """
+
+    settings = dict(DEFAULT_CACHE)
+
+    if cache is not None:
+        settings.update(cache)
+
+    if not settings["enabled"]:
+        return None
+
+    key = tuple(sorted(settings.items()))
+
+    with _CACHES_LOCK:
+        if key not in _CACHES:
+            _CACHES[key] = ResultCache(**settings)
+
+        return _CACHES[key]
@@ -0,0 +1,119 @@
+"""Coalescing of identical lookups in flight"""
+
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Loaded by the running event loop, not needed by the sync engine.
+if TYPE_CHECKING:
+    import asyncio
+
+
+class Flight:  # pylint: disable=too-few-public-methods
+    """A call in flight, shared by every caller asking for the same key."""
+
+    # Set once the call has finished.
+    done: threading.Event
+
+    # Value returned by the call.
+    result: Any
+
+    # Exception raised by the call (None if it succeeded).
+    error: Optional[BaseException]
+
+    def __init__(self) -> None:
+        """Initialization"""
+
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:  # pylint: disable=too-few-public-methods
+    """Run a call once for all the threads asking for the same key at the same time."""
+
+    # Calls in flight, by key.
+    flights: Dict[Hashable, Flight]
+
+    def __init__(self) -> None:
+        """Initialization"""
+
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    def call(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Call `function`, or wait for the call already in flight for `key`.
+
+        Args:
+            key (Hashable): key identifying the call.
+            function (Callable[[], Any]): the call.
+
+        Returns:
+            Any: value returned by the call (exceptions are raised to every caller).
+        """
+
+        with self.lock:
+            flight = self.flights.get(key, None)
+            leader = flight is None
+
+            if leader:
+                flight = Flight()
+                self.flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+
+            if flight.error is not None:
+                raise flight.error
+
+            return flight.result
+
+        try:
+            flight.result = function()
+
+        except BaseException as error_handler:
+            flight.error = error_handler
+            raise
+
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+            flight.done.set()
+
+        return flight.result
+
+
+class AsyncSingleFlight:  # pylint: disable=too-few-public-methods
+    """Run a coroutine once for all the tasks asking for the same key at the same time."""
+
+    # Calls in flight, by key.
+    flights: Dict[Hashable, asyncio.Future]
+
+    def __init__(self) -> None:
+        """Initialization"""
+
+        self.flights = {}
+
+    async def call(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `function()`, or the call already in flight for `key`.
+
+        Args:
+            key (Hashable): key identifying the call.
+            function (Callable[[], Awaitable[Any]]): the call.
+
+        Returns:
+            Any: value returned by the call (exceptions are raised to every caller).
+        """
+
+        import asyncio  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        future = self.flights.get(key, None)
+
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self.flights[key] = future
+            future.add_done_callback(lambda _: self.flights.pop(key, None))
+
+        # A cancelled caller must not cancel the call for the others.
+        return await asyncio.shield(future)
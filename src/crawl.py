@@ -0,0 +1,82 @@
+"""Crawl of the records of known Student IDs, to build an offline snapshot"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List
+from .dstn import DSTNRequest, STREAM_WINDOW
+from .errors import log_http_error
+from .exception import NotFoundException, HTTPException
+
+
+class DSTNCrawlRequest(DSTNRequest):
+    """Fetch the records of a range of Student IDs, to build an offline snapshot"""
+
+    # Student IDs to fetch (any iterable, possibly a generator).
+    student_ids: Iterable[str]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        super().__init__(**kwargs)
+        self.student_ids = kwargs.get("student_ids", None)
+
+    def fetch_records(self, student_id: str) -> List[Dict[str, Any]]:
+        """Fetch the records of a Student ID (every page of them).
+
+        Args:
+            student_id (str): the Student ID.
+
+        Returns:
+            List[Dict[str, Any]]: records found, empty if none or if the request failed.
+        """
+
+        records = []
+        page = 1
+
+        while True:
+            try:
+                response_json = self.get(self.build_params(masv=student_id, sobang="", page=page))
+
+            except NotFoundException:
+                break
+
+            except HTTPException as http_error_handler:
+                log_http_error(http_error_handler, self.errors, "crawl", (student_id,))
+                break
+
+            records.extend(response_json["rows"])
+
+            if not response_json["rows"] or len(records) >= response_json["total"]:
+                break
+
+            page += 1
+
+        return records
+
+    def stream(self) -> Iterator[Dict[str, Any]]:
+        """Yield the records found, a few Student IDs per worker ahead.
+
+        Yields:
+            Dict[str, Any]: DSTN records (as returned by the API).
+        """
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            for student_id in self.student_ids:
+                pending.append(executor.submit(self.fetch_records, student_id))
+
+                if len(pending) >= self.workers * STREAM_WINDOW:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+    def process(self) -> List[Dict[str, Any]]:
+        """Processing to get the result.
+
+        Returns:
+            List[Dict[str, Any]]: every record found.
+        """
+
+        return list(self.stream())
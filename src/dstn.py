@@ -6,255 +6,214 @@ Author(s):
     - Me A. Doge <domyeukemphancam@trhgquan.xyz>
 """
 
+from __future__ import annotations
+import time
 from abc import abstractmethod
-from typing import Any, Dict, List, Tuple
-import requests as rq
-import termtables as tt
+from contextlib import contextmanager
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .base import Attempt, BaseDSTNListRequest, BaseDSTNRequest, BaseDSTNSingleRequest, \
+    STREAM_WINDOW
+from .coalesce import SingleFlight
 from .exception import NotFoundException, HTTPException
+from .item import DSTNItem, DSTNListItem
+from .metrics import METRICS
+from .profiling import PROFILER
+from .session import connection_settings, get_session
 
-# Position to save logs
-SINGLE_LOG = "error_single.html"
-MULTIPLE_LOG = "error_multiple.html"
+# Loaded along with the session (see session.py).
+if TYPE_CHECKING:
+    import requests as rq
 
-class DSTNListItem:
-    """Structure of an Item in DSTNList
+
+class DSTNRequest(BaseDSTNRequest):
+    """Abstract request class
 
     Author(s):
         - Xuong L. Tran <xuong@trhgquan.xyz>
+        - Me A. Doge <domyeukemphancam@trhgquan.xyz>
     """
 
-    def __init__(self, **kwargs) -> None:
-        """Initialization
-
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-        """
-
-        self.__name = kwargs.get("name", None)
-        self.__degree_id = kwargs.get("degree_id", None)
-        self.__status = kwargs.get("status", None)
+    # Pooled, keep-alive session used to send requests.
+    session: rq.Session
 
-    def asdict(self) -> None:
-        """Cast the given structure into a dictionary
+    # Timeout of a request, in seconds.
+    timeout: float
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-        """
+    # Number of lookups (or pages) sent concurrently.
+    workers: int
 
-        return {
-            "name": self.__name,
-            "degree_id": self.__degree_id,
-            "status": self.__status
-        }
+    # Identical queries in flight, shared by every request.
+    flights: SingleFlight = SingleFlight()
 
-    def __str__(self) -> str:
-        """Convert the structure into string
+    def __init__(self, **kwargs) -> None:
+        """Initialize
 
         Author(s):
             - Xuong L. Tran <xuong@trhgquan.xyz>
+            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
         """
 
-        return ",".join([self.__name, self.__degree_id, "VALID" if self.__status else "INVALID"])
+        super().__init__(**kwargs)
 
-    def __iter__(self) -> str:
-        """Yield the current structure
+        self.workers = max(1, kwargs.get("workers", 1) or 1)
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-        """
+        # Connection pool, shared between requests with the same settings, keeping one
+        # connection per worker.
+        connection = connection_settings(kwargs.get("connection", None), self.workers)
 
-        yield self.__str__()
+        self.timeout = connection["timeout"]
+        self.session = kwargs.get("session", None)
 
-class DSTNItem:
-    """Parse a JSON DSTN to beautified - table format.
+        if self.session is None:
+            self.session = get_session(self.api_url, connection)
 
-    Author(s):
-        - Quan H. Tran <quan@trhgquan.xyz>
-        - Xuong L. Tran <xuong@trhgquan.xyz>
-        - Me A. Doge <domyeukemphancam@trhgquan.xyz>
-    """
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Wait for the circuit breaker and the rate limiter, then hold a slot of the
+        scheduler while the block runs.
 
-    # Informations stored
-    info: Dict[str, str]
+        The slot is only taken once the request may be sent: a throttled request
+        never keeps requests of a higher priority waiting.
+        """
 
-    def __init__(self, **kwargs) -> None:
-        """Initialization
+        if self.breaker is not None:
+            self.breaker.before_request()
 
-        Author(s):
-            - Quan H. Tran <quan@trhgquan.xyz>
-            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
-        """
+        if self.limiter is not None:
+            self.limiter.acquire()
 
-        self.info = {
-            "language": kwargs.get("language", "vn")
-        }
+        if self.scheduler is None:
+            yield
+            return
 
-        json_data = kwargs.get("json", None)
+        with self.scheduler.slot(self.priority):
+            yield
 
-        if json_data is not None:
-            for key, value in json_data.items():
-                self.info[key] = value
+    def send(self, params: Dict[str, str]) -> rq.Response:
+        """Send a GET request, retrying timeouts, connection errors and retryable statuses.
 
-    def get_info(self) -> Dict[str, str]:
-        """Get info saved inside this item (for testing).
+        A slot is only held while a request is in flight, not while waiting for a retry.
 
-        Returns:
-            Dict[str, str]: information of this DSTNItem, stored as a dict.
+        Args:
+            params (Dict[str, str]): query parameters of this request.
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
+        Returns:
+            rq.Response: the last response received.
         """
 
-        return self.info
+        # Already loaded by the session, only its exceptions are needed here.
+        import requests as rq  # pylint: disable=import-outside-toplevel
 
-    def get_language(self) -> str:
-        """Get the language used when parsing the result.
+        attempt = 0
 
-        Returns:
-            str: the languaged used when parsing the result.
+        while True:
+            with self.slot(), Attempt(self, attempt) as sent:
+                try:
+                    response = self.session.get(
+                        url=self.api_url,
+                        params=params,
+                        headers=self.headers,
+                        timeout=self.timeout,
+                    )
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-        """
+                except rq.exceptions.Timeout as timeout_exception_handler:
+                    raise HTTPException("Connection timeout") from timeout_exception_handler
 
-        return self.info["language"]
+                # Connection refused or reset, body cut short, ...
+                except rq.exceptions.RequestException as connection_exception_handler:
+                    raise HTTPException("Connection error") from connection_exception_handler
 
-    def get_string(self) -> str:
-        """Parsing class property to formatted (tabular) UI
+                if sent.answered(response):
+                    return response
 
-        Returns:
-            str: _the tabular string_
+            METRICS.retried()
+            time.sleep(self.retry.delay(attempt))
+            attempt += 1
 
-        Author(s):
-            - Quan H. Tran <quan@trhgquan.xyz>
-        """
+    def fetch(self, params: Dict[str, str]) -> Any:
+        """Get the decoded response of a query, from the cache or from the API.
 
-        dstn_string = []
-        if self.info["language"] == "vn":
-            dstn_string.append(["Mã sinh viên",  self.info["masv"]])
-            dstn_string.append(["Ngày sinh", self.info["ngaysinh"]])
-            dstn_string.append(["Họ và tên", self.info["hoten"]])
-            dstn_string.append(["Bậc", self.info["Bac"]])
-            dstn_string.append(["Tên bậc", self.info["tenbac"]])
-            dstn_string.append(["Mã hệ", self.info["mahe"]])
-            dstn_string.append(["Tên hệ", self.info["tenhe"]])
-            dstn_string.append(["Đợt năm", self.info["dotnam"]])
-            dstn_string.append(["Tên ngành", self.info["tennganh"]])
-            dstn_string.append(["Loại tốt nghiệp", self.info["loaitotnghiep"]])
-            dstn_string.append(["Số bằng", self.info["sobang"]])
-            dstn_string.append(["Số vào sổ", self.info["sovaoso"]])
-            dstn_string.append(["Ngày quyết định", self.info["ngayqd"]])
-
-        elif self.info["language"] == "en":
-            dstn_string.append(["Student ID", self.info["masv"]])
-            dstn_string.append(["Birthday", self.info["ngaysinh"]])
-            dstn_string.append(["Name", self.info["hotenAnh"]])
-            dstn_string.append(["Type", self.info["Bac"]])
-            dstn_string.append(["Type name", self.info["tenbacAnh"]])
-            dstn_string.append(["Type code", self.info["mahe"]])
-            dstn_string.append(["Type code name", self.info["tenheAnh"]])
-            dstn_string.append(["Year", self.info["dotnam"]])
-            dstn_string.append(["Major name", self.info["tennganhAnh"]])
-            dstn_string.append(
-                ["Graduation rank", self.info["loaitotnghiepAnh"]])
-            dstn_string.append(["Degree ID", self.info["sobang"]])
-            dstn_string.append(["Degree in book ID", self.info["sovaoso"]])
-            dstn_string.append(["Issue date", self.info["ngayqd"]])
-
-        return tt.to_string(dstn_string, style=tt.styles.ascii_thin_double)
-
-    def __str__(self) -> str:
-        """Get the string representation (tabular) of the Item.
-        This is just basically calling `get_string` method.
+        Args:
+            params (Dict[str, str]): query parameters of this request.
 
         Returns:
-            str: tabular string.
-
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
+            Any: decoded response.
         """
 
-        return self.get_string()
-
-
-class DSTNRequest:
-    """Abstract request class
+        response_json = self.cached_json(params)
 
-    Author(s):
-        - Xuong L. Tran <xuong@trhgquan.xyz>
-        - Me A. Doge <domyeukemphancam@trhgquan.xyz>
-    """
+        if response_json is None:
+            response_json = self.decode_json(params, self.send(params))
 
-    # Base API URL
-    api_url: str
+        return response_json
 
-    # Result parameters
-    results: Dict[str, str]
+    def get(self, params: Optional[Dict[str, str]] = None) -> Any:
+        """Sending a GET request
 
-    # Headers for the request.
-    headers: Dict[str, str]
+        Queries matching a record of the snapshot are answered locally. Identical
+        queries sent at the same time share a single request.
 
-    # Query parameter
-    params: Dict[str, str]
+        Args:
+            params (Optional[Dict[str, str]], optional): query parameters of this request.
+                Defaults to None (using `self.params`).
 
-    def __init__(self, **kwargs) -> None:
-        """Initialize
+        Returns:
+            Response: response data.
 
         Author(s):
             - Xuong L. Tran <xuong@trhgquan.xyz>
             - Me A. Doge <domyeukemphancam@trhgquan.xyz>
         """
 
-        # Base API URL
-        self.api_url = kwargs.get("api_url", None)
+        with PROFILER.phase("get"):
+            params, response_json = self.resolve(params)
 
-        # Result parameters
-        self.results = kwargs.get("results", None)
+            if response_json is None:
+                response_json = self.flights.call(self.flight_key(params),
+                                                  lambda: self.fetch(params))
 
-        # Headers for the request.
-        self.headers = kwargs.get("headers", None)
+        return self.found(response_json)
 
-        # Query parameter
-        self.params = {
-            "rows": self.results["rows"],
-            "page": self.results["page"],
-            "sord": self.results["sord"],
-        }
+    def fetch_total(self, params: Dict[str, str]) -> int:
+        """Get the number of results of a query, from the cache or from the API.
 
-    def get(self) -> Any:
-        """Sending a GET request
+        Args:
+            params (Dict[str, str]): query parameters of this request.
 
         Returns:
-            Response: response data.
-
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+            int: number of results.
         """
 
-        try:
-            response = rq.get(
-                url=self.api_url,
-                params=self.params,
-                headers=self.headers,
-                timeout=60,
-            )
+        total = self.cached_total(params)
 
-        except rq.exceptions.Timeout as timeout_exception_handler:
-            raise HTTPException(
-                "Connection timeout") from timeout_exception_handler
+        if total is None:
+            total = self.decode_total(params, self.send(params))
 
-        # HTTP error (invalid requests, missing parameters, etc.)
-        if response.status_code != 200:
-            raise HTTPException(response=response)
+        return total
 
-        response_json = response.json()
+    def get_total(self, params: Optional[Dict[str, str]] = None) -> int:
+        """Count the results of a query, asking the API for the smallest page.
 
-        # No result (fake degree, wrong name, etc.)
-        if response_json["total"] == 0:
-            raise NotFoundException("No results found")
+        Only the `total` field of the response is read, the records are not decoded.
 
-        return response_json
+        Args:
+            params (Optional[Dict[str, str]], optional): query parameters of this request.
+                Defaults to None (using `self.params`).
+
+        Returns:
+            int: number of results.
+        """
+
+        with PROFILER.phase("get"):
+            params, total = self.resolve_total(params)
+
+            if total is None:
+                total = self.flights.call(self.flight_key(params, "total"),
+                                          lambda: self.fetch_total(params))
+
+        return total
 
     @abstractmethod
     def process(self):
@@ -265,7 +224,7 @@ class DSTNRequest:
         """
 
 
-class DSTNSingleRequest(DSTNRequest):
+class DSTNSingleRequest(BaseDSTNSingleRequest, DSTNRequest):
     """Processing a single user check
 
     Author(s):
@@ -274,25 +233,44 @@ class DSTNSingleRequest(DSTNRequest):
         - Me A. Doge <domyeukemphancam@trhgquan.xyz>
     """
 
-    # Language used in the report.
-    language: str
+    def fetch_page(self, page: int, rows: int) -> List[Dict[str, Any]]:
+        """Fetch a page of the result.
 
-    def __init__(self, **kwargs) -> None:
-        """Initialization
+        Args:
+            page (int): page number (1-based).
+            rows (int): page size.
 
-        Author(s):
-            - Quan H. Tran <quan@trhgquan.xyz>
-            - Xuong L. Tran <xuong@trhgquan.xyz>
-            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+        Returns:
+            List[Dict[str, Any]]: rows of the page.
         """
 
-        super().__init__(**kwargs)
+        try:
+            return self.get(self.build_params(page=page, rows=rows))["rows"]
+
+        # The result shrank since the first page.
+        except NotFoundException:
+            return []
+
+    def iter_pages(self) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Fetch the first page, then (if `all_pages`) the other ones concurrently.
+
+        Yields:
+            Tuple[int, List[Dict[str, Any]]]: position of the first row of a page and
+                its rows, as pages arrive.
+        """
+
+        response_json = self.get()
+        start, rows, pages = self.plan(response_json)
+        done = start + len(response_json["rows"])
+
+        yield start, response_json["rows"]
 
-        self.language = kwargs.get("language", None)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pages)))) as executor:
+            futures = {executor.submit(self.fetch_page, page, rows): (page - 1) * rows
+                       for page in pages}
 
-        # Update masv and sobang to parameters
-        self.params["masv"] = kwargs.get("student_name", None)
-        self.params["sobang"] = kwargs.get("degree_id", None)
+            for future in as_completed(futures):
+                yield self.new_rows(done, futures[future], future.result())
 
     def process(self) -> List[DSTNItem]:
         """Processing to get the result.
@@ -306,84 +284,185 @@ class DSTNSingleRequest(DSTNRequest):
         """
 
         record_list = []
+        self.complete = True
 
         try:
-            response_json = self.get()
+            # Rows are added as pages arrive, then put back in result order.
+            for offset, rows in self.iter_pages():
+                self.add_page(record_list, offset, rows)
 
-        # No records found
-        except NotFoundException as notfound_error_handler:
-            print(notfound_error_handler)
+        except (NotFoundException, HTTPException) as error:
+            self.lookup_failed(error)
 
-        # Error while playing with HTTP
-        except HTTPException as http_error_handler:
-            print(http_error_handler)
+        return self.sorted_records(record_list)
 
-            response = http_error_handler.response
 
-            with open(SINGLE_LOG, "w+", encoding="utf8") as log_handler:
-                print(response.content, file=log_handler)
-
-        else:
-            for record in response_json["rows"]:
-                record_list.append(
-                    DSTNItem(json=record, language=self.language))
-
-        return record_list
-
-
-class DSTNListRequest(DSTNRequest):
+class DSTNListRequest(BaseDSTNListRequest, DSTNRequest):
     """Processing a list of users
 
     Author(s):
         - Xuong L. Tran <xuong@trhgquan.xyz>
     """
 
-    # Student list read from .csv file.
-    student_list: List[Tuple[str, str]]
+    def check(self, name: str, degree_id: str) -> Optional[DSTNListItem]:
+        """Check a single row of the list.
 
-    def __init__(self, **kwargs) -> None:
-        """Initialization
+        Args:
+            name (str): student name (or Student ID).
+            degree_id (str): degree ID.
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
+        Returns:
+            Optional[DSTNListItem]: validation result, None if the request failed.
         """
 
-        super().__init__(**kwargs)
-        self.student_list = kwargs.get("student_list", None)
+        params = self.query_params(name, degree_id)
 
-    def process(self) -> List[Tuple[str, str, str]]:
-        """Processing to get the result.
+        try:
+            if self.fast_check:
+                total = self.get_total(params)
 
-        Returns:
-            List[Tuple[str, str, str]]: List of validation result (SID, DegreeId, Status)
+            else:
+                total = self.get(params)["total"]
 
-        Author(s):
-            - Xuong L. Tran <xuong@trhgquan.xyz>
+        except (NotFoundException, HTTPException) as error:
+            return self.check_failed(name, degree_id, error)
+
+        return DSTNListItem(name=name, degree_id=degree_id, status=total > 0)
+
+    def lookup(self, row: Tuple[str, str], executor: Optional[ThreadPoolExecutor],
+               checked: "OrderedDict[Tuple[str, str], Future]") -> Future:
+        """Get the (future) result of a row, reusing the one of a recent duplicate.
+
+        Args:
+            row (Tuple[str, str]): the row to check.
+            executor (Optional[ThreadPoolExecutor]): thread pool (None to check right away).
+            checked (OrderedDict[Tuple[str, str], Future]): futures of the recent distinct rows.
+
+        Returns:
+            Future: result of the row.
         """
 
-        status_list = []
+        key, future = self.recent(checked, row)
+
+        if future is not None:
+            return future
+
+        if executor is not None:
+            future = executor.submit(self.check, *row)
 
-        for name, degree_id in self.student_list:
-            self.params["masv"] = name
-            self.params["sobang"] = degree_id
+        else:
+            future = Future()
+            future.set_result(self.check(*row))
+
+        self.remember(checked, key, future)
 
-            try:
-                _ = self.get()
+        return future
 
-            # No records found
-            except NotFoundException:
-                status_list.append(DSTNListItem(name=name, degree_id=degree_id, status=False))
+    def iter_results(self, rows: Iterable[Tuple[str, str]]) -> Iterator[Optional[DSTNListItem]]:
+        """Check every row, using a thread pool if there are several workers.
 
-            # Error while playing with HTTP
-            except HTTPException as http_error_handler:
-                print(http_error_handler)
+        Rows are read lazily and only a few per worker are pending at any time, so
+        `rows` can be a generator over a file of any size. Duplicates of a
+        recent row (once normalized) are only checked once, their result is repeated
+        for each of them.
 
-                response = http_error_handler.response
+        Args:
+            rows (Iterable[Tuple[str, str]]): the rows (`student_list`, or the failed ones).
 
-                with open(MULTIPLE_LOG, "w+", encoding="utf8") as multiple_log_handler:
-                    print(response.content, file=multiple_log_handler)
+        Yields:
+            Optional[DSTNListItem]: validation result of each row, None if the request failed.
+        """
+
+        checked = OrderedDict()
+        executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+        try:
+            if self.ordered:
+                yield from self.iter_ordered(rows, executor, checked)
 
             else:
-                status_list.append(DSTNListItem(name=name, degree_id=degree_id, status=True))
+                yield from self.iter_unordered(rows, executor, checked)
+
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def iter_ordered(self, rows: Iterable[Tuple[str, str]],
+                     executor: Optional[ThreadPoolExecutor],
+                     checked: "OrderedDict[Tuple[str, str], Future]"
+                     ) -> Iterator[Optional[DSTNListItem]]:
+        """Yield the result of every row, in input order."""
+
+        pending = deque()
+
+        for row in rows:
+            pending.append((row, self.lookup(row, executor, checked)))
+
+            if len(pending) >= self.workers * STREAM_WINDOW:
+                row, future = pending.popleft()
+                yield self.settle(row, future.result())
+
+        while pending:
+            row, future = pending.popleft()
+            yield self.settle(row, future.result())
+
+    def iter_unordered(self, rows: Iterable[Tuple[str, str]],
+                       executor: Optional[ThreadPoolExecutor],
+                       checked: "OrderedDict[Tuple[str, str], Future]"
+                       ) -> Iterator[Optional[DSTNListItem]]:
+        """Yield the result of every row, as soon as it is available."""
+
+        # Rows waiting for each future.
+        waiting = defaultdict(list)
+
+        for row in rows:
+            waiting[self.lookup(row, executor, checked)].append(row)
+
+            if len(waiting) < self.workers * STREAM_WINDOW:
+                continue
+
+            done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                for waiting_row in waiting.pop(future):
+                    yield self.settle(waiting_row, future.result())
+
+        for future in as_completed(list(waiting)):
+            for waiting_row in waiting.pop(future):
+                yield self.settle(waiting_row, future.result())
+
+    def stream(self) -> Iterator[DSTNListItem]:
+        """Yield the validation results as soon as they are available.
+
+        Rows whose request failed are checked once more at the end of the batch
+        (their results come last, `merge_shards` matches results to rows by query),
+        those failing again are added to `retry_path`.
+
+        Yields:
+            DSTNListItem: validation result (SID, DegreeId, Status), rows whose request
+                failed are skipped.
+        """
+
+        for item in self.iter_results(self.student_list):
+            METRICS.row_checked()
+
+            if item is not None:
+                yield item
+
+        for item in self.iter_results(self.take_failed()):
+            if item is not None:
+                yield item
+
+        self.save_failed()
+
+    def process(self) -> List[DSTNListItem]:
+        """Processing to get the result.
+
+        Returns:
+            List[DSTNListItem]: List of validation result (SID, DegreeId, Status)
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
 
-        return status_list
+        return list(self.stream())
@@ -0,0 +1,249 @@
+"""Background error journal and retry file of the rows whose lookup failed"""
+
+import atexit
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .exception import HTTPException
+
+# Default error settings, overridden by the `errors` block of the config.
+DEFAULT_ERRORS = {
+    "enabled": True,
+    "path": "errors.jsonl",
+    "max_bytes": 10 * 1024 * 1024,
+    "backups": 3,
+    "retry": True,
+    "retry_path": "retry.csv",
+}
+
+# Error journals already opened, keyed by path.
+_JOURNALS: Dict[str, "ErrorJournal"] = {}
+_JOURNALS_LOCK = threading.Lock()
+
+
+def error_settings(errors: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge the errors block of a config with the default settings.
+
+    Args:
+        errors (Optional[Dict[str, Any]], optional): `errors` block of the config.
+            Defaults to None.
+
+    Returns:
+        Dict[str, Any]: full error settings.
+    """
+
+    settings = dict(DEFAULT_ERRORS)
+
+    if errors is not None:
+        settings.update(errors)
+
+    return settings
+
+
+class ErrorJournal:
+    """Every failed lookup, one JSON object per line (key, status, message and body).
+
+    Workers only queue the failure: a background thread writes the queued ones
+    in a batch, flushes them, and rotates the file once it holds more than
+    `max_bytes` (to `path.1`, ..., `path.<backups>`, as logging's
+    RotatingFileHandler does).
+    """
+
+    # Path to the journal.
+    path: str
+
+    # Size beyond which the journal is rotated.
+    max_bytes: int
+
+    # Rotated journals kept.
+    backups: int
+
+    # Failures recorded so far.
+    count: int
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.path = kwargs.get("path", DEFAULT_ERRORS["path"])
+        self.max_bytes = kwargs.get("max_bytes", DEFAULT_ERRORS["max_bytes"])
+        self.backups = kwargs.get("backups", DEFAULT_ERRORS["backups"])
+        self.count = 0
+
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, key: Iterable[Optional[str]], error: HTTPException) -> None:
+        """Queue a failure, to be written by the background thread.
+
+        Args:
+            kind (str): what was looked up (`single`, `multiple`, `crawl`).
+            key (Iterable[Optional[str]]): what identifies the lookup (e.g. the row).
+            error (HTTPException): the error raised by the request.
+        """
+
+        with self.lock:
+            self.count += 1
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="error-journal",
+                                               daemon=True)
+                self.thread.start()
+
+        # Encoded by the background thread, off the path of the workers.
+        self.queue.put((time.time(), kind, list(key), error))
+
+    @staticmethod
+    def encode(entry: Tuple[float, str, list, HTTPException]) -> str:
+        """Line of the journal for a queued failure."""
+
+        logged_at, kind, key, error = entry
+        response = error.response
+
+        return json.dumps({
+            "time": logged_at,
+            "kind": kind,
+            "key": key,
+            "status": response.status_code if response is not None else None,
+            "error": str(error),
+            "body": response.content.decode("utf8", "replace") if response is not None else None,
+        }, ensure_ascii=False) + "\n"
+
+    def run(self) -> None:
+        """Write the queued failures until the journal is closed."""
+
+        journal_handler = open(self.path, "a", encoding="utf8")  # pylint: disable=consider-using-with
+        stopped = False
+
+        try:
+            while not stopped:
+                batch = [self.queue.get()]
+
+                # Everything queued meanwhile goes in the same write.
+                try:
+                    while True:
+                        batch.append(self.queue.get_nowait())
+
+                except queue.Empty:
+                    pass
+
+                stopped = None in batch
+                journal_handler.write("".join(self.encode(entry) for entry in batch
+                                              if entry is not None))
+                journal_handler.flush()
+
+                if journal_handler.tell() >= self.max_bytes:
+                    journal_handler = self.rotate(journal_handler)
+
+        finally:
+            journal_handler.close()
+
+    def rotate(self, journal_handler: Any) -> Any:
+        """Move the journal to `path.1` (and the older ones one step further).
+
+        Returns:
+            Any: the new (empty) journal.
+        """
+
+        journal_handler.close()
+
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+
+        return open(self.path, "w", encoding="utf8")  # pylint: disable=consider-using-with
+
+    def close(self) -> None:
+        """Write the failures still queued, then stop the background thread."""
+
+        with self.lock:
+            thread, self.thread = self.thread, None
+
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+
+def get_error_journal(errors: Optional[Dict[str, Any]] = None) -> Optional[ErrorJournal]:
+    """Get the error journal shared by every request writing to the same path.
+
+    Args:
+        errors (Optional[Dict[str, Any]], optional): `errors` block of the config.
+            Defaults to None.
+
+    Returns:
+        Optional[ErrorJournal]: the shared journal, None if disabled.
+    """
+
+    settings = error_settings(errors)
+
+    if not settings["enabled"]:
+        return None
+
+    # Opened by the background thread, whatever the working directory is by then.
+    settings["path"] = os.path.abspath(settings["path"])
+
+    with _JOURNALS_LOCK:
+        if settings["path"] not in _JOURNALS:
+            _JOURNALS[settings["path"]] = ErrorJournal(**settings)
+
+        return _JOURNALS[settings["path"]]
+
+
+@atexit.register
+def close_error_journals() -> None:
+    """Write what is left in every journal before exiting."""
+
+    with _JOURNALS_LOCK:
+        journals = list(_JOURNALS.values())
+
+    for journal in journals:
+        journal.close()
+
+
+def log_http_error(http_error_handler: HTTPException, errors: Optional[ErrorJournal],
+                   kind: str, key: Iterable[Optional[str]]) -> None:
+    """Report an HTTP error on the standard error and record it in the error journal.
+
+    Args:
+        http_error_handler (HTTPException): the error raised by the request.
+        errors (Optional[ErrorJournal]): error journal (None if disabled).
+        kind (str): what was looked up (`single`, `multiple`, `crawl`).
+        key (Iterable[Optional[str]]): what identifies the lookup (e.g. the row).
+    """
+
+    print(http_error_handler, file=sys.stderr)
+
+    if errors is not None:
+        errors.record(kind, key, http_error_handler)
+
+
+def save_rows(path: str, rows: Iterable[Tuple[str, ...]]) -> int:
+    """Append rows to a .csv file (the rows left to retry).
+
+    Args:
+        path (str): path to the .csv file.
+        rows (Iterable[Tuple[str, ...]]): the rows.
+
+    Returns:
+        int: number of rows written.
+    """
+
+    count = 0
+
+    with open(path, "a", encoding="utf8", newline="") as csv_handler:
+        writer = csv.writer(csv_handler, lineterminator="\n")
+
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+
+    return count
@@ -47,11 +47,22 @@ class HTTPException(Exception):
             - Xuong L. Tran <xuong@trhgquan.xyz>
         """
 
+        # No response at all (timeout, connection error, etc.)
+        if self.response is None:
+            return f"HTTPException: {self.message}"
+
         if self.message:
             return f"HTTPException: error {self.response.status_code} - {self.message}"
         return f"HTTPException: error {self.response.status_code}"
 
 
+class CircuitOpenException(HTTPException):
+    """CircuitOpenException for DSTN
+
+    For requests refused because the API keeps failing.
+    """
+
+
 class NotFoundException(Exception):
     """NotFoundException for DSTN
 
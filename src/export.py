@@ -0,0 +1,178 @@
+"""Exporters writing DSTN results in structured formats"""
+
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional, TextIO
+from .item import DSTNListItem, status_label
+from .render import ItemRenderer
+
+# Buffer size of the output files.
+EXPORT_BUFFER = 1 << 20
+
+# Columns of the multiple mode results, with their titles in table format.
+LIST_COLUMNS = {"name": "Name", "degree_id": "Degree ID", "status": "Status"}
+
+
+class Exporter(ABC):
+    """Write results to a file, one record at a time, as they arrive.
+
+    The header (if the format has one) is written with the first record, or
+    right away when the columns are known in advance.
+    """
+
+    # Output file.
+    output_handler: TextIO
+
+    # Columns of the records (None to take the fields of the first record).
+    columns: Optional[Dict[str, str]]
+
+    def __init__(self, output_handler: TextIO,
+                 columns: Optional[Dict[str, str]] = None) -> None:
+        """Initialization
+
+        Args:
+            output_handler (TextIO): output file.
+            columns (Optional[Dict[str, str]], optional): column names and titles.
+                Defaults to None.
+        """
+
+        self.output_handler = output_handler
+        self.columns = columns
+
+        if columns is not None:
+            self.write_header(list(columns))
+
+    def write_header(self, fields: Iterable[str]) -> None:
+        """Write the header of the file (nothing by default).
+
+        Args:
+            fields (Iterable[str]): names of the columns.
+        """
+
+    def write(self, record: Any) -> None:
+        """Write a record.
+
+        Args:
+            record (Any): a `DSTNItem` or a `DSTNListItem`.
+        """
+
+        record_dict = record.asdict()
+
+        if self.columns is None:
+            self.columns = {field: field for field in record_dict}
+            self.write_header(list(self.columns))
+
+        self.write_dict(record, record_dict)
+
+    @abstractmethod
+    def write_dict(self, record: Any, record_dict: Dict[str, Any]) -> None:
+        """Write the fields of a record.
+
+        Args:
+            record (Any): the record.
+            record_dict (Dict[str, Any]): its fields.
+        """
+
+    def write_all(self, records: Iterable[Any]) -> None:
+        """Write every record.
+
+        Args:
+            records (Iterable[Any]): the records.
+        """
+
+        for record in records:
+            self.write(record)
+
+
+class JSONLExporter(Exporter):
+    """One JSON object per line."""
+
+    def write_dict(self, record: Any, record_dict: Dict[str, Any]) -> None:
+        self.output_handler.write(json.dumps(record_dict, ensure_ascii=False) + "\n")
+
+
+class CSVExporter(Exporter):
+    """Comma-separated values, with a header line."""
+
+    # Field delimiter.
+    delimiter: str = ","
+
+    def __init__(self, output_handler: TextIO,
+                 columns: Optional[Dict[str, str]] = None) -> None:
+        """Initialization"""
+
+        self.writer = csv.writer(output_handler, delimiter=self.delimiter, lineterminator="\n")
+        super().__init__(output_handler, columns)
+
+    def write_header(self, fields: Iterable[str]) -> None:
+        self.writer.writerow(fields)
+
+    def write_dict(self, record: Any, record_dict: Dict[str, Any]) -> None:
+        # Same status values as the table format.
+        if isinstance(record, DSTNListItem):
+            record_dict["status"] = status_label(record_dict["status"])
+
+        self.writer.writerow([record_dict.get(field, "") for field in self.columns])
+
+
+class TSVExporter(CSVExporter):
+    """Tab-separated values, with a header line."""
+
+    delimiter: str = "\t"
+
+
+class TableExporter(Exporter):
+    """Human-readable format: tables for `DSTNItem`, `Name,Degree ID,Status` lines otherwise.
+
+    Records are written as text, their fields are not used.
+    """
+
+    def __init__(self, output_handler: TextIO,
+                 columns: Optional[Dict[str, str]] = None) -> None:
+        """Initialization"""
+
+        self.renderer = ItemRenderer()
+        super().__init__(output_handler, columns)
+
+    def write_header(self, fields: Iterable[str]) -> None:
+        # Only the list results have a header, known in advance.
+        if self.columns is not None:
+            self.output_handler.write(",".join(self.columns.values()) + "\n")
+
+    def write(self, record: Any) -> None:
+        # Records are written as text, without building their fields.
+        self.write_dict(record, {})
+
+    def write_dict(self, record: Any, record_dict: Dict[str, Any]) -> None:
+        if hasattr(record, "get_cells"):
+            self.output_handler.write(self.renderer.render(record) + "\n")
+
+        else:
+            self.output_handler.write(str(record) + "\n")
+
+
+# Exporters, by format name.
+EXPORTERS = {
+    "table": TableExporter,
+    "jsonl": JSONLExporter,
+    "csv": CSVExporter,
+    "tsv": TSVExporter,
+}
+
+
+def get_exporter(export_format: str, output_handler: TextIO,
+                 columns: Optional[Dict[str, str]] = None) -> Exporter:
+    """Create the exporter of a format.
+
+    Args:
+        export_format (str): format name (see `EXPORTERS`).
+        output_handler (TextIO): output file.
+        columns (Optional[Dict[str, str]], optional): column names and titles, if known
+            in advance. Defaults to None.
+
+    Returns:
+        Exporter: the exporter.
+    """
+
+    return EXPORTERS[export_format](output_handler, columns)
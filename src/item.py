@@ -0,0 +1,281 @@
+"""Items returned by the DSTN requests"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from .render import render_table
+
+
+def status_label(status: Optional[bool]) -> str:
+    """Status of a row, as written in the output files.
+
+    Args:
+        status (Optional[bool]): the row has a record.
+
+    Returns:
+        str: `VALID` or `INVALID`.
+    """
+
+    return "VALID" if status else "INVALID"
+
+
+class DSTNListItem:
+    """Structure of an Item in DSTNList
+
+    Author(s):
+        - Xuong L. Tran <xuong@trhgquan.xyz>
+    """
+
+    # No per-instance __dict__, batches hold millions of items.
+    __slots__ = ("__name", "__degree_id", "__status")
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        self.__name = kwargs.get("name", None)
+        self.__degree_id = kwargs.get("degree_id", None)
+        self.__status = kwargs.get("status", None)
+
+    def asdict(self) -> None:
+        """Cast the given structure into a dictionary
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        return {
+            "name": self.__name,
+            "degree_id": self.__degree_id,
+            "status": self.__status
+        }
+
+    def __str__(self) -> str:
+        """Convert the structure into string
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        return ",".join([self.__name, self.__degree_id, status_label(self.__status)])
+
+    def __iter__(self) -> str:
+        """Yield the current structure
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        yield self.__str__()
+
+    def relabel(self, name: str, degree_id: str) -> "DSTNListItem":
+        """Copy the result for another row which shares it (same normalized query).
+
+        Args:
+            name (str): student name of the other row.
+            degree_id (str): degree ID of the other row.
+
+        Returns:
+            DSTNListItem: the result, labelled with the other row.
+        """
+
+        if (name, degree_id) == (self.__name, self.__degree_id):
+            return self
+
+        return DSTNListItem(name=name, degree_id=degree_id, status=self.__status)
+
+class DSTNItem:
+    """Parse a JSON DSTN to beautified - table format.
+
+    Fields are kept as a tuple of values, the tuple of their names being shared
+    by every record with the same fields. The table is only built when the item
+    is printed, from a layout compiled once per language and set of fields.
+
+    Author(s):
+        - Quan H. Tran <quan@trhgquan.xyz>
+        - Xuong L. Tran <xuong@trhgquan.xyz>
+        - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+    """
+
+    __slots__ = ("language", "fields", "values")
+
+    # (Label, field) rows of the table, by language.
+    LAYOUTS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+        "vn": (
+            ("Mã sinh viên", "masv"),
+            ("Ngày sinh", "ngaysinh"),
+            ("Họ và tên", "hoten"),
+            ("Bậc", "Bac"),
+            ("Tên bậc", "tenbac"),
+            ("Mã hệ", "mahe"),
+            ("Tên hệ", "tenhe"),
+            ("Đợt năm", "dotnam"),
+            ("Tên ngành", "tennganh"),
+            ("Loại tốt nghiệp", "loaitotnghiep"),
+            ("Số bằng", "sobang"),
+            ("Số vào sổ", "sovaoso"),
+            ("Ngày quyết định", "ngayqd"),
+        ),
+        "en": (
+            ("Student ID", "masv"),
+            ("Birthday", "ngaysinh"),
+            ("Name", "hotenAnh"),
+            ("Type", "Bac"),
+            ("Type name", "tenbacAnh"),
+            ("Type code", "mahe"),
+            ("Type code name", "tenheAnh"),
+            ("Year", "dotnam"),
+            ("Major name", "tennganhAnh"),
+            ("Graduation rank", "loaitotnghiepAnh"),
+            ("Degree ID", "sobang"),
+            ("Degree in book ID", "sovaoso"),
+            ("Issue date", "ngayqd"),
+        ),
+    }
+
+    # Field names shared between records, by field names.
+    FIELDS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    # Compiled layouts (labels and value indices), by language and field names.
+    COMPILED: Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple[str, ...], Tuple[int, ...]]] = {}
+
+    # Language used in the table.
+    language: str
+
+    # Names of the fields of the record (shared).
+    fields: Tuple[str, ...]
+
+    # Values of the fields of the record.
+    values: Tuple[Any, ...]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization
+
+        Author(s):
+            - Quan H. Tran <quan@trhgquan.xyz>
+            - Me A. Doge <domyeukemphancam@trhgquan.xyz>
+        """
+
+        self.language = kwargs.get("language", "vn")
+
+        json_data = kwargs.get("json", None) or {}
+        fields = tuple(json_data)
+
+        self.fields = DSTNItem.FIELDS.setdefault(fields, fields)
+        self.values = tuple(json_data.values())
+
+    @property
+    def info(self) -> Dict[str, str]:
+        """Informations stored, as a dict (built on demand).
+
+        Returns:
+            Dict[str, str]: the language and every field of the record.
+        """
+
+        info = {"language": self.language}
+        info.update(zip(self.fields, self.values))
+
+        return info
+
+    def asdict(self) -> Dict[str, Any]:
+        """Cast the record into a dictionary (every field returned by the API).
+
+        Returns:
+            Dict[str, Any]: fields of the record.
+        """
+
+        return dict(zip(self.fields, self.values))
+
+    def get_info(self) -> Dict[str, str]:
+        """Get info saved inside this item (for testing).
+
+        Returns:
+            Dict[str, str]: information of this DSTNItem, stored as a dict.
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        return self.info
+
+    def get_language(self) -> str:
+        """Get the language used when parsing the result.
+
+        Returns:
+            str: the languaged used when parsing the result.
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        return self.language
+
+    def get_layout(self) -> Tuple[Tuple[str, ...], Tuple[int, ...]]:
+        """Get the labels of the table and the indices of their values, compiling them once.
+
+        Returns:
+            Tuple[Tuple[str, ...], Tuple[int, ...]]: labels and value indices.
+        """
+
+        key = (self.language, self.fields)
+        layout = DSTNItem.COMPILED.get(key, None)
+
+        if layout is None:
+            index = {field: position for position, field in enumerate(self.fields)}
+            rows = DSTNItem.LAYOUTS.get(self.language, ())
+
+            layout = (tuple(label for label, _ in rows),
+                      tuple(index[field] for _, field in rows))
+            DSTNItem.COMPILED[key] = layout
+
+        return layout
+
+    def get_cells(self) -> Tuple[Tuple[str, ...], List[str]]:
+        """Get the labels of the table and their values, as strings.
+
+        Returns:
+            Tuple[Tuple[str, ...], List[str]]: labels and values.
+        """
+
+        labels, indices = self.get_layout()
+        values = self.values
+
+        return labels, [str(values[index]) for index in indices]
+
+    def get_rows(self) -> List[List[str]]:
+        """Get the (label, value) rows of the table.
+
+        Returns:
+            List[List[str]]: rows of the table.
+        """
+
+        labels, indices = self.get_layout()
+        values = self.values
+
+        return [[label, values[index]] for label, index in zip(labels, indices)]
+
+    def get_string(self) -> str:
+        """Parsing class property to formatted (tabular) UI
+
+        Returns:
+            str: _the tabular string_
+
+        Author(s):
+            - Quan H. Tran <quan@trhgquan.xyz>
+        """
+
+        return render_table(*self.get_cells())
+
+    def __str__(self) -> str:
+        """Get the string representation (tabular) of the Item.
+        This is just basically calling `get_string` method.
+
+        Returns:
+            str: tabular string.
+
+        Author(s):
+            - Xuong L. Tran <xuong@trhgquan.xyz>
+        """
+
+        return self.get_string()
@@ -0,0 +1,147 @@
+"""Append-only journal of completed rows, to resume interrupted multiple-mode runs"""
+
+import json
+import os
+import time
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+from .dstn import DSTNListItem
+
+
+class Journal:
+    """Append-only journal of the results written so far, one JSON object per line.
+
+    Every line is flushed as soon as it is written (surviving the process being
+    killed) and the file is synced to disk at most every `sync_interval` seconds
+    (surviving the machine going down, minus the last few seconds).
+    """
+
+    # Path to the journal.
+    path: str
+
+    # Seconds between two syncs to disk.
+    sync_interval: float
+
+    # Journal file, while open.
+    handler: Optional[TextIO]
+
+    # Size of the complete lines read by `load` (None until loaded).
+    loaded_size: Optional[int]
+
+    def __init__(self, path: str, sync_interval: float = 1.0) -> None:
+        """Initialization"""
+
+        self.path = path
+        self.sync_interval = sync_interval
+        self.handler = None
+        self.loaded_size = None
+        self.synced_at = 0.0
+
+    def load(self) -> List[DSTNListItem]:
+        """Read the results recorded by a previous run.
+
+        A truncated last line (the run died while writing it) is ignored, and
+        dropped when the journal is opened to resume.
+
+        Returns:
+            List[DSTNListItem]: recorded results, in the order they were written.
+        """
+
+        record_list = []
+        self.loaded_size = 0
+
+        if not os.path.exists(self.path):
+            return record_list
+
+        with open(self.path, "rb") as journal_handler:
+            for line in journal_handler:
+                if not line.endswith(b"\n"):
+                    break
+
+                try:
+                    record_list.append(DSTNListItem(**json.loads(line.decode("utf8"))))
+
+                except (UnicodeDecodeError, json.JSONDecodeError, TypeError):
+                    break
+
+                self.loaded_size += len(line)
+
+        return record_list
+
+    def open(self, resume: bool = False) -> None:
+        """Open the journal for writing.
+
+        Args:
+            resume (bool, optional): keep the recorded results (instead of starting over).
+                Defaults to False.
+        """
+
+        if resume:
+            if self.loaded_size is None:
+                self.load()
+
+            # Drop the truncated last line, if any, leaving the complete ones in place.
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.loaded_size:
+                os.truncate(self.path, self.loaded_size)
+
+        self.handler = open(self.path, "a" if resume else "w",  # pylint: disable=consider-using-with
+                            encoding="utf8", buffering=1)
+
+    def append(self, record: DSTNListItem) -> None:
+        """Record a result.
+
+        Args:
+            record (DSTNListItem): the result.
+        """
+
+        print(json.dumps(record.asdict(), ensure_ascii=False), file=self.handler)
+
+        now = time.monotonic()
+
+        if now - self.synced_at >= self.sync_interval:
+            os.fsync(self.handler.fileno())
+            self.synced_at = now
+
+    def close(self, remove: bool = False) -> None:
+        """Close the journal.
+
+        Args:
+            remove (bool, optional): delete the journal (the run has completed).
+                Defaults to False.
+        """
+
+        if self.handler is not None:
+            self.handler.close()
+            self.handler = None
+
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def pending_rows(student_list: Iterable[Tuple[str, str]],
+                 record_list: Iterable[DSTNListItem]) -> Iterator[Tuple[str, str]]:
+    """Skip the rows whose result is already recorded.
+
+    Each recorded result accounts for one row with the same name and degree ID,
+    so duplicate rows are skipped as many times as they have been recorded.
+
+    Args:
+        student_list (Iterable[Tuple[str, str]]): rows of the .csv file.
+        record_list (Iterable[DSTNListItem]): results recorded by a previous run.
+
+    Yields:
+        Tuple[str, str]: rows still to check.
+    """
+
+    done = Counter()
+
+    for record in record_list:
+        record_dict = record.asdict()
+        done[(record_dict["name"], record_dict["degree_id"])] += 1
+
+    for row in student_list:
+        if done[row] > 0:
+            done[row] -= 1
+            continue
+
+        yield row
@@ -0,0 +1,145 @@
+"""Adaptive (AIMD) rate limiter for requests sent to the DSTN API"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Default limiter settings, overridden by the `rate_limit` block of the config.
+DEFAULT_RATE_LIMIT = {
+    "enabled": False,
+    "initial_rate": 10.0,
+    "min_rate": 0.5,
+    "max_rate": 100.0,
+    "increase": 1.0,
+    "decrease": 0.5,
+    "latency_target": 2.0,
+    "burst": 1.0,
+}
+
+# Status codes telling us to slow down.
+THROTTLE_STATUS = (429, 500, 502, 503, 504)
+
+# Limiters already created, keyed by API URL and settings.
+_LIMITERS: Dict[Tuple[Any, ...], "AdaptiveRateLimiter"] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate follows additive-increase / multiplicative-decrease.
+
+    Every healthy response (fast enough, not throttled) raises the rate by
+    `increase / rate`, that is about `increase` requests/s for each second of
+    healthy traffic. A throttled response or a timeout multiplies the rate by
+    `decrease`, at most once per interval between two requests.
+    """
+
+    # Limiter settings (see `DEFAULT_RATE_LIMIT`).
+    settings: Dict[str, Any]
+
+    # Current rate (requests per second).
+    rate: float
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.settings = dict(DEFAULT_RATE_LIMIT)
+        self.settings.update(kwargs)
+
+        self.rate = min(self.settings["max_rate"],
+                        max(self.settings["min_rate"], self.settings["initial_rate"]))
+
+        self.lock = threading.Lock()
+        self.tokens = self.settings["burst"]
+        self.updated_at = time.monotonic()
+        self.decreased_at = 0.0
+
+    def reserve(self) -> float:
+        """Take a token from the bucket, going into debt if it is empty.
+
+        Returns:
+            float: seconds to wait before sending the request.
+        """
+
+        with self.lock:
+            now = time.monotonic()
+
+            self.tokens = min(self.settings["burst"],
+                              self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+
+        delay = self.reserve()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a request may be sent."""
+
+        # Already loaded by the running event loop, not by the sync engine.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        delay = self.reserve()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def feedback(self, status_code: Optional[int], latency: float) -> None:
+        """Adapt the rate to the outcome of a request.
+
+        Args:
+            status_code (Optional[int]): HTTP status code, None if the request timed out.
+            latency (float): duration of the request, in seconds.
+        """
+
+        with self.lock:
+            if status_code is None or status_code in THROTTLE_STATUS:
+                now = time.monotonic()
+
+                # Requests sent in the same burst only count once.
+                if now - self.decreased_at >= 1 / self.rate:
+                    self.rate = max(self.settings["min_rate"],
+                                    self.rate * self.settings["decrease"])
+                    self.decreased_at = now
+
+            elif latency <= self.settings["latency_target"]:
+                self.rate = min(self.settings["max_rate"],
+                                self.rate + self.settings["increase"] / self.rate)
+
+
+def get_limiter(api_url: str,
+                rate_limit: Optional[Dict[str, Any]] = None) -> Optional[AdaptiveRateLimiter]:
+    """Get the limiter shared by every request sent to `api_url`.
+
+    Args:
+        api_url (str): API URL.
+        rate_limit (Optional[Dict[str, Any]], optional): `rate_limit` block of the config.
+            Defaults to None.
+
+    Returns:
+        Optional[AdaptiveRateLimiter]: the shared limiter, None if rate limiting is disabled.
+    """
+
+    settings = dict(DEFAULT_RATE_LIMIT)
+
+    if rate_limit is not None:
+        settings.update(rate_limit)
+
+    if not settings["enabled"]:
+        return None
+
+    key = (api_url,) + tuple(sorted(settings.items()))
+
+    with _LIMITERS_LOCK:
+        if key not in _LIMITERS:
+            _LIMITERS[key] = AdaptiveRateLimiter(**settings)
+
+        return _LIMITERS[key]
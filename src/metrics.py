@@ -0,0 +1,297 @@
+"""Metrics of the requests sent to the DSTN API, in the Prometheus text format"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Content type of the Prometheus text format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    """Counters of the request path, shared by every request of the process.
+
+    Updates only take a lock and bump a few integers, the text is only built
+    when the metrics are scraped or dumped.
+    """
+
+    # Responses received, by status code ("error" for timeouts and connection errors).
+    requests: Dict[str, int]
+
+    # Responses per latency bucket (the last one is +Inf).
+    latency_counts: List[int]
+
+    # Total latency of the responses, in seconds.
+    latency_sum: float
+
+    # Requests sent again after a failure.
+    retries: int
+
+    # Results answered by the cache, and queries it did not hold.
+    cache_hits: int
+    cache_misses: int
+
+    # Queries answered by the offline snapshot.
+    snapshot_hits: int
+
+    # Requests waiting for their response.
+    in_flight: int
+
+    # Rows of a list checked.
+    rows: int
+
+    # Requests per bucket of the time waited for a scheduler slot, by priority class.
+    wait_counts: Dict[str, List[int]]
+
+    # Total time waited for a scheduler slot, by priority class.
+    wait_sums: Dict[str, float]
+
+    # Requests given their slot after their deadline, by priority class.
+    deadline_misses: Dict[str, int]
+
+    def __init__(self) -> None:
+        """Initialization"""
+
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start counting again from zero."""
+
+        with self.lock:
+            self.requests = {}
+            self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+            self.latency_sum = 0.0
+            self.retries = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.snapshot_hits = 0
+            self.in_flight = 0
+            self.rows = 0
+            self.wait_counts = {}
+            self.wait_sums = {}
+            self.deadline_misses = {}
+            self.started_at = time.monotonic()
+
+    def request_sent(self) -> None:
+        """Count a request sent, waiting for its response."""
+
+        with self.lock:
+            self.in_flight += 1
+
+    def response_received(self, status_code: Optional[int], latency: float) -> None:
+        """Count the response of a request sent.
+
+        Args:
+            status_code (Optional[int]): HTTP status code, None for a timeout or connection error.
+            latency (float): seconds since the request has been sent.
+        """
+
+        status = "error" if status_code is None else str(status_code)
+        bucket = bisect_left(LATENCY_BUCKETS, latency)
+
+        with self.lock:
+            self.in_flight -= 1
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.latency_counts[bucket] += 1
+            self.latency_sum += latency
+
+    def retried(self) -> None:
+        """Count a request about to be sent again."""
+
+        with self.lock:
+            self.retries += 1
+
+    def cache_lookup(self, hit: bool) -> None:
+        """Count a query asked to the cache.
+
+        Args:
+            hit (bool): the cache held its result.
+        """
+
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+
+            else:
+                self.cache_misses += 1
+
+    def snapshot_hit(self) -> None:
+        """Count a query answered by the offline snapshot."""
+
+        with self.lock:
+            self.snapshot_hits += 1
+
+    def row_checked(self) -> None:
+        """Count a row of a list checked."""
+
+        with self.lock:
+            self.rows += 1
+
+    def slot_waited(self, priority: str, waited: float, missed: bool) -> None:
+        """Count a request given a slot by the scheduler.
+
+        Args:
+            priority (str): priority class of the request.
+            waited (float): seconds the request waited for its slot.
+            missed (bool): the slot was given after the deadline of the request.
+        """
+
+        bucket = bisect_left(LATENCY_BUCKETS, waited)
+
+        with self.lock:
+            if priority not in self.wait_counts:
+                self.wait_counts[priority] = [0] * (len(LATENCY_BUCKETS) + 1)
+                self.wait_sums[priority] = 0.0
+                self.deadline_misses[priority] = 0
+
+            self.wait_counts[priority][bucket] += 1
+            self.wait_sums[priority] += waited
+            self.deadline_misses[priority] += missed
+
+    def asdict(self) -> Dict[str, Any]:
+        """Current values of the metrics.
+
+        Returns:
+            Dict[str, Any]: the metrics.
+        """
+
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            count = sum(self.latency_counts)
+
+            return {
+                "requests": dict(self.requests),
+                "latency": {
+                    "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"],
+                                        self.latency_counts)),
+                    "sum": self.latency_sum,
+                    "count": count,
+                    "mean": self.latency_sum / count if count else 0.0,
+                },
+                "retries": self.retries,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "snapshot_hits": self.snapshot_hits,
+                "in_flight": self.in_flight,
+                "rows": self.rows,
+                "rows_per_second": self.rows / elapsed if elapsed > 0 else 0.0,
+                "elapsed": elapsed,
+                "scheduler": {
+                    priority: {
+                        "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], counts)),
+                        "sum": self.wait_sums[priority],
+                        "count": sum(counts),
+                        "deadline_misses": self.deadline_misses[priority],
+                    }
+                    for priority, counts in self.wait_counts.items()
+                },
+            }
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text format.
+
+        Returns:
+            str: the metrics, one sample per line.
+        """
+
+        metrics = self.asdict()
+        lines = ["# HELP dstn_requests_total Responses received from the API, by status.",
+                 "# TYPE dstn_requests_total counter"]
+
+        for status, count in sorted(metrics["requests"].items()):
+            lines.append(f'dstn_requests_total{{status="{status}"}} {count}')
+
+        lines += ["# HELP dstn_request_duration_seconds Latency of the API requests.",
+                  "# TYPE dstn_request_duration_seconds histogram"]
+
+        cumulative = 0
+
+        for bound, count in metrics["latency"]["buckets"].items():
+            cumulative += count
+            lines.append(f'dstn_request_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+
+        lines.append(f"dstn_request_duration_seconds_sum {metrics['latency']['sum']}")
+        lines.append(f"dstn_request_duration_seconds_count {metrics['latency']['count']}")
+
+        for name, kind, description, value in [
+            ("retries_total", "counter", "Requests sent again after a failure.",
+             metrics["retries"]),
+            ("cache_hits_total", "counter", "Queries answered by the cache.",
+             metrics["cache_hits"]),
+            ("cache_misses_total", "counter", "Queries the cache did not hold.",
+             metrics["cache_misses"]),
+            ("snapshot_hits_total", "counter", "Queries answered by the offline snapshot.",
+             metrics["snapshot_hits"]),
+            ("requests_in_flight", "gauge", "Requests waiting for their response.",
+             metrics["in_flight"]),
+            ("rows_total", "counter", "Rows of a list checked.", metrics["rows"]),
+            ("rows_per_second", "gauge", "Rows checked per second since the start.",
+             metrics["rows_per_second"]),
+        ]:
+            lines += [f"# HELP dstn_{name} {description}", f"# TYPE dstn_{name} {kind}",
+                      f"dstn_{name} {value}"]
+
+        if metrics["scheduler"]:
+            lines += self.render_scheduler(metrics["scheduler"])
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def render_scheduler(scheduler: Dict[str, Any]) -> List[str]:
+        """Scheduler metrics in the Prometheus text format.
+
+        Args:
+            scheduler (Dict[str, Any]): `scheduler` entry of the metrics.
+
+        Returns:
+            List[str]: the samples, one per line.
+        """
+
+        lines = ["# HELP dstn_scheduler_wait_seconds Time waited for a scheduler slot.",
+                 "# TYPE dstn_scheduler_wait_seconds histogram"]
+
+        for priority, waits in sorted(scheduler.items()):
+            cumulative = 0
+
+            for bound, count in waits["buckets"].items():
+                cumulative += count
+                lines.append(f'dstn_scheduler_wait_seconds_bucket{{class="{priority}",'
+                             f'le="{bound}"}} {cumulative}')
+
+            lines.append(f'dstn_scheduler_wait_seconds_sum{{class="{priority}"}} {waits["sum"]}')
+            lines.append(f'dstn_scheduler_wait_seconds_count{{class="{priority}"}} '
+                         f'{waits["count"]}')
+
+        lines += ["# HELP dstn_scheduler_deadline_misses_total "
+                  "Requests given their slot after their deadline.",
+                  "# TYPE dstn_scheduler_deadline_misses_total counter"]
+
+        for priority, waits in sorted(scheduler.items()):
+            lines.append(f'dstn_scheduler_deadline_misses_total{{class="{priority}"}} '
+                         f'{waits["deadline_misses"]}')
+
+        return lines
+
+    def dump(self, path: str) -> None:
+        """Write the metrics to a file (JSON for a .json file, Prometheus text format otherwise).
+
+        Args:
+            path (str): path to the file.
+        """
+
+        with open(path, "w", encoding="utf8") as metrics_handler:
+            if path.endswith(".json"):
+                json.dump(self.asdict(), metrics_handler, indent=4)
+
+            else:
+                metrics_handler.write(self.render())
+
+
+# Metrics of the process.
+METRICS = Metrics()
@@ -0,0 +1,199 @@
+"""Phase timing, cProfile and tracemalloc capture of a run (--profile)"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Lines written in the cProfile and tracemalloc reports.
+REPORT_LINES = 50
+
+
+class Phase:
+    """Time spent in a block, added to its phase when the block exits."""
+
+    __slots__ = ("profiler", "name", "wall", "cpu")
+
+    def __init__(self, profiler: "PhaseProfiler", name: str) -> None:
+        """Initialization"""
+
+        self.profiler = profiler
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self) -> "Phase":
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.add(self.name, time.perf_counter() - self.wall,
+                          time.thread_time() - self.cpu)
+
+
+class NullPhase:
+    """Phase of a disabled profiler, doing nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NullPhase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+# Shared by every block while profiling is disabled (no allocation on the hot path).
+NULL_PHASE = NullPhase()
+
+
+class PhaseProfiler:
+    """Wall-clock and CPU time spent in each phase of a run.
+
+    Phases may nest (`get` includes `json_decode`) and, with several workers,
+    run in parallel: their times add up to more than the run itself. CPU time
+    is the one of the thread running the phase (with the asyncio engine, it
+    includes the other tasks running while the phase awaits).
+    """
+
+    # Time the phases.
+    enabled: bool
+
+    # Calls, wall-clock and CPU seconds of each phase.
+    totals: Dict[str, List[float]]
+
+    def __init__(self) -> None:
+        """Initialization"""
+
+        self.enabled = False
+        self.totals = {}
+        self.lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.cpu_started_at = time.process_time()
+
+    def enable(self) -> None:
+        """Start timing the phases."""
+
+        with self.lock:
+            self.enabled = True
+            self.totals = {}
+            self.started_at = time.perf_counter()
+            self.cpu_started_at = time.process_time()
+
+    def phase(self, name: str):
+        """Time a block as part of a phase.
+
+        Args:
+            name (str): name of the phase.
+
+        Returns:
+            Phase: context manager timing the block (doing nothing if disabled).
+        """
+
+        if not self.enabled:
+            return NULL_PHASE
+
+        return Phase(self, name)
+
+    def add(self, name: str, wall: float, cpu: float) -> None:
+        """Add the time of a block to its phase.
+
+        Args:
+            name (str): name of the phase.
+            wall (float): wall-clock seconds.
+            cpu (float): CPU seconds.
+        """
+
+        with self.lock:
+            totals = self.totals.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+
+    def report(self) -> str:
+        """Time spent in each phase, as a table.
+
+        Returns:
+            str: one line per phase, with its share of the run's wall-clock time.
+        """
+
+        elapsed = time.perf_counter() - self.started_at
+        cpu_elapsed = time.process_time() - self.cpu_started_at
+        lines = [f"{'Phase':<16}{'Calls':>10}{'Wall (s)':>12}{'CPU (s)':>12}{'Wall %':>9}"]
+
+        with self.lock:
+            for name, (calls, wall, cpu) in self.totals.items():
+                lines.append(f"{name:<16}{calls:>10}{wall:>12.4f}{cpu:>12.4f}"
+                             f"{100 * wall / elapsed if elapsed > 0 else 0.0:>8.1f}%")
+
+        lines.append(f"{'total':<16}{'':>10}{elapsed:>12.4f}{cpu_elapsed:>12.4f}")
+
+        return "\n".join(lines)
+
+
+# Phase profiler of the process.
+PROFILER = PhaseProfiler()
+
+
+@contextmanager
+def capture(cpu_path: Optional[str] = None, memory_path: Optional[str] = None) -> Iterator[None]:
+    """Run a block under cProfile and/or tracemalloc, writing their reports on exit.
+
+    cProfile only sees the thread running the block (use a single worker to
+    profile the requests too).
+
+    Args:
+        cpu_path (Optional[str], optional): cProfile report (functions by cumulative time).
+            Defaults to None (no cProfile).
+        memory_path (Optional[str], optional): tracemalloc report (largest allocations by line).
+            Defaults to None (no tracemalloc).
+    """
+
+    if cpu_path is None and memory_path is None:
+        yield
+        return
+
+    # Only imported when a report is asked for (pstats alone takes ~10ms to import).
+    # pylint: disable=import-outside-toplevel
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile() if cpu_path is not None else None
+
+    if memory_path is not None:
+        tracemalloc.start()
+
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        yield
+
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+        # Snapshot taken before writing the reports, which allocate too.
+        if memory_path is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)])
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            with open(memory_path, "w", encoding="utf8") as memory_handler:
+                print(f"Current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB",
+                      file=memory_handler)
+
+                for statistic in snapshot.statistics("lineno")[:REPORT_LINES]:
+                    print(statistic, file=memory_handler)
+
+        if profiler is not None:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(REPORT_LINES)
+
+            with open(cpu_path, "w", encoding="utf8") as cpu_handler:
+                cpu_handler.write(output.getvalue())
@@ -0,0 +1,154 @@
+"""Batch rendering of DSTN items"""
+
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Sequence, TextIO, Tuple
+from .profiling import PROFILER
+
+# Available rendering styles.
+STYLES = ("table", "plain")
+
+# Items joined into a single write.
+WRITE_BATCH = 1000
+
+# ANSI escape sequences, which take no room on the screen (as termtables counts them).
+ESCAPE_PATTERN = re.compile(r"\x1B[@-_][0-?]*[ -/]*[@-~]")
+
+# Characters termtables splits lines on.
+LINE_BREAK_PATTERN = re.compile("[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def text_width(text: str) -> int:
+    """Width of a cell, as termtables measures it.
+
+    Args:
+        text (str): content of the cell.
+
+    Returns:
+        int: width of the cell.
+    """
+
+    if "\x1b" in text:
+        return len(ESCAPE_PATTERN.sub("", text))
+
+    return len(text)
+
+
+@lru_cache(maxsize=None)
+def column_width(labels: Tuple[str, ...]) -> int:
+    """Width of the label column of a layout, computed once per layout.
+
+    Args:
+        labels (Tuple[str, ...]): labels of the table.
+
+    Returns:
+        int: width of the widest label.
+    """
+
+    return max(map(text_width, labels), default=0)
+
+
+def render_table(labels: Tuple[str, ...], values: Sequence[str]) -> str:
+    """Render a two-column (label, value) table.
+
+    The output is the same as `termtables.to_string` with the `ascii_thin_double`
+    style, which is still used for the rare tables holding a line break.
+
+    Args:
+        labels (Tuple[str, ...]): first column.
+        values (Sequence[str]): second column.
+
+    Returns:
+        str: the table.
+    """
+
+    if not labels or LINE_BREAK_PATTERN.search("".join(values) + "".join(labels)):
+        # Imported on this (rare) path only, so that most runs never load it.
+        import termtables as tt  # pylint: disable=import-outside-toplevel
+
+        return tt.to_string([list(row) for row in zip(labels, values)],
+                            style=tt.styles.ascii_thin_double)
+
+    label_width = column_width(labels)
+    value_width = max(map(text_width, values))
+
+    border = f"+{'-' * (label_width + 2)}+{'-' * (value_width + 2)}+"
+    lines = [border]
+
+    for label, value in zip(labels, values):
+        label_padding = " " * (label_width - text_width(label))
+        value_padding = " " * (value_width - text_width(value))
+
+        lines.append(f"| {label}{label_padding} | {value}{value_padding} |")
+        lines.append(border)
+
+    return "\n".join(lines)
+
+
+def render_plain(labels: Tuple[str, ...], values: Sequence[str]) -> str:
+    """Render (label, value) pairs as tab-separated lines, without box drawing.
+
+    Args:
+        labels (Tuple[str, ...]): labels.
+        values (Sequence[str]): values.
+
+    Returns:
+        str: one `label<TAB>value` line per pair.
+    """
+
+    return "\n".join(f"{label}\t{value}" for label, value in zip(labels, values))
+
+
+class ItemRenderer:  # pylint: disable=too-few-public-methods
+    """Render many `DSTNItem`s, writing them in a few big writes."""
+
+    # Rendering style (see `STYLES`).
+    style: str
+
+    def __init__(self, style: str = "table") -> None:
+        """Initialization"""
+
+        self.style = style
+
+    def render(self, item) -> str:
+        """Render an item.
+
+        Args:
+            item (DSTNItem): the item.
+
+        Returns:
+            str: the rendered item.
+        """
+
+        labels, values = item.get_cells()
+
+        if self.style == "plain":
+            return render_plain(labels, values)
+
+        return render_table(labels, values)
+
+    def write(self, items: Iterable, output_handler: TextIO) -> None:
+        """Render the items to a file, one item per block of lines.
+
+        Args:
+            items (Iterable[DSTNItem]): the items.
+            output_handler (TextIO): the file (or the screen).
+        """
+
+        # Plain records are separated by an empty line.
+        separator = "\n\n" if self.style == "plain" else "\n"
+        items = iter(items)
+
+        with PROFILER.phase("render"):
+            batch = [self.render(item) for item in islice(items, WRITE_BATCH)]
+
+        while batch:
+            with PROFILER.phase("write"):
+                output_handler.write(separator.join(batch) + "\n")
+
+            with PROFILER.phase("render"):
+                batch = [self.render(item) for item in islice(items, WRITE_BATCH)]
+
+            if batch:
+                output_handler.write(separator[1:])
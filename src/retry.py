@@ -0,0 +1,195 @@
+"""Retry policy and circuit breaker for requests sent to the DSTN API"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from .exception import CircuitOpenException
+
+# Default retry settings, overridden by the `retry` block of the config.
+DEFAULT_RETRY = {
+    "max_retries": 3,
+    "backoff": 0.5,
+    "max_backoff": 30.0,
+    "jitter": True,
+    "retry_status": [429, 500, 502, 503, 504],
+}
+
+# Default circuit breaker settings, overridden by the `circuit_breaker` block of the config.
+DEFAULT_CIRCUIT_BREAKER = {
+    "enabled": True,
+    "failure_threshold": 5,
+    "recovery_timeout": 30.0,
+}
+
+# Circuit breakers already created, keyed by API URL and settings.
+_BREAKERS: Dict[Tuple[Any, ...], "CircuitBreaker"] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+class RetryPolicy:
+    """Decide whether a failed request is retried, and how long to wait before.
+
+    Delays grow exponentially (`backoff * 2 ** attempt`, capped at `max_backoff`).
+    With `jitter`, the actual delay is drawn uniformly between 0 and that value,
+    so that workers failing together do not retry together.
+    """
+
+    # Retry settings (see `DEFAULT_RETRY`).
+    settings: Dict[str, Any]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.settings = dict(DEFAULT_RETRY)
+        self.settings.update(kwargs)
+
+    def is_failure(self, status_code: Optional[int]) -> bool:
+        """Check if a request outcome is a (retryable) failure.
+
+        Args:
+            status_code (Optional[int]): HTTP status code, None for a timeout or connection error.
+
+        Returns:
+            bool: True if the request failed.
+        """
+
+        return status_code is None or status_code in self.settings["retry_status"]
+
+    def should_retry(self, status_code: Optional[int], attempt: int) -> bool:
+        """Check if a request should be sent again.
+
+        Args:
+            status_code (Optional[int]): HTTP status code, None for a timeout or connection error.
+            attempt (int): number of retries already done.
+
+        Returns:
+            bool: True if the request should be retried.
+        """
+
+        return attempt < self.settings["max_retries"] and self.is_failure(status_code)
+
+    def delay(self, attempt: int) -> float:
+        """Time to wait before a retry.
+
+        Args:
+            attempt (int): number of retries already done.
+
+        Returns:
+            float: delay, in seconds.
+        """
+
+        delay = min(self.settings["max_backoff"], self.settings["backoff"] * 2 ** attempt)
+
+        if self.settings["jitter"]:
+            delay = random.uniform(0, delay)
+
+        return delay
+
+
+class CircuitBreaker:
+    """Stop sending requests to an endpoint which keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    request fails fast with `CircuitOpenException`. Once `recovery_timeout`
+    seconds have passed, a single trial request is let through: the circuit
+    closes again if it succeeds, and re-opens otherwise. A trial whose outcome is
+    never recorded (e.g. cancelled before being sent) is given up after another
+    `recovery_timeout`, so the circuit cannot stay open for good.
+    """
+
+    # Circuit breaker settings (see `DEFAULT_CIRCUIT_BREAKER`).
+    settings: Dict[str, Any]
+
+    # Consecutive failures seen.
+    failures: int
+
+    # When the circuit has been opened (None if closed).
+    opened_at: Optional[float]
+
+    # When the trial request has been let through (None if there is none).
+    trial_started_at: Optional[float]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.settings = dict(DEFAULT_CIRCUIT_BREAKER)
+        self.settings.update(kwargs)
+
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+
+    def before_request(self) -> None:
+        """Check if a request may be sent.
+
+        Raises:
+            CircuitOpenException: the circuit is open.
+        """
+
+        with self.lock:
+            if self.opened_at is None:
+                return
+
+            now = time.monotonic()
+            timeout = self.settings["recovery_timeout"]
+
+            if now - self.opened_at >= timeout and (self.trial_started_at is None
+                                                   or now - self.trial_started_at >= timeout):
+                self.trial_started_at = now
+                return
+
+        raise CircuitOpenException("Circuit breaker is open, the API seems to be down")
+
+    def record(self, failed: bool) -> None:
+        """Record the outcome of a request.
+
+        Args:
+            failed (bool): True if the request failed.
+        """
+
+        with self.lock:
+            self.trial_started_at = None
+
+            if not failed:
+                self.failures = 0
+                self.opened_at = None
+                return
+
+            self.failures += 1
+
+            if self.opened_at is not None or \
+                    self.failures >= self.settings["failure_threshold"]:
+                self.opened_at = time.monotonic()
+
+
+def get_circuit_breaker(api_url: str,
+                        circuit_breaker: Optional[Dict[str, Any]] = None
+                        ) -> Optional[CircuitBreaker]:
+    """Get the circuit breaker shared by every request sent to `api_url`.
+
+    Args:
+        api_url (str): API URL.
+        circuit_breaker (Optional[Dict[str, Any]], optional): `circuit_breaker` block of
+            the config. Defaults to None.
+
+    Returns:
+        Optional[CircuitBreaker]: the shared circuit breaker, None if disabled.
+    """
+
+    settings = dict(DEFAULT_CIRCUIT_BREAKER)
+
+    if circuit_breaker is not None:
+        settings.update(circuit_breaker)
+
+    if not settings["enabled"]:
+        return None
+
+    key = (api_url,) + tuple(sorted(settings.items()))
+
+    with _BREAKERS_LOCK:
+        if key not in _BREAKERS:
+            _BREAKERS[key] = CircuitBreaker(**settings)
+
+        return _BREAKERS[key]
@@ -0,0 +1,294 @@
+"""Priority-aware scheduling of the requests sharing the capacity of the DSTN API"""
+
+import heapq
+import itertools
+import json
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from .metrics import METRICS
+
+# Default scheduler settings, overridden by the `scheduler` block of the config.
+DEFAULT_SCHEDULER = {
+    "enabled": False,
+    "capacity": 16,
+    "classes": {
+        "interactive": {"share": 0.25, "deadline": 0.5},
+        "bulk": {"share": 0.0, "deadline": 30.0},
+    },
+}
+
+# Class of the lookups made for someone waiting (single lookups, the service).
+INTERACTIVE = "interactive"
+
+# Class of the lookups made for a batch (lists, crawls).
+BULK = "bulk"
+
+# Schedulers already created, keyed by API URL and settings.
+_SCHEDULERS: Dict[Tuple[str, str], "PriorityScheduler"] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+class Waiter:  # pylint: disable=too-few-public-methods
+    """A request waiting for a slot."""
+
+    # Priority class of the request.
+    priority: str
+
+    # When the request should have been sent (`time.monotonic`).
+    deadline: float
+
+    # When the request started waiting (`time.monotonic`).
+    queued_at: float
+
+    # A slot has been given to the request.
+    granted: bool
+
+    # The request stopped waiting before it was given a slot.
+    cancelled: bool
+
+    def __init__(self, priority: str, deadline: float, wake: Callable[[], None]) -> None:
+        """Initialization"""
+
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self.deadline = self.queued_at + deadline
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+class PriorityScheduler:
+    """Slots of the API shared by priority classes, given earliest deadline first.
+
+    At most `capacity` requests are sent at once. Each class keeps `share` of
+    the slots for itself (other classes never take them, even while they are
+    free) and may use any other free slot: bulk lookups soak up the capacity
+    left by the interactive ones, which always find their reserved slots.
+
+    When slots are busy, the waiting request with the earliest deadline (the
+    time it started waiting plus the `deadline` of its class) goes first, so
+    an interactive lookup jumps ahead of every bulk row queued less than
+    the difference of their deadlines earlier, and bulk rows are never starved.
+    """
+
+    # Requests sent at once.
+    capacity: int
+
+    # Settings of each priority class (`share` and `deadline`), the default ones included.
+    classes: Dict[str, Dict[str, float]]
+
+    # Slots kept for each class.
+    reserved: Dict[str, int]
+
+    # Slots in use, by class.
+    running: Dict[str, int]
+
+    # Requests waiting for a slot, by class (heaps by deadline).
+    waiting: Dict[str, List[Tuple[float, int, Waiter]]]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.capacity = max(1, kwargs.get("capacity", DEFAULT_SCHEDULER["capacity"]))
+
+        # Classes of the config are added to the default ones (or override their settings).
+        self.classes = {name: dict(settings)
+                        for name, settings in DEFAULT_SCHEDULER["classes"].items()}
+
+        for name, settings in (kwargs.get("classes", None) or {}).items():
+            self.classes[name] = dict(self.classes.get(name, {}), **settings)
+
+        self.reserved = {name: int(round(settings.get("share", 0.0) * self.capacity))
+                         for name, settings in self.classes.items()}
+
+        if sum(self.reserved.values()) > self.capacity:
+            raise ValueError("The shares of the priority classes add up to more than 1")
+
+        self.running = {name: 0 for name in self.classes}
+        self.waiting = {name: [] for name in self.classes}
+
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+
+    def fits(self, priority: str) -> bool:
+        """Tell if a request of a class may take a slot now (the lock must be held)."""
+
+        free = self.capacity - sum(self.running.values())
+        kept = sum(max(0, self.reserved[name] - self.running[name])
+                   for name in self.classes if name != priority)
+
+        return free > kept
+
+    def dispatch(self) -> None:
+        """Give the free slots to the waiting requests (the lock must be held)."""
+
+        while True:
+            chosen = None
+
+            for name, heap in self.waiting.items():
+                while heap and heap[0][2].cancelled:
+                    heapq.heappop(heap)
+
+                if heap and (chosen is None or heap[0] < chosen) and self.fits(name):
+                    chosen = heap[0]
+
+            if chosen is None:
+                return
+
+            waiter = heapq.heappop(self.waiting[chosen[2].priority])[2]
+            self.running[waiter.priority] += 1
+            waiter.granted = True
+            waiter.wake()
+
+    def enqueue(self, priority: str, deadline: Optional[float],
+                wake: Callable[[], None]) -> Waiter:
+        """Queue a request, giving it a slot right away if it may take one.
+
+        Args:
+            priority (str): priority class of the request.
+            deadline (Optional[float]): seconds the request may wait (the one of its
+                class if None).
+            wake (Callable[[], None]): called once the request has a slot.
+
+        Returns:
+            Waiter: the queued request.
+        """
+
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        if deadline is None:
+            deadline = self.classes[priority].get("deadline", 0.0)
+
+        waiter = Waiter(priority, deadline, wake)
+
+        with self.lock:
+            heapq.heappush(self.waiting[priority], (waiter.deadline, next(self.counter), waiter))
+            self.dispatch()
+
+        return waiter
+
+    @staticmethod
+    def started(waiter: Waiter) -> None:
+        """Count the time a request waited for its slot."""
+
+        now = time.monotonic()
+        METRICS.slot_waited(waiter.priority, now - waiter.queued_at, now > waiter.deadline)
+
+    def acquire(self, priority: str, deadline: Optional[float] = None) -> None:
+        """Block until a request of a class may be sent.
+
+        Args:
+            priority (str): priority class of the request.
+            deadline (Optional[float], optional): seconds the request may wait.
+                Defaults to None (the deadline of its class).
+        """
+
+        granted = threading.Event()
+        waiter = self.enqueue(priority, deadline, granted.set)
+
+        granted.wait()
+        self.started(waiter)
+
+    async def acquire_async(self, priority: str, deadline: Optional[float] = None) -> None:
+        """Wait (without blocking the event loop) until a request of a class may be sent.
+
+        Args:
+            priority (str): priority class of the request.
+            deadline (Optional[float], optional): seconds the request may wait.
+                Defaults to None (the deadline of its class).
+        """
+
+        # Already loaded by the running event loop, not by the sync engine.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self.enqueue(priority, deadline, wake)
+
+        try:
+            await granted
+
+        except asyncio.CancelledError:
+            with self.lock:
+                waiter.cancelled = not waiter.granted
+
+            # Given a slot while being cancelled.
+            if waiter.granted:
+                self.release(priority)
+
+            raise
+
+        self.started(waiter)
+
+    def release(self, priority: str) -> None:
+        """Give back the slot of a request of a class.
+
+        Args:
+            priority (str): priority class of the request.
+        """
+
+        with self.lock:
+            self.running[priority] -= 1
+            self.dispatch()
+
+    @contextmanager
+    def slot(self, priority: str, deadline: Optional[float] = None) -> Iterator[None]:
+        """Hold a slot while the block runs."""
+
+        self.acquire(priority, deadline)
+
+        try:
+            yield
+
+        finally:
+            self.release(priority)
+
+    @asynccontextmanager
+    async def slot_async(self, priority: str,
+                         deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot while the block runs (asyncio)."""
+
+        await self.acquire_async(priority, deadline)
+
+        try:
+            yield
+
+        finally:
+            self.release(priority)
+
+
+def get_scheduler(api_url: str,
+                  scheduler: Optional[Dict[str, Any]] = None) -> Optional[PriorityScheduler]:
+    """Get the scheduler shared by every request sent to `api_url`.
+
+    Args:
+        api_url (str): API URL.
+        scheduler (Optional[Dict[str, Any]], optional): `scheduler` block of the config.
+            Defaults to None.
+
+    Returns:
+        Optional[PriorityScheduler]: the shared scheduler, None if scheduling is disabled.
+    """
+
+    settings = dict(DEFAULT_SCHEDULER)
+
+    if scheduler is not None:
+        settings.update(scheduler)
+
+    if not settings["enabled"]:
+        return None
+
+    key = (api_url, json.dumps(settings, sort_keys=True))
+
+    with _SCHEDULERS_LOCK:
+        if key not in _SCHEDULERS:
+            _SCHEDULERS[key] = PriorityScheduler(**settings)
+
+        return _SCHEDULERS[key]
@@ -0,0 +1,395 @@
+"""HTTP/JSON lookup service, keeping connections and caches warm between lookups"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from aiohttp import web
+from .async_dstn import AsyncDSTNListRequest, AsyncDSTNSingleRequest
+from .base import relabel
+from .dstn import DSTNListItem
+from .exception import HTTPException, NotFoundException
+from .metrics import CONTENT_TYPE, METRICS
+from .scheduler import BULK, INTERACTIVE
+
+# Default server settings, overridden by the `server` block of the config.
+DEFAULT_SERVER = {
+    "host": "127.0.0.1",
+    "port": 8080,
+    "concurrency": 64,
+    "batch_window": 0.002,
+    "batch_size": 256,
+}
+
+# Values of a boolean query parameter (compared lower-cased).
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"", "0", "false", "no", "off"}
+
+
+class MicroBatcher:
+    """Gather the lookups arriving at the same time, and check them together.
+
+    Lookups are held for at most `batch_window` seconds (or until `batch_size`
+    of them are waiting), then duplicates are merged and the distinct rows are
+    checked concurrently through a single, long-lived request engine.
+    """
+
+    # Engine checking the rows (its session is kept open).
+    engine: AsyncDSTNListRequest
+
+    # Seconds a lookup waits for others to join its batch.
+    batch_window: float
+
+    # Lookups flushed at once.
+    batch_size: int
+
+    def __init__(self, engine: AsyncDSTNListRequest, batch_window: float,
+                 batch_size: int) -> None:
+        """Initialization"""
+
+        self.engine = engine
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+
+        self.pending: List[Tuple[Tuple[str, str], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.running: Set[asyncio.Task] = set()
+
+    async def check(self, name: str, degree_id: str) -> Optional[DSTNListItem]:
+        """Check a row, along with the other rows of its batch.
+
+        Args:
+            name (str): student name (or Student ID).
+            degree_id (str): degree ID.
+
+        Returns:
+            Optional[DSTNListItem]: validation result, None if the request failed.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self.pending.append(((name, degree_id), future))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+        elif self.timer is None:
+            self.timer = loop.call_later(self.batch_window, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """Start checking the waiting lookups."""
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        batch, self.pending = self.pending, []
+
+        if not batch:
+            return
+
+        try:
+            task = asyncio.ensure_future(self.run(batch))
+
+        except Exception as error:  # pylint: disable=broad-except
+            self.fail(batch, error)
+            return
+
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    @staticmethod
+    def fail(batch: List[Tuple[Tuple[str, str], asyncio.Future]],
+             error: BaseException) -> None:
+        """Answer every lookup of a batch still waiting with an error.
+
+        Args:
+            batch (List[Tuple[Tuple[str, str], asyncio.Future]]): rows and their waiters.
+            error (BaseException): the error raised to the waiters.
+        """
+
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def run(self, batch: List[Tuple[Tuple[str, str], asyncio.Future]]) -> None:
+        """Check a batch, each distinct (normalized) row once.
+
+        Args:
+            batch (List[Tuple[Tuple[str, str], asyncio.Future]]): rows and their waiters.
+        """
+
+        checked = OrderedDict()
+        tasks = []
+
+        try:
+            for row, future in batch:
+                try:
+                    tasks.append((row, future, self.engine.lookup(row, checked)))
+
+                # A row which cannot be checked only fails its own lookup.
+                except Exception as error:  # pylint: disable=broad-except
+                    future.set_exception(error)
+
+            if checked:
+                await asyncio.wait(list(checked.values()))
+
+            for row, future, task in tasks:
+                METRICS.row_checked()
+
+                if future.done():
+                    continue
+
+                if task.exception() is not None:
+                    future.set_exception(task.exception())
+
+                else:
+                    future.set_result(relabel(row, task.result()))
+
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+
+            raise
+
+        # Never leave a client of the batch waiting.
+        except Exception as error:  # pylint: disable=broad-except
+            self.fail(batch, error)
+
+
+# Application keys (single lookups and lists of rows are batched apart, by priority).
+BATCHER_KEY = web.AppKey("batcher", MicroBatcher)
+BULK_BATCHER_KEY = web.AppKey("bulk_batcher", MicroBatcher)
+CONFIG_KEY = web.AppKey("config", dict)
+
+
+def list_item_json(record: Optional[DSTNListItem], name: str, degree_id: str) -> Dict[str, Any]:
+    """JSON result of a check.
+
+    Args:
+        record (Optional[DSTNListItem]): validation result, None if the request failed.
+        name (str): student name, as asked.
+        degree_id (str): degree ID, as asked.
+
+    Returns:
+        Dict[str, Any]: `name`, `degree_id` and `status` (None if the request failed).
+    """
+
+    if record is None:
+        return {"name": name, "degree_id": degree_id, "status": None}
+
+    return record.asdict()
+
+
+async def handle_health(_: web.Request) -> web.Response:
+    """GET /health"""
+
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(_: web.Request) -> web.Response:
+    """GET /metrics : metrics of the service, in the Prometheus text format."""
+
+    return web.Response(body=METRICS.render().encode("utf8"),
+                        headers={"Content-Type": CONTENT_TYPE})
+
+
+async def handle_check(request: web.Request) -> web.Response:
+    """GET /check?name=...&degree_id=... : check a single row."""
+
+    name = request.query.get("name", None)
+    degree_id = request.query.get("degree_id", None)
+
+    if not name or not degree_id:
+        return web.json_response({"error": "name and degree_id are required"}, status=400)
+
+    record = await request.app[BATCHER_KEY].check(name, degree_id)
+
+    return web.json_response(list_item_json(record, name, degree_id),
+                             status=200 if record is not None else 502)
+
+
+def parse_rows(body: Any) -> List[Tuple[str, str]]:
+    """Rows of a batch, as sent to `POST /check`.
+
+    Args:
+        body (Any): decoded request body.
+
+    Raises:
+        ValueError: the body is not a list of `[name, degree_id]` (or objects) of strings.
+
+    Returns:
+        List[Tuple[str, str]]: the rows.
+    """
+
+    if not isinstance(body, list):
+        raise ValueError("expected a list")
+
+    rows = []
+
+    for row in body:
+        if isinstance(row, dict):
+            row = (row.get("name", None), row.get("degree_id", None))
+
+        if not isinstance(row, (list, tuple)) or len(row) != 2 \
+                or not all(isinstance(value, str) for value in row):
+            raise ValueError(f"invalid row: {row!r}")
+
+        rows.append(tuple(row))
+
+    return rows
+
+
+async def handle_check_batch(request: web.Request) -> web.Response:
+    """POST /check : check a list of rows (`[[name, degree_id], ...]` or objects)."""
+
+    try:
+        rows = parse_rows(await request.json())
+
+    except ValueError:
+        return web.json_response({"error": "expected a list of [name, degree_id]"}, status=400)
+
+    batcher = request.app[BULK_BATCHER_KEY]
+    records = await asyncio.gather(*(batcher.check(*row) for row in rows),
+                                   return_exceptions=True)
+
+    # A row whose check failed is answered as a failed request.
+    records = [None if isinstance(record, BaseException) else record for record in records]
+
+    return web.json_response({
+        "results": [list_item_json(record, *row) for record, row in zip(records, rows)]
+    })
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    """Value of a boolean query parameter.
+
+    Args:
+        value (Optional[str]): value of the parameter, None if it is missing.
+
+    Raises:
+        ValueError: the value is neither true (`1`, `true`, `yes`, `on`) nor false
+            (`0`, `false`, `no`, `off` or empty), whatever its case.
+
+    Returns:
+        bool: the value, False if the parameter is missing.
+    """
+
+    value = (value or "").lower()
+
+    if value in TRUE_VALUES:
+        return True
+
+    if value in FALSE_VALUES:
+        return False
+
+    raise ValueError(f"invalid boolean: {value!r}")
+
+
+async def handle_lookup(request: web.Request) -> web.Response:
+    """GET /lookup?name=...&degree_id=...[&all_pages=1] : get the records of a student."""
+
+    name = request.query.get("name", None)
+    degree_id = request.query.get("degree_id", None)
+
+    if not name or not degree_id:
+        return web.json_response({"error": "name and degree_id are required"}, status=400)
+
+    try:
+        all_pages = parse_flag(request.query.get("all_pages", None))
+
+    except ValueError:
+        return web.json_response({"error": "all_pages must be true or false"}, status=400)
+
+    engine = request.app[BATCHER_KEY].engine
+
+    # Shares the connections, the concurrency limit and the lookups in flight.
+    req = AsyncDSTNSingleRequest(
+        student_name=name, degree_id=degree_id,
+        all_pages=all_pages,
+        session=engine.session, semaphore=engine.semaphore, flights=engine.flights,
+        **request.app[CONFIG_KEY])
+
+    record_list = []
+
+    try:
+        async for offset, rows in req.iter_pages():
+            record_list.extend(enumerate(rows, start=offset))
+
+    except NotFoundException:
+        pass
+
+    except HTTPException as http_error_handler:
+        return web.json_response({"error": str(http_error_handler)}, status=502)
+
+    records = [record for _, record in sorted(record_list, key=lambda row: row[0])]
+
+    return web.json_response({"total": len(records), "records": records})
+
+
+def create_app(config: Dict[str, Any]) -> web.Application:
+    """Create the lookup service.
+
+    Args:
+        config (Dict[str, Any]): config dictionary - retrieved from json/yaml.
+
+    Returns:
+        web.Application: the service, opening its upstream session on startup.
+    """
+
+    settings = dict(DEFAULT_SERVER)
+    settings.update(config.get("server", None) or {})
+
+    config = {key: value for key, value in config.items() if key != "server"}
+    config["concurrency"] = settings["concurrency"]
+
+    engine = AsyncDSTNListRequest(priority=INTERACTIVE, **config)
+
+    # Scheduled by priority, the rows of a list get their own concurrency limit,
+    # otherwise they could hold every permit the single lookups wait for.
+    bulk_engine = AsyncDSTNListRequest(
+        priority=BULK, flights=engine.flights,
+        semaphore=engine.semaphore if engine.scheduler is None else None, **config)
+
+    app = web.Application()
+    app[CONFIG_KEY] = config
+    app[BATCHER_KEY] = MicroBatcher(engine, settings["batch_window"], settings["batch_size"])
+    app[BULK_BATCHER_KEY] = MicroBatcher(bulk_engine, settings["batch_window"],
+                                         settings["batch_size"])
+
+    async def open_engine(_: web.Application) -> None:
+        await engine.open()
+        bulk_engine.session = engine.session
+
+    async def close_engine(_: web.Application) -> None:
+        await engine.close()
+
+    app.on_startup.append(open_engine)
+    app.on_cleanup.append(close_engine)
+
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/check", handle_check)
+    app.router.add_post("/check", handle_check_batch)
+    app.router.add_get("/lookup", handle_lookup)
+
+    return app
+
+
+def serve(config: Dict[str, Any], host: Optional[str] = None,
+          port: Optional[int] = None) -> None:
+    """Run the lookup service until interrupted.
+
+    Args:
+        config (Dict[str, Any]): config dictionary - retrieved from json/yaml.
+        host (Optional[str], optional): address to listen on (`server.host` by default).
+        port (Optional[int], optional): port to listen on (`server.port` by default).
+    """
+
+    settings = dict(DEFAULT_SERVER)
+    settings.update(config.get("server", None) or {})
+
+    web.run_app(create_app(config), host=host or settings["host"],
+                port=port or settings["port"])
@@ -0,0 +1,145 @@
+"""Pooled HTTP session shared between DSTN requests"""
+
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+# requests is only imported when a session is created (it makes up most of the startup time).
+if TYPE_CHECKING:
+    import requests as rq
+
+# Default connection settings, overridden by the `connection` block of the config.
+DEFAULT_CONNECTION = {
+    "pool_connections": 4,
+    "pool_maxsize": 16,
+    "pool_block": False,
+    "keep_alive": True,
+    "prewarm": 0,
+    "timeout": 60,
+}
+
+# Sessions already created, keyed by their connection settings.
+_SESSIONS: Dict[Tuple[Any, ...], rq.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def connection_settings(connection: Optional[Dict[str, Any]] = None,
+                        workers: int = 1) -> Dict[str, Any]:
+    """Merge the connection block of a config with the default settings.
+
+    Args:
+        connection (Optional[Dict[str, Any]], optional): `connection` block of the config.
+            Defaults to None.
+        workers (int, optional): threads sharing the pool, each one keeping a connection.
+            Defaults to 1.
+
+    Returns:
+        Dict[str, Any]: full connection settings.
+    """
+
+    settings = dict(DEFAULT_CONNECTION)
+
+    if connection is not None:
+        settings.update(connection)
+
+    settings["pool_maxsize"] = max(settings["pool_maxsize"], workers)
+
+    return settings
+
+
+def create_session(**kwargs) -> rq.Session:
+    """Create a new keep-alive session with a bounded connection pool.
+
+    Returns:
+        rq.Session: the configured session.
+    """
+
+    import requests as rq  # pylint: disable=import-outside-toplevel
+
+    settings = connection_settings(kwargs)
+
+    session = rq.Session()
+
+    adapter = rq.adapters.HTTPAdapter(
+        pool_connections=settings["pool_connections"],
+        pool_maxsize=settings["pool_maxsize"],
+        pool_block=settings["pool_block"],
+    )
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # Ask the server to close the socket after every request.
+    if not settings["keep_alive"]:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def prewarm_session(session: rq.Session, url: str, count: int, timeout: float) -> None:
+    """Open `count` connections to `url` concurrently so they sit in the pool.
+
+    Failures are ignored, the first real request will open its own connection anyway.
+
+    Args:
+        session (rq.Session): session to warm up.
+        url (str): URL to connect to.
+        count (int): number of connections to open.
+        timeout (float): timeout of each warm-up request.
+    """
+
+    import requests as rq  # pylint: disable=import-outside-toplevel
+
+    def warm_up(_) -> None:
+        try:
+            session.head(url, timeout=timeout)
+
+        except rq.exceptions.RequestException:
+            pass
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        list(executor.map(warm_up, range(count)))
+
+
+def get_session(api_url: Optional[str] = None,
+                connection: Optional[Dict[str, Any]] = None) -> rq.Session:
+    """Get the session shared by every request using the same connection settings.
+
+    The session is created (and pre-warmed, if required) on the first call. Pre-warming
+    happens once the session is shared, so other callers are not kept waiting for it.
+
+    Args:
+        api_url (Optional[str], optional): API URL, used for pre-warming. Defaults to None.
+        connection (Optional[Dict[str, Any]], optional): `connection` block of the config.
+            Defaults to None.
+
+    Returns:
+        rq.Session: the shared session.
+    """
+
+    settings = connection_settings(connection)
+    key = tuple(sorted(settings.items()))
+
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key, None)
+        created = session is None
+
+        if created:
+            session = create_session(**settings)
+            _SESSIONS[key] = session
+
+    if created and api_url is not None and settings["prewarm"] > 0:
+        prewarm_session(session, api_url, settings["prewarm"], settings["timeout"])
+
+    return session
+
+
+def close_sessions() -> None:
+    """Close every shared session and release their connections."""
+
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+
+        _SESSIONS.clear()
@@ -0,0 +1,154 @@
+"""Deterministic sharding of multiple-mode batches, and merging of the shard outputs"""
+
+import csv
+import json
+from collections import defaultdict, deque
+from hashlib import blake2b
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from .item import DSTNListItem
+from .utils import normalize_row
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a `i/N` shard (1-based).
+
+    Args:
+        shard (str): the shard, e.g. `2/4` for the second of four shards.
+
+    Returns:
+        Tuple[int, int]: index (0-based) and number of shards.
+
+    Raises:
+        ValueError: not a `i/N` shard, with 1 <= i <= N.
+    """
+
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+
+    except ValueError as value_error:
+        raise ValueError(f"Shard must be written i/N, got {shard!r}") from value_error
+
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+
+    return index - 1, count
+
+
+def shard_of(row: Tuple[str, ...], count: int) -> int:
+    """Shard of a row.
+
+    The hash is taken over the normalized row, so it is the same on every machine
+    and every run (unlike `hash()`), and duplicate spellings of a query share a shard.
+
+    Args:
+        row (Tuple[str, ...]): row of the .csv file.
+        count (int): number of shards.
+
+    Returns:
+        int: index (0-based) of the shard.
+    """
+
+    key = "\x1f".join(normalize_row(row)).encode("utf8")
+
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "big") % count
+
+
+def shard_rows(student_list: Iterable[Tuple[str, ...]], index: int,
+               count: int) -> Iterator[Tuple[str, ...]]:
+    """Keep the rows of a shard, in input order.
+
+    Args:
+        student_list (Iterable[Tuple[str, ...]]): rows of the .csv file.
+        index (int): index (0-based) of the shard.
+        count (int): number of shards.
+
+    Yields:
+        Tuple[str, ...]: rows of the shard.
+    """
+
+    for row in student_list:
+        if shard_of(row, count) == index:
+            yield row
+
+
+def iter_list_records(input_handler: TextIO, export_format: str) -> Iterator[DSTNListItem]:
+    """Read back multiple-mode results written in a format.
+
+    Args:
+        input_handler (TextIO): the results file.
+        export_format (str): format it was written in (table, jsonl, csv or tsv).
+
+    Yields:
+        DSTNListItem: each result, in file order.
+    """
+
+    if export_format == "jsonl":
+        for line in input_handler:
+            if line.strip():
+                yield DSTNListItem(**json.loads(line))
+
+    elif export_format == "table":
+        # `Name,Degree ID,Status` lines, names may hold commas.
+        next(input_handler, None)
+
+        for line in input_handler:
+            name, degree_id, status = line.rstrip("\n").rsplit(",", 2)
+            yield DSTNListItem(name=name, degree_id=degree_id, status=status == "VALID")
+
+    else:
+        reader = csv.DictReader(input_handler, delimiter="\t" if export_format == "tsv" else ",")
+
+        for row in reader:
+            yield DSTNListItem(name=row["name"], degree_id=row["degree_id"],
+                               status=row["status"] == "VALID")
+
+
+def merge_shards(student_list: Iterable[Tuple[str, ...]],
+                 shard_records: List[Iterable[DSTNListItem]],
+                 missing: Optional[List[Tuple[str, ...]]] = None) -> Iterator[DSTNListItem]:
+    """Put the results of every shard back into input order.
+
+    Results are matched to the rows by query (the normalized name and degree ID),
+    not by position: shards may write their results in any order (`--unordered`,
+    `--resume`, failed rows retried at the end), and the shard outputs may be
+    given in any order too. Each row keeps its own name and degree ID.
+
+    Rows without a result (added to the retry file by their shard, or of a shard
+    which did not complete) are left out, and added to `missing`.
+
+    Args:
+        student_list (Iterable[Tuple[str, ...]]): rows of the (whole) .csv file.
+        shard_records (List[Iterable[DSTNListItem]]): results of each shard.
+        missing (Optional[List[Tuple[str, ...]]], optional): gets the rows without a
+            result. Defaults to None.
+
+    Yields:
+        DSTNListItem: the result of each row, in input order.
+
+    Raises:
+        ValueError: results are left which are not of the rows of the file.
+    """
+
+    queues: Dict[Tuple[Optional[str], Optional[str]], Deque[DSTNListItem]] = defaultdict(deque)
+
+    for records in shard_records:
+        for record in records:
+            record_dict = record.asdict()
+            queues[normalize_row((record_dict["name"], record_dict["degree_id"]))].append(record)
+
+    for row in student_list:
+        queue = queues.get(normalize_row(row), None)
+
+        if not queue:
+            if missing is not None:
+                missing.append(row)
+
+            continue
+
+        yield queue.popleft().relabel(*row[:2])
+
+    for queue in queues.values():
+        if queue:
+            record_dict = queue[0].asdict()
+            raise ValueError(f"Result of {record_dict['name']}/{record_dict['degree_id']} "
+                             "is not of a row of the file, were the shards run on this file?")
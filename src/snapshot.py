@@ -0,0 +1,223 @@
+"""Offline snapshot of DSTN records, answering lookups without the API"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .metrics import METRICS
+from .utils import normalize_degree_id, normalize_name
+
+# Default snapshot settings, overridden by the `snapshot` block of the config.
+DEFAULT_SNAPSHOT = {
+    "enabled": False,
+    "path": ".dstn_snapshot.sqlite3",
+}
+
+# Records written per transaction while building a snapshot.
+BATCH_SIZE = 10000
+
+# Snapshots already opened, keyed by settings.
+_SNAPSHOTS: Dict[Tuple[Any, ...], "SnapshotStore"] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def iter_json_records(filename: str) -> Iterator[Dict[str, Any]]:
+    """Read the DSTN records saved in a .json/.jsonl file.
+
+    The file may hold a raw API response (`{"total": ..., "rows": [...]}`), a
+    single record, a list of them, or one of those per line (JSON Lines).
+
+    Args:
+        filename (str): path to the file.
+
+    Yields:
+        Dict[str, Any]: DSTN records (as returned by the API).
+    """
+
+    def unpack(data: Any) -> Iterator[Dict[str, Any]]:
+        if isinstance(data, list):
+            for item in data:
+                yield from unpack(item)
+
+        elif isinstance(data, dict) and "rows" in data:
+            yield from unpack(data["rows"])
+
+        elif isinstance(data, dict) and "masv" in data:
+            yield {key: value for key, value in data.items() if key != "language"}
+
+    with open(filename, "r", encoding="utf8") as json_handler:
+        try:
+            yield from unpack(json.load(json_handler))
+            return
+
+        except json.JSONDecodeError:
+            json_handler.seek(0)
+
+        for line in json_handler:
+            if line.strip():
+                yield from unpack(json.loads(line))
+
+
+class SnapshotStore:
+    """DSTN records stored in SQLite, indexed on `masv`, `sobang` and normalized `hoten`.
+
+    A lookup is answered from the snapshot only when it has a matching record:
+    a miss does not mean the degree is invalid, only that it has to be asked
+    to the API.
+    """
+
+    # Snapshot settings (see `DEFAULT_SNAPSHOT`).
+    settings: Dict[str, Any]
+
+    def __init__(self, **kwargs) -> None:
+        """Initialization"""
+
+        self.settings = dict(DEFAULT_SNAPSHOT)
+        self.settings.update(kwargs)
+
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(self.settings["path"], check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "masv TEXT NOT NULL, sobang TEXT NOT NULL, hoten TEXT NOT NULL, "
+            "body TEXT NOT NULL, PRIMARY KEY (masv, sobang))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS records_sobang ON records (sobang, hoten)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS records_hoten ON records (hoten)")
+        self.connection.commit()
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add (or replace) records.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): DSTN records (as returned by the API).
+
+        Returns:
+            int: number of records added.
+        """
+
+        count = 0
+        batch = []
+
+        for record in records:
+            batch.append((
+                normalize_name(str(record.get("masv", ""))),
+                normalize_degree_id(str(record.get("sobang", ""))),
+                normalize_name(str(record.get("hoten", ""))),
+                json.dumps(record, ensure_ascii=False),
+            ))
+
+            if len(batch) >= BATCH_SIZE:
+                count += self.write(batch)
+                batch = []
+
+        return count + self.write(batch)
+
+    def write(self, batch: List[Tuple[str, str, str, str]]) -> int:
+        """Write a batch of rows in a single transaction.
+
+        Args:
+            batch (List[Tuple[str, str, str, str]]): rows of the `records` table.
+
+        Returns:
+            int: number of rows written.
+        """
+
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", batch)
+            self.connection.commit()
+
+        return len(batch)
+
+    def find(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer a query from the snapshot.
+
+        `masv` matches either the Student ID or the name of a record, the same
+        way the API does. Records are sorted by Student ID, in the `sord` order,
+        so that the pages of a result never overlap.
+
+        Args:
+            params (Dict[str, Any]): query parameters.
+
+        Returns:
+            Optional[Dict[str, Any]]: response, as the API would send it. None on a miss.
+        """
+
+        name = normalize_name(params.get("masv", None))
+        degree_id = normalize_degree_id(params.get("sobang", None))
+
+        if not name or not degree_id:
+            return None
+
+        order = "ASC" if str(params.get("sord", None)).lower() == "asc" else "DESC"
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT body FROM records WHERE sobang = ? AND (masv = ? OR hoten = ?) "
+                f"ORDER BY masv {order}",
+                (degree_id, name, name),
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        METRICS.snapshot_hit()
+        per_page = int(params.get("rows", None) or len(rows))
+        start = (int(params.get("page", None) or 1) - 1) * per_page
+
+        return {
+            "total": len(rows),
+            "rows": [json.loads(body) for (body,) in rows[start:start + per_page]],
+        }
+
+    def count(self) -> int:
+        """Number of records in the snapshot.
+
+        Returns:
+            int: number of records.
+        """
+
+        with self.lock:
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM records").fetchone()
+
+        return count
+
+    def close(self) -> None:
+        """Close the database."""
+
+        with self.lock:
+            self.connection.close()
+
+
+def get_snapshot(snapshot: Optional[Dict[str, Any]] = None) -> Optional[SnapshotStore]:
+    """Get the snapshot shared by every request using the same snapshot settings.
+
+    Args:
+        snapshot (Optional[Dict[str, Any]], optional): `snapshot` block of the config.
+            Defaults to None.
+
+    Returns:
+        Optional[SnapshotStore]: the shared snapshot, None if disabled.
+    """
+
+    settings = dict(DEFAULT_SNAPSHOT)
+
+    if snapshot is not None:
+        settings.update(snapshot)
+
+    if not settings["enabled"]:
+        return None
+
+    key = tuple(sorted(settings.items()))
+
+    with _SNAPSHOTS_LOCK:
+        if key not in _SNAPSHOTS:
+            _SNAPSHOTS[key] = SnapshotStore(**settings)
+
+        return _SNAPSHOTS[key]
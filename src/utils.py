@@ -6,26 +6,43 @@ Author(s):
 
 import json
 import csv
-from typing import Dict, List, Tuple
+import marshal
+import os
+import struct
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
-import yaml
 
 # Terminal colors
 OKGREEN = '\033[92m'
 FAIL = '\033[91m'
 ENDC = '\033[0m'
 
-def load_config(filename: str) -> Dict[str, str]:
-    """Load config from supported config type (.json/.yaml)
+# Strip combining diacritics (after NFD decomposition) and the Vietnamese "đ".
+DIACRITICS_TABLE = {code: None for code in range(0x0300, 0x0370)}
+DIACRITICS_TABLE.update({ord("đ"): "d", ord("Đ"): "D"})
+
+# Distinct inputs whose normalized form is remembered.
+NORMALIZE_CACHE_SIZE = 1 << 16
+
+# Parsed configs are kept next to their file, as compiled modules are.
+CONFIG_CACHE_DIRECTORY = "__pycache__"
+
+# Header of a parsed config: format, then modification time (ns) and size of its file.
+CONFIG_CACHE_MAGIC = b"DSC1"
+CONFIG_CACHE_HEADER = struct.Struct("<4sqq")
+
+
+def parse_config(filename: str) -> Dict[str, str]:
+    """Parse a config file (.json/.yaml)
 
     Args:
         filename (str): path to the config file.
 
     Returns:
         Dict[str, str]: config loaded in Dictionary.
-
-    Author(s):
-        - Xuong L. Tran <xuong@trhgquan.xyz>
     """
 
     # Initialize
@@ -34,18 +51,142 @@ def load_config(filename: str) -> Dict[str, str]:
     # Get config extension for correct parsing.
     config_extension = Path(filename).suffix
 
-    with open(filename, "r+", encoding="utf8") as config_handler:
+    with open(filename, "r", encoding="utf8") as config_handler:
         # Load JSON config.
         if config_extension == ".json":
             config = json.load(config_handler)
 
-        # Load YAML config.
+        # Load YAML config (PyYAML is only imported for those).
         elif config_extension in [".yaml", ".yml"]:
+            import yaml  # pylint: disable=import-outside-toplevel
+
             config = yaml.safe_load(config_handler)
 
     return config
 
 
+def config_cache_path(filename: str) -> str:
+    """Path to the parsed form of a config file.
+
+    Args:
+        filename (str): path to the config file.
+
+    Returns:
+        str: e.g. `configs/__pycache__/config.yaml.cpython-311.bin` for `configs/config.yaml`.
+    """
+
+    directory, name = os.path.split(filename)
+
+    return os.path.join(directory, CONFIG_CACHE_DIRECTORY,
+                        f"{name}.{sys.implementation.cache_tag}.bin")
+
+
+def read_config_cache(path: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+    """Read a parsed config, if it is still up to date with its file.
+
+    Args:
+        path (str): path to the parsed config.
+        stat (os.stat_result): status of the config file.
+
+    Returns:
+        Optional[Dict[str, Any]]: the config, None if missing, stale or unreadable.
+    """
+
+    try:
+        with open(path, "rb") as cache_handler:
+            data = cache_handler.read()
+
+        magic, mtime, size = CONFIG_CACHE_HEADER.unpack_from(data)
+
+        if (magic, mtime, size) != (CONFIG_CACHE_MAGIC, stat.st_mtime_ns, stat.st_size):
+            return None
+
+        return marshal.loads(data[CONFIG_CACHE_HEADER.size:])
+
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        return None
+
+
+def write_config_cache(path: str, stat: os.stat_result, config: Dict[str, Any]) -> None:
+    """Store a parsed config, ignoring failures (read-only directory, unsupported values).
+
+    Args:
+        path (str): path to the parsed config.
+        stat (os.stat_result): status of the config file.
+        config (Dict[str, Any]): the config.
+    """
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        data = CONFIG_CACHE_HEADER.pack(CONFIG_CACHE_MAGIC, stat.st_mtime_ns, stat.st_size) \
+            + marshal.dumps(config)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Written aside then renamed, so that concurrent runs never read half a file.
+        with open(temporary_path, "wb") as cache_handler:
+            cache_handler.write(data)
+
+        os.replace(temporary_path, path)
+
+    except (OSError, ValueError):
+        try:
+            os.remove(temporary_path)
+
+        except OSError:
+            pass
+
+
+def load_config(filename: str, cache: bool = True) -> Dict[str, str]:
+    """Load config from supported config type (.json/.yaml)
+
+    The parsed config is cached in a binary form (see `config_cache_path`), used
+    until the modification time or the size of the file changes.
+
+    Args:
+        filename (str): path to the config file.
+        cache (bool, optional): use (and update) the parsed config. Defaults to True.
+
+    Returns:
+        Dict[str, str]: config loaded in Dictionary.
+
+    Author(s):
+        - Xuong L. Tran <xuong@trhgquan.xyz>
+    """
+
+    if not cache:
+        return parse_config(filename)
+
+    stat = os.stat(filename)
+    path = config_cache_path(filename)
+    config = read_config_cache(path, stat)
+
+    if config is None:
+        config = parse_config(filename)
+        write_config_cache(path, stat, config)
+
+    return config
+
+
+def iter_csv(filename: str) -> Iterator[Tuple[str, ...]]:
+    """Read a CSV file of two columns lazily, one row at a time.
+
+    Args:
+        filename (str): path to the csv file.
+
+    Yields:
+        Tuple[str, ...]: each non-empty row in the csv file.
+    """
+
+    with open(filename, "r", encoding="utf8", newline="") as csv_handler:
+        reader = csv.reader(csv_handler)
+
+        for row in reader:
+            if len(row) > 0:
+                yield tuple(row)
+
+
 def load_csv(filename: str) -> List[Tuple[str, str]]:
     """Load a CSV file of two columns into a list.
 
@@ -59,14 +200,58 @@ def load_csv(filename: str) -> List[Tuple[str, str]]:
         - Xuong L. Tran <xuong@trhgquan.xyz>
     """
 
-    item_list = []
+    return list(iter_csv(filename))
 
-    # Extract item list from file.
-    with open(filename, "r+", encoding="utf8") as csv_handler:
-        reader = csv.reader(csv_handler)
 
-        for row in reader:
-            if len(row) > 0:
-                item_list.append(tuple(row))
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    """Canonical form of a student name (or Student ID).
+
+    Diacritics are stripped, whitespaces collapsed and the case folded, so that
+    "Nguyễn Văn A", "nguyen van a" and "NGUYEN  VAN A" give the same query.
+
+    Args:
+        name (Optional[str]): student name, as written by the user.
+
+    Returns:
+        Optional[str]: normalized name.
+    """
+
+    if name is None:
+        return None
+
+    name = unicodedata.normalize("NFD", name).translate(DIACRITICS_TABLE)
+
+    return " ".join(name.split()).casefold()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_degree_id(degree_id: Optional[str]) -> Optional[str]:
+    """Canonical form of a degree ID: compatibility characters folded, no whitespace, uppercased.
+
+    Args:
+        degree_id (Optional[str]): degree ID, as written by the user.
+
+    Returns:
+        Optional[str]: normalized degree ID.
+    """
+
+    if degree_id is None:
+        return None
+
+    degree_id = unicodedata.normalize("NFKC", degree_id)
+
+    return "".join(degree_id.split()).upper()
+
+
+def normalize_row(row: Tuple[str, ...]) -> Tuple[Optional[str], Optional[str]]:
+    """Canonical form of a (name, degree ID) row.
+
+    Args:
+        row (Tuple[str, ...]): row of the .csv file.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: normalized name and degree ID.
+    """
 
-    return item_list
+    return normalize_name(row[0]), normalize_degree_id(row[1])
@@ -0,0 +1,105 @@
+"""A fake session to answer DSTN requests without the network."""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class FakeResponse:
+    """Minimal stand-in for `requests.Response`."""
+
+    # HTTP status code.
+    status_code: int
+
+    # Raw body of the response.
+    content: bytes
+
+    def __init__(self, status_code: int = 200, body: Optional[Dict[str, Any]] = None,
+                 content: Optional[bytes] = None) -> None:
+        """Initialization
+
+        Args:
+            status_code (int, optional): HTTP status code. Defaults to 200.
+            body (Optional[Dict[str, Any]], optional): body, encoded as JSON. Defaults to None.
+            content (Optional[bytes], optional): raw body, already encoded (instead of
+                `body`). Defaults to None.
+        """
+
+        self.status_code = status_code
+
+        if content is None:
+            content = json.dumps(body if body is not None else {}).encode("utf8")
+
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        """Body of the response, decoded.
+
+        Returns:
+            str: decoded body.
+        """
+
+        return self.content.decode("utf8")
+
+    def json(self) -> Any:
+        """Decode the body of the response.
+
+        Returns:
+            Any: decoded JSON.
+        """
+
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """Answer DSTN queries from a set of known (masv, sobang) pairs."""
+
+    # Pairs considered valid.
+    valid: Set[Tuple[str, str]]
+
+    # Pairs answered with an HTTP error, mapped to the status code.
+    errors: Dict[Tuple[str, str], int]
+
+    # Parameters of every request received.
+    calls: List[Dict[str, str]]
+
+    def __init__(self, valid: Optional[Set[Tuple[str, str]]] = None,
+                 errors: Optional[Dict[Tuple[str, str], int]] = None) -> None:
+        """Initialization"""
+
+        self.valid = valid or set()
+        self.errors = errors or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url: str, params: Dict[str, str], **kwargs) -> FakeResponse:
+        """Answer a GET request.
+
+        Returns:
+            FakeResponse: the response.
+        """
+
+        _ = url, kwargs
+
+        with self.lock:
+            self.calls.append(dict(params))
+
+        key = (params["masv"], params["sobang"])
+
+        if key in self.errors:
+            return FakeResponse(self.errors[key])
+
+        rows = [{"masv": key[0], "sobang": key[1]}] if key in self.valid else []
+
+        return FakeResponse(body={"total": len(rows), "rows": rows})
+
+
+class TransientSession(FakeSession):  # pylint: disable=too-few-public-methods
+    """Answer the erroneous pairs with their HTTP error only the first time."""
+
+    def get(self, url, params, **kwargs) -> FakeResponse:
+        response = super().get(url, params, **kwargs)
+        self.errors.pop((params["masv"], params["sobang"]), None)
+
+        return response
@@ -0,0 +1,76 @@
+"""Test for the asyncio request engine"""
+
+from unittest import IsolatedAsyncioTestCase
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.async_dstn import AsyncDSTNListRequest, AsyncDSTNSingleRequest
+
+
+class TestAsyncDSTNRequest(IsolatedAsyncioTestCase):
+    """Test the asyncio request classes against a local server"""
+
+    async def asyncSetUp(self) -> None:
+        self.student_list = [(f"student {i}", f"QH{i:06}") for i in range(30)]
+        self.valid = set(self.student_list[::2])
+
+        # Records of a Student ID with many degrees, sent a page at a time.
+        self.many = [{"masv": "20120001", "sobang": f"QH{i:06}"} for i in range(45)]
+
+        async def handler(request: web.Request) -> web.Response:
+            key = (request.query["masv"], request.query["sobang"])
+            rows = [{"masv": key[0], "sobang": key[1]}] if key in self.valid else []
+
+            if key[0] == "20120001":
+                size, page = int(request.query["rows"]), int(request.query["page"])
+                return web.json_response({"total": len(self.many),
+                                          "rows": self.many[(page - 1) * size:page * size]})
+
+            return web.json_response({"total": len(rows), "rows": rows})
+
+        app = web.Application()
+        app.router.add_get("/dstn", handler)
+
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        self.config = {
+            "api_url": str(self.server.make_url("/dstn")),
+            "headers": {},
+            "results": {"rows": 10, "page": 1, "sord": "desc"},
+        }
+
+    async def asyncTearDown(self) -> None:
+        await self.server.close()
+
+    async def test_list_request(self) -> None:
+        """Test if every row is checked in input order"""
+
+        req = AsyncDSTNListRequest(student_list=self.student_list, concurrency=5, **self.config)
+        records = [record.asdict() for record in await req.process()]
+
+        self.assertEqual([(r["name"], r["degree_id"]) for r in records], self.student_list)
+        self.assertEqual([r["status"] for r in records],
+                         [row in self.valid for row in self.student_list])
+
+    async def test_single_request(self) -> None:
+        """Test if a single lookup returns its records"""
+
+        name, degree_id = self.student_list[0]
+
+        req = AsyncDSTNSingleRequest(student_name=name, degree_id=degree_id, **self.config)
+        record_list = await req.process()
+
+        self.assertEqual(len(record_list), 1)
+        self.assertEqual(record_list[0].get_info()["masv"], name)
+
+    async def test_single_request_all_pages(self) -> None:
+        """Test if every page of a result is fetched, in result order"""
+
+        config = dict(self.config, results={"rows": 10, "page": 1, "sord": "desc", "max_rows": 20})
+
+        req = AsyncDSTNSingleRequest(student_name="20120001", degree_id="QH000000",
+                                     all_pages=True, concurrency=4, **config)
+        record_list = await req.process()
+
+        self.assertEqual([record.get_info()["sobang"] for record in record_list],
+                         [record["sobang"] for record in self.many])
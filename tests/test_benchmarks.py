@@ -0,0 +1,32 @@
+"""Test for the micro-benchmark suite"""
+
+import tempfile
+from unittest import TestCase
+from benchmarks.suite import BENCHMARKS, compare, run_suite
+
+
+class TestBenchmarks(TestCase):
+    """Test run_suite/compare on tiny inputs"""
+
+    def test_run(self) -> None:
+        """Test if every benchmark runs and reports its timings"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_suite(directory, scale=0.001, repeat=1)
+
+        self.assertEqual(list(results["benchmarks"]), list(BENCHMARKS))
+
+        for result in results["benchmarks"].values():
+            self.assertGreater(result["ops"], 0)
+            self.assertGreater(result["ns_per_op"], 0)
+
+    def test_compare(self) -> None:
+        """Test if only slowdowns beyond the tolerance are regressions"""
+
+        baseline = {"benchmarks": {"a": {"ns_per_op": 100.0}, "b": {"ns_per_op": 100.0}}}
+        results = {"benchmarks": {"a": {"ns_per_op": 120.0}, "b": {"ns_per_op": 150.0},
+                                  "c": {"ns_per_op": 1.0}}}
+
+        self.assertEqual(compare(results, baseline, tolerance=0.3),
+                         [("a", 120.0, 1.2, False), ("b", 150.0, 1.5, True),
+                          ("c", 1.0, None, False)])
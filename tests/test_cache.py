@@ -0,0 +1,111 @@
+"""Test for the result cache"""
+
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import TestCase
+from src.cache import ResultCache
+from src.dstn import DSTNListRequest
+from .factory.session_factory import FakeSession
+
+
+class TestResultCache(TestCase):
+    """Test the SQLite result cache"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite3")
+        self.params = {"masv": "a", "sobang": "1", "rows": 10, "page": 1, "sord": "desc"}
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_hit(self) -> None:
+        """Test if a saved response is returned for the same query only"""
+
+        cache = ResultCache(path=self.path)
+        cache.put(self.params, '{"total": 1}', True)
+
+        self.assertEqual(cache.get(self.params), '{"total": 1}')
+        self.assertIsNone(cache.get(dict(self.params, page=2)))
+
+        cache.close()
+
+    def test_ttl(self) -> None:
+        """Test if not found results expire with their own TTL"""
+
+        cache = ResultCache(path=self.path, negative_ttl=-1)
+
+        cache.put(self.params, '{"total": 0}', False)
+        self.assertIsNone(cache.get(self.params))
+
+        cache.put(self.params, '{"total": 1}', True)
+        self.assertIsNotNone(cache.get(self.params))
+
+        cache.close()
+
+    def test_eviction(self) -> None:
+        """Test if the least recently used results are evicted beyond the maximum"""
+
+        cache = ResultCache(path=self.path, max_entries=2)
+
+        for page in range(3):
+            cache.put(dict(self.params, page=page), "{}", True)
+
+        cache.evict()
+
+        self.assertIsNone(cache.get(dict(self.params, page=0)))
+        self.assertIsNotNone(cache.get(dict(self.params, page=2)))
+
+        # A hit makes a result recently used.
+        self.assertIsNotNone(cache.get(dict(self.params, page=1)))
+        cache.put(dict(self.params, page=3), "{}", True)
+        cache.evict()
+
+        self.assertIsNotNone(cache.get(dict(self.params, page=1)))
+        self.assertIsNone(cache.get(dict(self.params, page=2)))
+
+        cache.close()
+
+    def test_deferred_access(self) -> None:
+        """Test if hits do not write to the database until the next write"""
+
+        def accessed_at() -> float:
+            with closing(sqlite3.connect(self.path)) as connection:
+                return connection.execute("SELECT accessed_at FROM results").fetchone()[0]
+
+        cache = ResultCache(path=self.path)
+        cache.put(self.params, "{}", True)
+        saved = accessed_at()
+
+        self.assertIsNotNone(cache.get(self.params))
+        self.assertEqual(accessed_at(), saved)
+
+        cache.close()
+        self.assertGreater(accessed_at(), saved)
+
+    def test_request_uses_cache(self) -> None:
+        """Test if a second run over the same rows does not reach the API"""
+
+        student_list = [("a", "1"), ("b", "2")]
+        session = FakeSession(valid={("a", "1")})
+
+        def process(**cache):
+            req = DSTNListRequest(
+                api_url="http://localhost/cache",
+                headers={},
+                results={"rows": 10, "page": 1, "sord": "desc"},
+                student_list=student_list,
+                session=session,
+                cache=dict(enabled=True, path=self.path, **cache),
+            )
+
+            return [record.asdict() for record in req.process()]
+
+        first = process()
+        self.assertEqual(process(), first)
+        self.assertEqual(len(session.calls), 2)
+
+        self.assertEqual(process(refresh=True), first)
+        self.assertEqual(len(session.calls), 4)
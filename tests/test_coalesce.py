@@ -0,0 +1,48 @@
+"""Test for the coalescing of lookups in flight"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from src.coalesce import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    """Test SingleFlight"""
+
+    def test_concurrent_calls_share_result(self) -> None:
+        """Test if concurrent callers of the same key share a single call"""
+
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def function():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(flights.call, "key", function) for _ in range(8)]
+
+            # Let every caller join the flight before it lands.
+            time.sleep(0.2)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ["result"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.flights, {})
+
+    def test_error_raised_to_caller(self) -> None:
+        """Test if an exception of the call reaches the caller and clears the flight"""
+
+        flights = SingleFlight()
+
+        def function():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            flights.call("key", function)
+
+        self.assertEqual(flights.flights, {})
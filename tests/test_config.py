@@ -0,0 +1,69 @@
+"""Test for the config loading and its parsed-config cache"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from src.utils import config_cache_path, load_config
+
+# Directory holding the shipped configs.
+CONFIG_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "configs")
+
+
+class TestLoadConfig(TestCase):
+    """Test load_config on copies of the shipped configs"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        for name in ["config.json", "config.yaml"]:
+            shutil.copy(os.path.join(CONFIG_DIRECTORY, name), self.directory)
+
+    def test_cache(self) -> None:
+        """Test if the parsed config is stored, then read back the same"""
+
+        for name in ["config.json", "config.yaml"]:
+            path = os.path.join(self.directory, name)
+            config = load_config(path, cache=False)
+
+            self.assertFalse(os.path.exists(config_cache_path(path)))
+            self.assertEqual(load_config(path), config)
+            self.assertTrue(os.path.exists(config_cache_path(path)))
+            self.assertEqual(load_config(path), config)
+
+        self.assertEqual(load_config(os.path.join(self.directory, "config.json")),
+                         load_config(os.path.join(self.directory, "config.yaml")))
+
+    def test_invalidate(self) -> None:
+        """Test if a modified config file is parsed again"""
+
+        path = os.path.join(self.directory, "config.yaml")
+        load_config(path)
+
+        with open(path, "a", encoding="utf8") as config_handler:
+            config_handler.write("extra: 1\n")
+
+        self.assertEqual(load_config(path)["extra"], 1)
+
+        # A corrupted cache is ignored.
+        with open(config_cache_path(path), "wb") as cache_handler:
+            cache_handler.write(b"garbage")
+
+        self.assertEqual(load_config(path)["extra"], 1)
+
+    def test_lazy_imports(self) -> None:
+        """Test if the CLI starts without the modules only some modes need"""
+
+        code = ("import sys, check; check.load_config(sys.argv[1]); "
+                "print(*sorted({'requests', 'yaml', 'termtables', 'aiohttp', 'asyncio'} "
+                "& set(sys.modules)))")
+
+        output = subprocess.run([sys.executable, "-c", code,
+                                 os.path.join(self.directory, "config.json")],
+                                check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(CONFIG_DIRECTORY)).stdout
+
+        self.assertEqual(output.strip(), "")
@@ -6,7 +6,7 @@ Author(s):
 
 from typing import Dict
 from unittest import TestCase
-from src.dstn import DSTNItem
+from src.dstn import DSTNItem, DSTNListItem
 from .factory.student_factory import StudentFactory
 
 
@@ -126,3 +126,23 @@ class TestDSTNItem(TestCase):
 
         for field in should_appear_fields:
             self.assertIn(self.json[field], str(dstn_item))
+
+    def test_compact(self) -> None:
+        """Test if items have no __dict__ and share the names of their fields"""
+
+        first_item = DSTNItem(json=self.json)
+        second_item = DSTNItem(json=self.factory.create_student())
+
+        self.assertFalse(hasattr(first_item, "__dict__"))
+        self.assertFalse(hasattr(DSTNListItem(name="a", degree_id="1"), "__dict__"))
+        self.assertIs(first_item.fields, second_item.fields)
+
+    def test_layout_order(self) -> None:
+        """Test if the table rows follow the layout of the language"""
+
+        for language in ["vn", "en"]:
+            dstn_item = DSTNItem(json=self.json, language=language)
+
+            self.assertEqual(dstn_item.get_rows(),
+                             [[label, self.json[field]]
+                              for label, field in DSTNItem.LAYOUTS[language]])
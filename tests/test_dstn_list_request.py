@@ -0,0 +1,97 @@
+"""Test for DSTNListRequest"""
+
+from unittest import TestCase
+from src.base import extract_total
+from src.dstn import DSTNListRequest
+from .factory.session_factory import FakeSession
+
+# Config used by every request in this test.
+CONFIG = {
+    "api_url": "http://localhost/dstn",
+    "headers": {},
+    "results": {"rows": 10, "page": 1, "sord": "desc"},
+}
+
+
+class TestDSTNListRequest(TestCase):
+    """Test DSTN List Request"""
+
+    def setUp(self) -> None:
+        self.student_list = [(f"student {i}", f"QH{i:06}") for i in range(50)]
+        self.session = FakeSession(valid=set(self.student_list[::3]))
+
+    def process(self, **kwargs):
+        """Run a DSTNListRequest over the student list with the fake session."""
+
+        req = DSTNListRequest(student_list=self.student_list, session=self.session,
+                              **CONFIG, **kwargs)
+
+        return [record.asdict() for record in req.process()]
+
+    def test_sequential(self) -> None:
+        """Test if every row is checked in input order"""
+
+        records = self.process()
+
+        self.assertEqual([(r["name"], r["degree_id"]) for r in records], self.student_list)
+        self.assertEqual(sum(r["status"] for r in records), len(self.student_list[::3]))
+
+    def test_workers_match_sequential(self) -> None:
+        """Test if the thread pool returns the same results as the sequential path"""
+
+        self.assertEqual(self.process(workers=8), self.process())
+
+    def test_unordered(self) -> None:
+        """Test if unordered results still cover every row"""
+
+        records = self.process(workers=8, ordered=False)
+
+        self.assertCountEqual(records, self.process())
+
+    def test_params_not_shared(self) -> None:
+        """Test if each lookup carries its own parameters"""
+
+        self.process(workers=8)
+
+        self.assertCountEqual([(c["masv"], c["sobang"]) for c in self.session.calls],
+                              self.student_list)
+
+    def test_duplicates_coalesced(self) -> None:
+        """Test if duplicate rows are checked once but still get one result each"""
+
+        self.student_list = self.student_list[:5] * 4
+        expected = self.process()
+
+        self.assertEqual(len(expected), 20)
+        self.assertEqual(len(self.session.calls), 5)
+
+        self.assertEqual(self.process(workers=4), expected)
+        self.assertCountEqual(self.process(workers=4, ordered=False), expected)
+        self.assertEqual(len(self.session.calls), 15)
+
+    def test_stream_from_generator(self) -> None:
+        """Test if rows can be streamed from a generator, with the same results"""
+
+        expected = self.process()
+
+        for workers in (1, 8):
+            req = DSTNListRequest(student_list=(row for row in self.student_list),
+                                  session=self.session, workers=workers, **CONFIG)
+
+            self.assertEqual([record.asdict() for record in req.stream()], expected)
+
+    def test_fast_check(self) -> None:
+        """Test if only one record per row is asked for, with the same results as full records"""
+
+        expected = self.process()
+
+        self.assertEqual({call["rows"] for call in self.session.calls}, {1})
+        self.assertEqual(self.process(fast_check=False), expected)
+        self.assertEqual({call["rows"] for call in self.session.calls[50:]}, {10})
+
+    def test_extract_total(self) -> None:
+        """Test if the number of results is read from raw responses"""
+
+        self.assertEqual(extract_total(b'{"total": 12, "rows": [{"masv": "a"}]}'), 12)
+        self.assertEqual(extract_total('{"rows":[],"total":0}'), 0)
+        self.assertEqual(extract_total('{"total" : 3}'), 3)
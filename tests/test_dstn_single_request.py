@@ -0,0 +1,102 @@
+"""Test for DSTNSingleRequest"""
+
+from unittest import TestCase
+from src.base import plan_pages
+from src.dstn import DSTNSingleRequest
+from .factory.session_factory import FakeResponse, FakeSession
+
+
+class PagedSession(FakeSession):  # pylint: disable=too-few-public-methods
+    """Answer every query with the same records, a page at a time."""
+
+    def __init__(self, total: int, failing: int = 0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.records = [{"masv": "20120001", "sobang": f"QH{i:06}"} for i in range(total)]
+        self.failing = failing
+
+    def get(self, url, params, **kwargs) -> FakeResponse:
+        with self.lock:
+            self.calls.append(dict(params))
+
+        rows, page = int(params["rows"]), int(params["page"])
+
+        if page == self.failing:
+            return FakeResponse(status_code=403)
+        body = {"total": len(self.records),
+                "rows": self.records[(page - 1) * rows:page * rows]}
+
+        return FakeResponse(body=body)
+
+
+class TestDSTNSingleRequest(TestCase):
+    """Test DSTN Single Request"""
+
+    def setUp(self) -> None:
+        self.req = None
+
+    def process(self, session: FakeSession, page: int = 1, **kwargs):
+        """Run a DSTNSingleRequest with the fake session."""
+
+        self.req = DSTNSingleRequest(api_url="http://localhost/single", headers={},
+                                     results={"rows": 10, "page": page, "sord": "desc",
+                                              "max_rows": 25},
+                                     session=session, student_name="20120001",
+                                     degree_id="QH000000", errors={"enabled": False}, **kwargs)
+
+        return [record.get_info()["sobang"] for record in self.req.process()]
+
+    def test_plan_pages(self) -> None:
+        """Test if the page size taking the fewest requests is chosen"""
+
+        self.assertEqual(plan_pages(8, 8, 100), (8, []))
+        self.assertEqual(plan_pages(25, 10, 100), (25, [1]))
+        self.assertEqual(plan_pages(100, 10, 25), (25, [1, 2, 3, 4]))
+        self.assertEqual(plan_pages(30, 10, 12), (10, [2, 3]))
+
+        # Starting from the third page of 10 rows.
+        self.assertEqual(plan_pages(100, 10, 25, start=20), (25, [2, 3, 4]))
+        self.assertEqual(plan_pages(30, 10, 25, start=20), (10, []))
+
+    def test_first_page_only(self) -> None:
+        """Test if only the first page is fetched by default"""
+
+        session = PagedSession(total=60)
+
+        self.assertEqual(len(self.process(session)), 10)
+        self.assertEqual(len(session.calls), 1)
+
+    def test_all_pages(self) -> None:
+        """Test if every row is fetched once, in result order, with bigger pages"""
+
+        session = PagedSession(total=60)
+        expected = [record["sobang"] for record in session.records]
+
+        self.assertEqual(self.process(session, all_pages=True, workers=4), expected)
+        self.assertEqual([call["rows"] for call in session.calls], [10, 25, 25, 25])
+
+    def test_start_page(self) -> None:
+        """Test if the rows before the configured page are left out"""
+
+        session = PagedSession(total=60)
+        expected = [record["sobang"] for record in session.records]
+
+        self.assertEqual(self.process(session, page=2), expected[10:20])
+        self.assertEqual(self.process(session, page=2, all_pages=True, workers=4),
+                         expected[10:])
+        self.assertEqual([call["page"] for call in session.calls[1:]], [2, 1, 2, 3])
+
+    def test_failed_page(self) -> None:
+        """Test if the result is flagged partial when a page fails"""
+
+        session = PagedSession(total=60, failing=3)
+        expected = [record["sobang"] for record in session.records]
+
+        self.assertEqual(self.process(session, page=2), expected[10:20])
+        self.assertTrue(self.req.complete)
+
+        # The rows of the pages fetched are kept.
+        partial = self.process(session, all_pages=True)
+
+        self.assertFalse(self.req.complete)
+        self.assertEqual(partial[:10], expected[:10])
+        self.assertLess(len(partial), len(expected))
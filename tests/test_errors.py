@@ -0,0 +1,172 @@
+"""Test for the error journal and the retry of the failed rows"""
+
+import json
+import os
+import tempfile
+from typing import List, Tuple
+from unittest import IsolatedAsyncioTestCase, TestCase
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from requests.exceptions import ChunkedEncodingError
+from src.async_dstn import AsyncDSTNListRequest
+from src.dstn import DSTNListRequest
+from src.errors import ErrorJournal
+from src.exception import HTTPException
+from src.utils import load_csv
+from .factory.session_factory import FakeResponse, FakeSession, TransientSession
+
+# Config used by every request in this test (no retry within a request).
+CONFIG = {
+    "api_url": "http://localhost/errors",
+    "headers": {},
+    "results": {"rows": 10, "page": 1, "sord": "desc"},
+    "retry": {"max_retries": 0},
+    "circuit_breaker": {"enabled": False},
+}
+
+
+class BrokenSession(FakeSession):  # pylint: disable=too-few-public-methods
+    """Cut the body of a row short and answer another with an error page."""
+
+    def get(self, url, params, **kwargs) -> FakeResponse:
+        response = super().get(url, params, **kwargs)
+
+        if params["masv"] == "student 1":
+            raise ChunkedEncodingError("Connection broken")
+
+        if params["masv"] == "student 3":
+            return FakeResponse(content=b"<html>Bad gateway</html>")
+
+        return response
+
+
+class TestErrors(TestCase):
+    """Test the error journal and the retry of the failed rows"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.directory.cleanup)
+
+        self.student_list = [(f"student {i}", f"QH{i:06}") for i in range(6)]
+        self.errors = {
+            "path": os.path.join(self.directory.name, "errors.jsonl"),
+            "retry_path": os.path.join(self.directory.name, "retry.csv"),
+        }
+
+    def run_list(self, session: FakeSession, **kwargs) -> Tuple[DSTNListRequest, List[str]]:
+        """Check the student list, waiting for the error journal to be written."""
+
+        req = DSTNListRequest(student_list=self.student_list, session=session,
+                              errors=dict(self.errors, **kwargs), **CONFIG)
+        results = [item.asdict()["name"] for item in req.process()]
+        req.errors.close()
+
+        return req, results
+
+    def read_journal(self) -> list:
+        """Entries of the error journal."""
+
+        with open(self.errors["path"], "r", encoding="utf8") as journal_handler:
+            return [json.loads(line) for line in journal_handler]
+
+    def test_retry_at_end(self) -> None:
+        """Test if a row failing once is checked again, last, and journaled"""
+
+        session = TransientSession(errors={self.student_list[2]: 503})
+        req, results = self.run_list(session)
+
+        self.assertEqual(results, ["student 0", "student 1", "student 3", "student 4",
+                                   "student 5", "student 2"])
+        self.assertEqual(len(req.failed), 0)
+        self.assertFalse(os.path.exists(self.errors["retry_path"]))
+
+        entry, = self.read_journal()
+        self.assertEqual((entry["kind"], entry["key"], entry["status"], entry["body"]),
+                         ("multiple", ["student 2", "QH000002"], 503, "{}"))
+
+    def test_retry_file(self) -> None:
+        """Test if rows failing again are added to the retry file"""
+
+        session = FakeSession(errors={self.student_list[2]: 500, self.student_list[4]: 503})
+        req, results = self.run_list(session)
+
+        self.assertEqual(results, ["student 0", "student 1", "student 3", "student 5"])
+        self.assertEqual(load_csv(self.errors["retry_path"]),
+                         [self.student_list[2], self.student_list[4]])
+        self.assertEqual(len(req.failed), 2)
+        self.assertEqual(len(self.read_journal()), 4)
+
+        # Without the retry at the end, each failed row is only sent once.
+        session.calls.clear()
+        self.run_list(session, retry=False)
+
+        self.assertEqual(len(session.calls), 6)
+        self.assertEqual(len(load_csv(self.errors["retry_path"])), 4)
+
+    def test_broken_responses(self) -> None:
+        """Test if a body cut short or not made of JSON only fails its row"""
+
+        req, results = self.run_list(BrokenSession())
+
+        self.assertEqual(results, ["student 0", "student 2", "student 4", "student 5"])
+        self.assertEqual(load_csv(self.errors["retry_path"]),
+                         [self.student_list[1], self.student_list[3]])
+        self.assertEqual(len(req.failed), 2)
+
+        journal = self.read_journal()
+        self.assertEqual([entry["status"] for entry in journal if entry["key"][0] == "student 3"],
+                         [200, 200])
+        self.assertEqual(len(journal), 4)
+
+    def test_rotate(self) -> None:
+        """Test if the journal is rotated once over its size, keeping the last backups"""
+
+        journal = ErrorJournal(path=self.errors["path"], max_bytes=300, backups=2)
+
+        for index in range(20):
+            journal.record("multiple", (f"student {index}", "QH"),
+                           HTTPException(response=FakeResponse(500)))
+            journal.close()
+
+        self.assertTrue(os.path.exists(f"{self.errors['path']}.2"))
+        self.assertFalse(os.path.exists(f"{self.errors['path']}.3"))
+
+        for path in [self.errors["path"], f"{self.errors['path']}.1"]:
+            self.assertLess(os.path.getsize(path), 600)
+
+
+class TestAsyncErrors(IsolatedAsyncioTestCase):
+    """Test the retry of the failed rows by the asyncio engine"""
+
+    async def test_retry_at_end(self) -> None:
+        """Test if a row failing once is checked again, last"""
+
+        failing = {"student 1"}
+
+        async def handler(request: web.Request) -> web.Response:
+            if request.query["masv"] in failing:
+                failing.discard(request.query["masv"])
+                return web.Response(status=503)
+
+            return web.json_response({"total": 0, "rows": []})
+
+        app = web.Application()
+        app.router.add_get("/dstn", handler)
+
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        config = dict(CONFIG)
+        config["api_url"] = str(server.make_url("/dstn"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            config["errors"] = {"path": os.path.join(directory, "errors.jsonl"),
+                                "retry_path": os.path.join(directory, "retry.csv")}
+            req = AsyncDSTNListRequest(
+                student_list=[(f"student {i}", f"QH{i:06}") for i in range(3)], **config)
+
+            results = [item.asdict()["name"] for item in await req.process()]
+            req.errors.close()
+
+        self.assertEqual(results, ["student 0", "student 2", "student 1"])
@@ -0,0 +1,63 @@
+"""Test for the exporters"""
+
+import csv
+import io
+import json
+from unittest import TestCase
+from src.dstn import DSTNItem, DSTNListItem
+from src.export import LIST_COLUMNS, Exporter, get_exporter
+from .factory.student_factory import StudentFactory
+
+
+class TestExport(TestCase):
+    """Test the JSONL/CSV/TSV/table exporters"""
+
+    def setUp(self) -> None:
+        factory = StudentFactory()
+        self.students = [factory.create_student() for _ in range(3)]
+        self.items = [DSTNItem(json=student) for student in self.students]
+        self.list_items = [DSTNListItem(name="Nguyễn Văn A", degree_id="QH1", status=True),
+                           DSTNListItem(name="b, c", degree_id="QH2", status=False)]
+
+    def export(self, export_format: str, records, columns=None) -> str:
+        """Export records to a string."""
+
+        output = io.StringIO()
+        get_exporter(export_format, output, columns).write_all(records)
+
+        return output.getvalue()
+
+    def test_jsonl(self) -> None:
+        """Test if every field of every record is exported"""
+
+        lines = self.export("jsonl", self.items).splitlines()
+
+        self.assertEqual([json.loads(line) for line in lines], self.students)
+
+    def test_csv_tsv(self) -> None:
+        """Test if delimited files have a header and round-trip their values"""
+
+        for export_format, delimiter in [("csv", ","), ("tsv", "\t")]:
+            output = self.export(export_format, self.items)
+            rows = list(csv.DictReader(io.StringIO(output), delimiter=delimiter))
+
+            self.assertEqual(rows, self.students)
+
+        rows = list(csv.reader(io.StringIO(self.export("csv", self.list_items, LIST_COLUMNS))))
+
+        self.assertEqual(rows, [["name", "degree_id", "status"],
+                                ["Nguyễn Văn A", "QH1", "VALID"], ["b, c", "QH2", "INVALID"]])
+
+    def test_table(self) -> None:
+        """Test if the table format is unchanged"""
+
+        self.assertEqual(self.export("table", self.list_items, LIST_COLUMNS),
+                         "Name,Degree ID,Status\nNguyễn Văn A,QH1,VALID\nb, c,QH2,INVALID\n")
+        self.assertEqual(self.export("table", self.items),
+                         "".join(f"{item}\n" for item in self.items))
+
+    def test_abstract(self) -> None:
+        """Test if an exporter must say how it writes the fields of a record"""
+
+        with self.assertRaises(TypeError):
+            Exporter(io.StringIO())  # pylint: disable=abstract-class-instantiated
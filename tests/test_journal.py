@@ -0,0 +1,73 @@
+"""Test for the journal of completed rows"""
+
+import os
+import tempfile
+from unittest import TestCase
+from src.dstn import DSTNListItem
+from src.journal import Journal, pending_rows
+
+
+class TestJournal(TestCase):
+    """Test Journal"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "output.csv.journal")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_resume(self) -> None:
+        """Test if recorded results survive, minus a truncated last line"""
+
+        journal = Journal(self.path)
+        journal.open()
+        journal.append(DSTNListItem(name="a", degree_id="1", status=True))
+        journal.append(DSTNListItem(name="b", degree_id="2", status=False))
+        journal.close()
+
+        with open(self.path, "a", encoding="utf8") as journal_handler:
+            journal_handler.write('{"name": "c", "degr')
+
+        journal.open(resume=True)
+        journal.append(DSTNListItem(name="c", degree_id="3", status=True))
+        journal.close()
+
+        self.assertEqual([str(record) for record in journal.load()],
+                         ["a,1,VALID", "b,2,INVALID", "c,3,VALID"])
+
+        journal.close(remove=True)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_truncate(self) -> None:
+        """Test if resuming only cuts the torn last line, leaving the others in place"""
+
+        journal = Journal(self.path)
+        journal.open()
+        journal.append(DSTNListItem(name="a", degree_id="1", status=True))
+        journal.close()
+
+        with open(self.path, "rb") as journal_handler:
+            complete = journal_handler.read()
+
+        # Complete JSON, but its line was not finished.
+        with open(self.path, "a", encoding="utf8") as journal_handler:
+            journal_handler.write('{"name": "b", "degree_id": "2", "status": true}')
+
+        journal = Journal(self.path)
+        self.assertEqual([str(record) for record in journal.load()], ["a,1,VALID"])
+
+        journal.open(resume=True)
+        journal.close()
+
+        with open(self.path, "rb") as journal_handler:
+            self.assertEqual(journal_handler.read(), complete)
+
+    def test_pending_rows(self) -> None:
+        """Test if each recorded result skips exactly one matching row"""
+
+        student_list = [("a", "1"), ("b", "2"), ("a", "1"), ("c", "3")]
+        record_list = [DSTNListItem(name="a", degree_id="1", status=True)]
+
+        self.assertEqual(list(pending_rows(student_list, record_list)),
+                         [("b", "2"), ("a", "1"), ("c", "3")])
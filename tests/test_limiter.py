@@ -0,0 +1,55 @@
+"""Test for the adaptive rate limiter"""
+
+from unittest import TestCase
+from src.limiter import AdaptiveRateLimiter, get_limiter
+
+
+class TestAdaptiveRateLimiter(TestCase):
+    """Test the AIMD rate limiter"""
+
+    def test_additive_increase(self) -> None:
+        """Test if healthy responses slowly raise the rate"""
+
+        limiter = AdaptiveRateLimiter(initial_rate=10, increase=1)
+
+        for _ in range(10):
+            limiter.feedback(200, 0.1)
+
+        self.assertAlmostEqual(limiter.rate, 11, delta=0.1)
+
+    def test_slow_response_holds_rate(self) -> None:
+        """Test if slow responses stop the rate from growing"""
+
+        limiter = AdaptiveRateLimiter(initial_rate=10, latency_target=1.0)
+        limiter.feedback(200, 5.0)
+
+        self.assertEqual(limiter.rate, 10)
+
+    def test_multiplicative_decrease(self) -> None:
+        """Test if throttling halves the rate once per burst, down to the minimum"""
+
+        limiter = AdaptiveRateLimiter(initial_rate=10, decrease=0.5, min_rate=4)
+
+        limiter.feedback(429, 0.1)
+        limiter.feedback(503, 0.1)
+        self.assertEqual(limiter.rate, 5)
+
+        limiter.decreased_at = 0.0
+        limiter.feedback(None, 60)
+        self.assertEqual(limiter.rate, 4)
+
+    def test_token_bucket(self) -> None:
+        """Test if requests beyond the burst have to wait"""
+
+        limiter = AdaptiveRateLimiter(initial_rate=10, burst=2)
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1, delta=0.01)
+
+    def test_disabled(self) -> None:
+        """Test if no limiter is created when rate limiting is disabled"""
+
+        self.assertIsNone(get_limiter("http://localhost", {"enabled": False}))
+        self.assertIs(get_limiter("http://localhost", {"enabled": True}),
+                      get_limiter("http://localhost", {"enabled": True}))
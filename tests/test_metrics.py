@@ -0,0 +1,105 @@
+"""Test for the request metrics"""
+
+import json
+import os
+import tempfile
+from unittest import TestCase
+from src.dstn import DSTNListRequest, DSTNSingleRequest
+from src.metrics import LATENCY_BUCKETS, METRICS, Metrics
+from .factory.session_factory import FakeSession
+
+# Config used by every request in this test.
+CONFIG = {
+    "api_url": "http://localhost/dstn",
+    "headers": {},
+    "results": {"rows": 10, "page": 1, "sord": "desc"},
+    "retry": {"max_retries": 1, "backoff": 0, "jitter": False},
+}
+
+
+class TestMetrics(TestCase):
+    """Test the counters and their Prometheus/JSON output"""
+
+    def setUp(self) -> None:
+        METRICS.reset()
+
+    def test_histogram(self) -> None:
+        """Test if latencies fall in the first bucket holding them"""
+
+        metrics = Metrics()
+
+        for latency in [0.001, 0.005, 0.3, 100.0]:
+            metrics.request_sent()
+            metrics.response_received(200, latency)
+
+        buckets = metrics.asdict()["latency"]["buckets"]
+
+        self.assertEqual(buckets["0.005"], 2)
+        self.assertEqual(buckets["0.5"], 1)
+        self.assertEqual(buckets["+Inf"], 1)
+        self.assertEqual(sum(buckets.values()), 4)
+        self.assertEqual(metrics.in_flight, 0)
+
+        text = metrics.render()
+
+        self.assertIn(f'dstn_request_duration_seconds_bucket{{le="{LATENCY_BUCKETS[-1]}"}} 3',
+                      text)
+        self.assertIn('dstn_request_duration_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('dstn_requests_total{status="200"} 4', text)
+
+    def test_list_request(self) -> None:
+        """Test if a list run counts its requests, retries and rows"""
+
+        student_list = [(f"student {i}", f"QH{i:06}") for i in range(10)]
+        session = FakeSession(valid=set(student_list[::2]), errors={student_list[1]: 503})
+
+        with tempfile.TemporaryDirectory() as directory:
+            req = DSTNListRequest(student_list=student_list, session=session, errors={
+                "path": os.path.join(directory, "errors.jsonl"),
+                "retry_path": os.path.join(directory, "retry.csv"),
+            }, **CONFIG)
+            req.process()
+            req.errors.close()
+
+        metrics = METRICS.asdict()
+
+        # The failed row is tried again at the end of the batch.
+        self.assertEqual(metrics["requests"], {"200": 9, "503": 4})
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["rows"], 10)
+        self.assertEqual(metrics["in_flight"], 0)
+
+    def test_unexpected_error(self) -> None:
+        """Test if a request ended by an unexpected error is not left in flight"""
+
+        class BrokenSession(FakeSession):  # pylint: disable=too-few-public-methods
+            """Fail in the middle of every response."""
+
+            def get(self, url, params, **kwargs):
+                raise RuntimeError("body cut short")
+
+        req = DSTNSingleRequest(student_name="a", degree_id="1", session=BrokenSession(),
+                                errors={"enabled": False}, **CONFIG)
+
+        with self.assertRaises(RuntimeError):
+            req.get()
+
+        metrics = METRICS.asdict()
+
+        self.assertEqual(metrics["in_flight"], 0)
+        self.assertEqual(metrics["requests"], {"error": 1})
+
+    def test_dump(self) -> None:
+        """Test if metrics are dumped as JSON or in the Prometheus format"""
+
+        METRICS.row_checked()
+
+        with tempfile.TemporaryDirectory() as directory:
+            for filename in ["metrics.json", "metrics.prom"]:
+                METRICS.dump(os.path.join(directory, filename))
+
+            with open(os.path.join(directory, "metrics.json"), encoding="utf8") as handler:
+                self.assertEqual(json.load(handler)["rows"], 1)
+
+            with open(os.path.join(directory, "metrics.prom"), encoding="utf8") as handler:
+                self.assertIn("dstn_rows_total 1\n", handler.read())
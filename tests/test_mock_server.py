@@ -0,0 +1,91 @@
+"""Test for the mock DSSVTN server and the load-test harness"""
+
+import random
+from typing import Tuple
+from unittest import IsolatedAsyncioTestCase, TestCase
+from aiohttp.test_utils import TestClient, TestServer
+from benchmarks.loadtest import create_rows, histogram_quantile
+from benchmarks.mock_server import MockDSTN, parse_latency
+
+
+class TestMockServer(IsolatedAsyncioTestCase):
+    """Test the mock server answers and injected faults"""
+
+    async def start(self, **kwargs) -> Tuple[MockDSTN, TestClient]:
+        """Start a mock server of 50 students"""
+
+        mock = MockDSTN(students=50, **kwargs)
+        client = TestClient(TestServer(mock.create_app()))
+        await client.start_server()
+        self.addAsyncCleanup(client.close)
+
+        return mock, client
+
+    async def test_find(self) -> None:
+        """Test if students are found by Student ID or name, as the client normalizes them"""
+
+        mock, client = await self.start()
+        student = mock.students[7]
+
+        for name in [student["masv"], student["hoten"].upper()]:
+            response = await client.get("/dstn", params={
+                "masv": name, "sobang": f" {student['sobang'].lower()} ",
+                "rows": 10, "page": 1, "sord": "desc"})
+
+            self.assertEqual(response.status, 200)
+            self.assertEqual(await response.json(), {"total": 1, "rows": [student]})
+
+        response = await client.get("/dstn", params={
+            "masv": student["masv"], "sobang": "NOTHING", "rows": 10, "page": 2})
+        self.assertEqual(await response.json(), {"total": 0, "rows": []})
+
+    async def test_faults(self) -> None:
+        """Test if errors and throttling are answered as asked"""
+
+        _, client = await self.start(error_rate=1.0, max_rate=2)
+        statuses = [(await client.get("/dstn", params={"masv": "a", "sobang": "b"})).status
+                    for _ in range(4)]
+
+        self.assertEqual(statuses, [500, 500, 429, 429])
+
+        response = await client.get("/stats")
+        self.assertEqual(await response.json(), {"500": 2, "429": 2})
+
+
+class TestLoadTest(TestCase):
+    """Test the helpers of the load-test harness"""
+
+    def test_histogram_quantile(self) -> None:
+        """Test if quantiles are interpolated within their bucket"""
+
+        buckets = {"0.1": 50, "0.5": 40, "1.0": 10, "+Inf": 0}
+
+        self.assertAlmostEqual(histogram_quantile(buckets, 0.5), 0.1)
+        self.assertAlmostEqual(histogram_quantile(buckets, 0.7), 0.3)
+        self.assertAlmostEqual(histogram_quantile(buckets, 0.95), 0.75)
+        self.assertIsNone(histogram_quantile({"0.1": 0, "+Inf": 0}, 0.5))
+
+    def test_create_rows(self) -> None:
+        """Test if the share of valid rows follows the ratio asked"""
+
+        students = [{"masv": f"{index}", "hoten": f"Name {index}", "sobang": f"QH{index:06}"}
+                    for index in range(10)]
+        degree_ids = {student["sobang"] for student in students}
+
+        self.assertTrue(all(row[1] in degree_ids for row in create_rows(students, 20, 1.0, 0)))
+        self.assertFalse(any(row[1] in degree_ids for row in create_rows(students, 20, 0.0, 0)))
+
+        self.assertEqual(create_rows(students, 20, 0.5, 1), create_rows(students, 20, 0.5, 1))
+
+    def test_parse_latency(self) -> None:
+        """Test if latency distributions are parsed, and wrong ones refused"""
+
+        rng = random.Random(0)
+
+        self.assertEqual(parse_latency("fixed:0.25", rng)(), 0.25)
+        self.assertTrue(0.1 <= parse_latency("uniform:0.1,0.2", rng)() <= 0.2)
+        self.assertGreater(parse_latency("lognormal:0.05,0.5", rng)(), 0)
+
+        for spec in ["fixed", "uniform:1", "gamma:1,2"]:
+            with self.assertRaises(ValueError):
+                parse_latency(spec, rng)
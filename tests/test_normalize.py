@@ -0,0 +1,58 @@
+"""Test for the normalization of names and degree IDs"""
+
+from unittest import TestCase
+from src.dstn import DSTNListRequest
+from src.utils import normalize_degree_id, normalize_name
+from .factory.session_factory import FakeSession
+from .test_dstn_list_request import CONFIG
+
+
+class TestNormalize(TestCase):
+    """Test the normalizers and their use by DSTNListRequest"""
+
+    def test_normalize_name(self) -> None:
+        """Test if the spellings of a name share one canonical form"""
+
+        for name in ["Nguyễn Văn A", "nguyen van a", "NGUYEN  VAN A", " Nguyễn\tVăn A ",
+                     "Nguyễn Văn A"]:
+            self.assertEqual(normalize_name(name), "nguyen van a")
+
+        self.assertEqual(normalize_name("Đặng Đức"), "dang duc")
+        self.assertEqual(normalize_name("20120001"), "20120001")
+        self.assertIsNone(normalize_name(None))
+
+    def test_normalize_degree_id(self) -> None:
+        """Test if degree IDs are uppercased, without whitespaces nor fullwidth characters"""
+
+        for degree_id in ["QH000123", "qh000123", " QH 000123 ", "ＱＨ０００１２３"]:
+            self.assertEqual(normalize_degree_id(degree_id), "QH000123")
+
+        self.assertIsNone(normalize_degree_id(None))
+
+    def test_variants_share_one_lookup(self) -> None:
+        """Test if rows normalizing to the same query are sent once, each keeping its own label"""
+
+        student_list = [("Nguyễn Văn A", "QH000123"), ("nguyen van a", "qh000123"),
+                        ("NGUYEN  VAN A", "QH 000123"), ("Trần Thị B", "QH000456")]
+
+        for kwargs in [{}, {"workers": 4}, {"workers": 4, "ordered": False}]:
+            session = FakeSession(valid={("nguyen van a", "QH000123")})
+            req = DSTNListRequest(student_list=student_list, session=session, **CONFIG, **kwargs)
+
+            records = [record.asdict() for record in req.process()]
+
+            self.assertCountEqual([(r["name"], r["degree_id"]) for r in records], student_list)
+            self.assertEqual([r["status"] for r in records if r["name"] != "Trần Thị B"],
+                             [True] * 3)
+            self.assertEqual(len(session.calls), 2)
+
+    def test_normalize_disabled(self) -> None:
+        """Test if rows are sent verbatim when normalization is disabled"""
+
+        session = FakeSession()
+        req = DSTNListRequest(student_list=[("Nguyễn Văn A", "qh1"), ("nguyen van a", "QH1")],
+                              session=session, normalize=False, **CONFIG)
+        req.process()
+
+        self.assertEqual([(call["masv"], call["sobang"]) for call in session.calls],
+                         [("Nguyễn Văn A", "qh1"), ("nguyen van a", "QH1")])
@@ -0,0 +1,59 @@
+"""Test for the phase profiler"""
+
+import os
+import tempfile
+from unittest import TestCase
+from src.dstn import DSTNSingleRequest
+from src.profiling import NULL_PHASE, PhaseProfiler, PROFILER, capture
+from .factory.session_factory import FakeSession
+
+
+class TestProfiling(TestCase):
+    """Test PhaseProfiler and the cProfile/tracemalloc capture"""
+
+    def tearDown(self) -> None:
+        PROFILER.enabled = False
+
+    def test_disabled(self) -> None:
+        """Test if a disabled profiler records nothing"""
+
+        profiler = PhaseProfiler()
+
+        self.assertIs(profiler.phase("get"), NULL_PHASE)
+
+        with profiler.phase("get"):
+            pass
+
+        self.assertEqual(profiler.totals, {})
+
+    def test_phases(self) -> None:
+        """Test if the phases of a single request are timed"""
+
+        PROFILER.enable()
+
+        req = DSTNSingleRequest(student_name="a", degree_id="1", language="vn",
+                                session=FakeSession(valid={("a", "1")}),
+                                api_url="http://localhost/dstn", headers={},
+                                results={"rows": 10, "page": 1, "sord": "desc"})
+        req.process()
+
+        self.assertEqual(set(PROFILER.totals), {"build", "get", "json_decode", "item"})
+        self.assertEqual(PROFILER.totals["get"][0], 1)
+        self.assertGreaterEqual(PROFILER.totals["get"][1], PROFILER.totals["json_decode"][1])
+        self.assertIn("json_decode", PROFILER.report())
+
+    def test_capture(self) -> None:
+        """Test if the cProfile and tracemalloc reports are written"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            cpu_path = os.path.join(directory, "cpu.txt")
+            memory_path = os.path.join(directory, "memory.txt")
+
+            with capture(cpu_path, memory_path):
+                _ = [str(index) for index in range(10000)]
+
+            with open(cpu_path, encoding="utf8") as cpu_handler:
+                self.assertIn("function calls", cpu_handler.read())
+
+            with open(memory_path, encoding="utf8") as memory_handler:
+                self.assertTrue(memory_handler.readline().startswith("Current:"))
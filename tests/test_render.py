@@ -0,0 +1,53 @@
+"""Test for the batch renderer"""
+
+import io
+from unittest import TestCase
+import termtables as tt
+from src.dstn import DSTNItem
+from src.render import ItemRenderer, render_table
+from .factory.student_factory import StudentFactory
+
+
+class TestRender(TestCase):
+    """Test ItemRenderer against termtables"""
+
+    def setUp(self) -> None:
+        factory = StudentFactory()
+        self.items = [DSTNItem(json=factory.create_student(), language=language)
+                      for language in ["vn", "en"] * 5]
+
+    def test_same_as_termtables(self) -> None:
+        """Test if tables are byte-identical to termtables ones"""
+
+        expected = io.StringIO()
+
+        for item in self.items:
+            print(tt.to_string(item.get_rows(), style=tt.styles.ascii_thin_double),
+                  file=expected)
+
+        output = io.StringIO()
+        ItemRenderer().write(self.items, output)
+
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_special_cells(self) -> None:
+        """Test if empty cells and escape sequences render as termtables does"""
+
+        for values in [["", "a"], ["\x1b[31mred\x1b[0m", "Đại học"]]:
+            labels = ("Mã sinh viên", "Bậc")
+
+            self.assertEqual(render_table(labels, values),
+                             tt.to_string([list(row) for row in zip(labels, values)],
+                                          style=tt.styles.ascii_thin_double))
+
+    def test_plain(self) -> None:
+        """Test if the plain style writes one tab-separated line per field"""
+
+        output = io.StringIO()
+        ItemRenderer(style="plain").write(self.items[:2], output)
+
+        blocks = output.getvalue().rstrip("\n").split("\n\n")
+
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(blocks[0].split("\n")[0], f"Mã sinh viên\t{self.items[0].info['masv']}")
+        self.assertEqual([len(block.split("\n")) for block in blocks], [13, 13])
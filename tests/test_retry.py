@@ -0,0 +1,147 @@
+"""Test for the retry policy and the circuit breaker"""
+
+from unittest import TestCase
+from src.dstn import DSTNListRequest
+from src.exception import CircuitOpenException
+from src.retry import CircuitBreaker, RetryPolicy
+from .factory.session_factory import FakeResponse, FakeSession
+
+
+class FlakySession(FakeSession):
+    """Fail the first requests with an HTTP error before answering normally."""
+
+    def __init__(self, failures: int, status_code: int = 503, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.status_code = status_code
+
+    def get(self, url, params, **kwargs) -> FakeResponse:
+        if self.failures > 0:
+            self.failures -= 1
+            self.calls.append(dict(params))
+            return FakeResponse(self.status_code)
+
+        return super().get(url, params, **kwargs)
+
+
+class TestRetry(TestCase):
+    """Test retries and the circuit breaker"""
+
+    def make_request(self, session: FakeSession, **kwargs) -> DSTNListRequest:
+        """Create a DSTNListRequest retrying without delay."""
+
+        return DSTNListRequest(
+            api_url="http://localhost/retry",
+            headers={},
+            results={"rows": 10, "page": 1, "sord": "desc"},
+            session=session,
+            retry={"backoff": 0},
+            errors={"enabled": False, "retry_path": None},
+            **kwargs,
+        )
+
+    def test_delay(self) -> None:
+        """Test if delays grow exponentially up to the maximum"""
+
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+
+        self.assertEqual([policy.delay(attempt) for attempt in range(4)], [1, 2, 4, 5])
+
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=True)
+
+        for attempt in range(4):
+            self.assertLessEqual(policy.delay(attempt), min(5, 2 ** attempt))
+
+    def test_should_retry(self) -> None:
+        """Test if only failures are retried, at most `max_retries` times"""
+
+        policy = RetryPolicy(max_retries=2)
+
+        self.assertTrue(policy.should_retry(None, 0))
+        self.assertTrue(policy.should_retry(503, 1))
+        self.assertFalse(policy.should_retry(503, 2))
+        self.assertFalse(policy.should_retry(200, 0))
+        self.assertFalse(policy.should_retry(404, 0))
+
+    def test_retry_recovers(self) -> None:
+        """Test if a row survives a few failed attempts"""
+
+        session = FlakySession(failures=2, valid={("a", "1")})
+        req = self.make_request(session, circuit_breaker={"enabled": False})
+
+        self.assertTrue(req.check("a", "1").asdict()["status"])
+        self.assertEqual(len(session.calls), 3)
+
+    def test_circuit_breaker(self) -> None:
+        """Test if the circuit opens after consecutive failures, then lets one trial through"""
+
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+        breaker.record(True)
+        breaker.before_request()
+        breaker.record(True)
+
+        with self.assertRaises(CircuitOpenException):
+            breaker.before_request()
+
+        # Pretend the recovery timeout has passed.
+        breaker.opened_at -= 60
+        breaker.before_request()
+
+        with self.assertRaises(CircuitOpenException):
+            breaker.before_request()
+
+        breaker.record(False)
+        breaker.before_request()
+
+    def test_lost_trial(self) -> None:
+        """Test if a trial whose outcome is never recorded does not keep the circuit open"""
+
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record(True)
+
+        breaker.opened_at -= 60
+        breaker.before_request()
+
+        with self.assertRaises(CircuitOpenException):
+            breaker.before_request()
+
+        # Pretend the trial has been lost for a recovery timeout.
+        breaker.trial_started_at -= 60
+        breaker.before_request()
+
+    def test_unexpected_error(self) -> None:
+        """Test if a trial failing with an unexpected error is recorded"""
+
+        class BrokenSession(FakeSession):  # pylint: disable=too-few-public-methods
+            """Fail in the middle of the first response."""
+
+            def get(self, url, params, **kwargs) -> FakeResponse:
+                if not self.calls:
+                    self.calls.append(dict(params))
+                    raise RuntimeError("body cut short")
+
+                return super().get(url, params, **kwargs)
+
+        session = BrokenSession()
+        req = self.make_request(session, circuit_breaker={"failure_threshold": 1,
+                                                          "recovery_timeout": 0})
+
+        # The circuit is open, the next request is the trial.
+        req.breaker.record(True)
+
+        with self.assertRaises(RuntimeError):
+            req.check("a", "1")
+
+        self.assertIsNone(req.breaker.trial_started_at)
+        self.assertFalse(req.check("a", "1").asdict()["status"])
+
+    def test_fail_fast(self) -> None:
+        """Test if requests stop reaching the API once the circuit is open"""
+
+        session = FlakySession(failures=100)
+        req = self.make_request(session, circuit_breaker={"failure_threshold": 3})
+
+        self.assertIsNone(req.check("a", "1"))
+        self.assertIsNone(req.check("b", "2"))
+        self.assertEqual(len(session.calls), 3)
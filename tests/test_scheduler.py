@@ -0,0 +1,226 @@
+"""Test for the priority-aware scheduler of the requests"""
+
+import asyncio
+import threading
+import time
+from typing import List
+from unittest import IsolatedAsyncioTestCase, TestCase
+from src.dstn import DSTNListRequest, DSTNSingleRequest
+from src.metrics import METRICS
+from src.scheduler import BULK, INTERACTIVE, PriorityScheduler, get_scheduler
+from .factory.session_factory import FakeResponse, FakeSession
+
+# Four slots, one of them kept for the interactive lookups.
+CLASSES = {
+    INTERACTIVE: {"share": 0.25, "deadline": 0.5},
+    BULK: {"share": 0.0, "deadline": 30.0},
+}
+
+
+class SlowSession(FakeSession):  # pylint: disable=too-few-public-methods
+    """Answer after a short delay, counting the requests in flight."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params, **kwargs) -> FakeResponse:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        return super().get(url, params, **kwargs)
+
+
+class TestScheduler(TestCase):
+    """Test the slots given to each priority class"""
+
+    def setUp(self) -> None:
+        self.scheduler = PriorityScheduler(capacity=4, classes=CLASSES)
+        self.order: List[str] = []
+
+    def wait_for(self, name: str, priority: str, deadline: float = None) -> threading.Thread:
+        """Start a thread waiting for a slot, once it is queued."""
+
+        def run() -> None:
+            self.scheduler.acquire(priority, deadline)
+            self.order.append(name)
+
+        queued = sum(len(heap) for heap in self.scheduler.waiting.values())
+        thread = threading.Thread(target=run)
+        thread.start()
+
+        while sum(len(heap) for heap in self.scheduler.waiting.values()) == queued:
+            time.sleep(0.001)
+
+        return thread
+
+    def test_shares(self) -> None:
+        """Test if bulk requests leave the interactive share free"""
+
+        for _ in range(3):
+            self.scheduler.acquire(BULK)
+
+        thread = self.wait_for("bulk", BULK)
+        self.assertEqual(self.order, [])
+
+        # The reserved slot is free, and interactive requests may borrow the others.
+        self.scheduler.acquire(INTERACTIVE)
+        self.assertEqual(self.scheduler.running, {INTERACTIVE: 1, BULK: 3})
+
+        self.scheduler.release(BULK)
+        thread.join()
+
+        self.assertEqual(self.order, ["bulk"])
+        self.assertEqual(self.scheduler.running, {INTERACTIVE: 1, BULK: 3})
+
+        with self.assertRaises(ValueError):
+            PriorityScheduler(capacity=4, classes={INTERACTIVE: {"share": 0.75},
+                                                   BULK: {"share": 0.5}})
+
+        with self.assertRaises(ValueError):
+            self.scheduler.acquire("unknown")
+
+    def test_deadlines(self) -> None:
+        """Test if waiting requests are given slots earliest deadline first"""
+
+        for _ in range(3):
+            self.scheduler.acquire(BULK)
+
+        self.scheduler.acquire(INTERACTIVE)
+
+        threads = [self.wait_for("bulk", BULK), self.wait_for("interactive", INTERACTIVE),
+                   self.wait_for("late bulk", BULK, deadline=0.0)]
+
+        for _ in range(3):
+            self.scheduler.release(BULK)
+            time.sleep(0.01)
+
+        for thread in threads:
+            thread.join()
+
+        # A bulk request past its deadline is not starved by the interactive ones.
+        self.assertEqual(self.order, ["late bulk", "interactive", "bulk"])
+
+    def test_partial_classes(self) -> None:
+        """Test if the classes missing from the config keep their default settings"""
+
+        scheduler = PriorityScheduler(capacity=4, classes={INTERACTIVE: {"share": 0.5}})
+
+        self.assertEqual(scheduler.classes[INTERACTIVE], {"share": 0.5, "deadline": 0.5})
+        self.assertEqual(scheduler.reserved, {INTERACTIVE: 2, BULK: 0})
+
+        for _ in range(2):
+            scheduler.acquire(BULK)
+
+        self.assertEqual(scheduler.running, {INTERACTIVE: 0, BULK: 2})
+
+    def test_get_scheduler(self) -> None:
+        """Test if the scheduler is shared by the requests to the same API"""
+
+        self.assertIsNone(get_scheduler("http://localhost/scheduler"))
+
+        settings = {"enabled": True, "capacity": 4, "classes": CLASSES}
+        self.assertIs(get_scheduler("http://localhost/scheduler", settings),
+                      get_scheduler("http://localhost/scheduler", dict(settings)))
+
+
+class TestSchedulerRequests(TestCase):
+    """Test the scheduler in front of the requests of a batch and of single lookups"""
+
+    def test_interactive_during_batch(self) -> None:
+        """Test if single lookups are not kept waiting by a batch"""
+
+        METRICS.reset()
+
+        config = {
+            "api_url": "http://localhost/scheduled",
+            "headers": {},
+            "results": {"rows": 10, "page": 1, "sord": "desc"},
+            "scheduler": {"enabled": True, "capacity": 4, "classes": CLASSES},
+            "errors": {"enabled": False},
+        }
+
+        student_list = [(f"student {i}", f"QH{i:06}") for i in range(100)]
+        session = SlowSession(valid=set(student_list))
+
+        batch = DSTNListRequest(student_list=student_list, workers=8, session=session, **config)
+        thread = threading.Thread(target=batch.process)
+        thread.start()
+
+        while len(session.calls) < 10:
+            time.sleep(0.001)
+
+        for name, degree_id in student_list[:5]:
+            req = DSTNSingleRequest(student_name=name, degree_id=degree_id,
+                                    session=session, **config)
+            self.assertEqual(len(req.process()), 1)
+
+        thread.join()
+
+        waits = METRICS.asdict()["scheduler"]
+
+        self.assertEqual(waits[BULK]["count"], 100)
+        self.assertEqual(waits[INTERACTIVE]["count"], 5)
+        self.assertEqual(waits[INTERACTIVE]["deadline_misses"], 0)
+        self.assertLess(waits[INTERACTIVE]["sum"], 0.05)
+        self.assertLessEqual(session.max_in_flight, 4)
+        self.assertIn('dstn_scheduler_wait_seconds_count{class="interactive"} 5',
+                      METRICS.render())
+
+    def test_limiter_before_slot(self) -> None:
+        """Test if a request waits for the rate limiter before taking its slot"""
+
+        running = []
+
+        class RecordingLimiter:
+            """Record the slots in use while a request waits for a token."""
+
+            @staticmethod
+            def acquire() -> None:
+                """Wait for a token."""
+
+                running.append(sum(req.scheduler.running.values()))
+
+            @staticmethod
+            def feedback(*_) -> None:
+                """Ignore the outcome of the requests."""
+
+        req = DSTNSingleRequest(student_name="a", degree_id="1", session=FakeSession(),
+                                limiter=RecordingLimiter(), api_url="http://localhost/limited",
+                                headers={}, results={"rows": 10, "page": 1, "sord": "desc"},
+                                scheduler={"enabled": True, "capacity": 4},
+                                errors={"enabled": False})
+        req.process()
+
+        self.assertEqual(running, [0])
+
+
+class TestAsyncScheduler(IsolatedAsyncioTestCase):
+    """Test the scheduler from an event loop"""
+
+    async def test_cancel(self) -> None:
+        """Test if a request cancelled while waiting gives its place up"""
+
+        scheduler = PriorityScheduler(capacity=1, classes={BULK: {"deadline": 1.0}})
+
+        async with scheduler.slot_async(BULK):
+            task = asyncio.ensure_future(scheduler.acquire_async(BULK))
+            await asyncio.sleep(0.01)
+
+            task.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(scheduler.running[BULK], 0)
+
+        await asyncio.wait_for(scheduler.acquire_async(BULK), 1.0)
+        self.assertEqual(scheduler.running[BULK], 1)
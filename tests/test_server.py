@@ -0,0 +1,115 @@
+"""Test for the HTTP lookup service"""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from src.server import BULK_BATCHER_KEY, create_app
+
+
+class TestServe(IsolatedAsyncioTestCase):
+    """Test the lookup service against a local API"""
+
+    async def asyncSetUp(self) -> None:
+        self.valid = {("20120001", "QH000001")}
+        self.calls = 0
+
+        async def handler(request: web.Request) -> web.Response:
+            self.calls += 1
+            key = (request.query["masv"], request.query["sobang"])
+            rows = [{"masv": key[0], "sobang": key[1]}] if key in self.valid else []
+
+            return web.json_response({"total": len(rows), "rows": rows})
+
+        upstream = web.Application()
+        upstream.router.add_get("/dstn", handler)
+
+        self.upstream = TestServer(upstream)
+        await self.upstream.start_server()
+
+        self.client = TestClient(TestServer(create_app({
+            "api_url": str(self.upstream.make_url("/dstn")),
+            "headers": {},
+            "results": {"rows": 10, "page": 1, "sord": "desc"},
+            "server": {"batch_window": 0.05},
+        })))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.upstream.close()
+
+    async def test_check(self) -> None:
+        """Test if concurrent identical lookups are sent to the API once"""
+
+        responses = await asyncio.gather(*(
+            self.client.get("/check", params={"name": "20120001", "degree_id": "QH000001"})
+            for _ in range(10)))
+
+        for response in responses:
+            self.assertEqual(response.status, 200)
+            self.assertTrue((await response.json())["status"])
+
+        self.assertEqual(self.calls, 1)
+
+        response = await self.client.get("/check", params={"name": "20120001"})
+        self.assertEqual(response.status, 400)
+
+    async def test_check_batch(self) -> None:
+        """Test if a batch is answered in order, as written in the request"""
+
+        response = await self.client.post("/check", json=[
+            ["20120001", "QH000001"], {"name": "20120002", "degree_id": "QH000002"},
+            ["20120001", " qh000001 "]])
+
+        self.assertEqual((await response.json())["results"], [
+            {"name": "20120001", "degree_id": "QH000001", "status": True},
+            {"name": "20120002", "degree_id": "QH000002", "status": False},
+            {"name": "20120001", "degree_id": " qh000001 ", "status": True}])
+        self.assertEqual(self.calls, 2)
+
+    async def test_check_batch_invalid(self) -> None:
+        """Test if rows which are not pairs of strings are refused"""
+
+        for body in [[[1, 2]], [["a", "b", "c"]], [{"name": "a"}], {"name": "a"}, ["ab"]]:
+            response = await self.client.post("/check", json=body)
+            self.assertEqual(response.status, 400)
+
+    async def test_batch_error(self) -> None:
+        """Test if a row failing to be checked does not hold up the rest of its batch"""
+
+        batcher = self.client.server.app[BULK_BATCHER_KEY]
+
+        bad, good = await asyncio.wait_for(asyncio.gather(
+            batcher.check(1, 2), batcher.check("20120001", "QH000001"),
+            return_exceptions=True), timeout=5)
+
+        self.assertIsInstance(bad, TypeError)
+        self.assertTrue(good.asdict()["status"])
+
+    async def test_lookup(self) -> None:
+        """Test if the records of a student are returned"""
+
+        response = await self.client.get("/lookup", params={"name": "20120001",
+                                                            "degree_id": "QH000001"})
+
+        self.assertEqual(await response.json(), {
+            "total": 1, "records": [{"masv": "20120001", "sobang": "QH000001"}]})
+
+        response = await self.client.get("/lookup", params={"name": "20120002",
+                                                            "degree_id": "QH000002"})
+
+        self.assertEqual(await response.json(), {"total": 0, "records": []})
+
+    async def test_lookup_all_pages(self) -> None:
+        """Test if all_pages only accepts true or false values, whatever their case"""
+
+        for value in ["1", "True", "YES", "on", "0", "False", "no", "OFF", ""]:
+            response = await self.client.get("/lookup", params={
+                "name": "20120001", "degree_id": "QH000001", "all_pages": value})
+            self.assertEqual(response.status, 200)
+
+        for value in ["2", "maybe", "nope"]:
+            response = await self.client.get("/lookup", params={
+                "name": "20120001", "degree_id": "QH000001", "all_pages": value})
+            self.assertEqual(response.status, 400)
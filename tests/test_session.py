@@ -0,0 +1,80 @@
+"""Test for the shared session"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from src.session import connection_settings, get_session, close_sessions
+
+
+class TestSession(TestCase):
+    """Test the pooled session"""
+
+    def tearDown(self) -> None:
+        close_sessions()
+
+    def test_default_settings(self) -> None:
+        """Test if missing settings fall back to the defaults"""
+
+        settings = connection_settings({"pool_maxsize": 32})
+
+        self.assertEqual(settings["pool_maxsize"], 32)
+        self.assertTrue(settings["keep_alive"])
+
+    def test_shared_session(self) -> None:
+        """Test if requests with the same settings share one session"""
+
+        first = get_session(connection={"pool_maxsize": 8})
+        second = get_session(connection={"pool_maxsize": 8})
+        other = get_session(connection={"pool_maxsize": 4})
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_keep_alive_disabled(self) -> None:
+        """Test if disabling keep-alive closes the connection after each request"""
+
+        session = get_session(connection={"keep_alive": False})
+
+        self.assertEqual(session.headers["Connection"], "close")
+
+    def test_prewarm_unlocked(self) -> None:
+        """Test if pre-warming a session does not keep other sessions from being created"""
+
+        entered, release = threading.Event(), threading.Event()
+
+        class Handler(BaseHTTPRequestHandler):
+            """Hold the warm-up requests until released."""
+
+            def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+                """Answer a warm-up request."""
+
+                entered.set()
+                release.wait(5)
+
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *_) -> None:  # pylint: disable=arguments-differ
+                """Keep the test output quiet."""
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            warming = threading.Thread(target=get_session, args=(
+                f"http://127.0.0.1:{server.server_port}/", {"prewarm": 1, "timeout": 5}))
+            warming.start()
+            entered.wait(5)
+
+            other = threading.Thread(target=get_session,
+                                     kwargs={"connection": {"pool_maxsize": 2}})
+            other.start()
+            other.join(1)
+
+            self.assertFalse(other.is_alive())
+
+        finally:
+            release.set()
+            warming.join()
+            server.shutdown()
+            server.server_close()
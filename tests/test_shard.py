@@ -0,0 +1,119 @@
+"""Test for the sharding of multiple-mode batches"""
+
+import io
+from unittest import TestCase
+from src.dstn import DSTNListItem, DSTNListRequest
+from src.export import LIST_COLUMNS, get_exporter
+from src.shard import iter_list_records, merge_shards, parse_shard, shard_of, shard_rows
+from src.utils import normalize_row
+from .factory.session_factory import TransientSession
+
+
+class TestShard(TestCase):
+    """Test shard_rows/merge_shards"""
+
+    def setUp(self) -> None:
+        self.student_list = [(f"Nguyễn Văn {i}", f"QH{i:06}") for i in range(200)]
+        self.student_list += [("nguyen van 7", "qh000007"), ("a, b", "QH1")]
+
+    def test_parse_shard(self) -> None:
+        """Test if shards are parsed 1-based"""
+
+        self.assertEqual(parse_shard("1/4"), (0, 4))
+        self.assertEqual(parse_shard("4/4"), (3, 4))
+
+        for shard in ["0/4", "5/4", "1", "a/b"]:
+            with self.assertRaises(ValueError):
+                parse_shard(shard)
+
+    def test_disjoint(self) -> None:
+        """Test if the shards split the rows, with duplicate spellings together"""
+
+        shards = [list(shard_rows(self.student_list, index, 3)) for index in range(3)]
+
+        self.assertEqual(sorted(row for shard in shards for row in shard),
+                         sorted(self.student_list))
+        self.assertTrue(all(len(shard) > 30 for shard in shards))
+        self.assertEqual(shard_of(("Nguyễn Văn 7", "QH000007"), 3),
+                         shard_of(("nguyen van 7", "qh000007"), 3))
+
+        # The same on every run (not salted like hash()).
+        self.assertEqual(shard_of(("Nguyễn Văn 1", "QH000001"), 1000), 152)
+
+    def test_merge(self) -> None:
+        """Test if the shard outputs are merged back into input order, in every format"""
+
+        for export_format in ["table", "jsonl", "csv", "tsv"]:
+            outputs = []
+
+            # Shard outputs, given in any order.
+            for index in [2, 0, 1]:
+                output = io.StringIO()
+                get_exporter(export_format, output, LIST_COLUMNS).write_all(
+                    DSTNListItem(name=name, degree_id=degree_id, status=len(name) % 2 == 0)
+                    for name, degree_id in shard_rows(self.student_list, index, 3))
+                output.seek(0)
+                outputs.append(iter_list_records(output, export_format))
+
+            records = [record.asdict() for record in merge_shards(self.student_list, outputs)]
+
+            self.assertEqual([(r["name"], r["degree_id"]) for r in records], self.student_list)
+            self.assertEqual([r["status"] for r in records],
+                             [len(name) % 2 == 0 for name, _ in self.student_list])
+
+    def test_incomplete(self) -> None:
+        """Test if rows without a result are left out and reported"""
+
+        outputs = [[DSTNListItem(name=name, degree_id=degree_id, status=True)
+                    for name, degree_id in shard_rows(self.student_list, index, 2)]
+                   for index in range(2)]
+        lost = outputs[1].pop().asdict()
+
+        missing = []
+        records = [record.asdict() for record in
+                   merge_shards(self.student_list, outputs, missing)]
+
+        self.assertEqual(missing, [(lost["name"], lost["degree_id"])])
+        self.assertEqual([(r["name"], r["degree_id"]) for r in records],
+                         [row for row in self.student_list if row not in missing])
+
+        # Results of other rows mean the shards were not run on this file.
+        outputs[1].append(DSTNListItem(name="someone", degree_id="else", status=True))
+
+        with self.assertRaises(ValueError):
+            list(merge_shards(self.student_list, outputs))
+
+    def test_merge_out_of_order(self) -> None:
+        """Test if shards written out of input order (unordered, retried rows) are merged"""
+
+        student_list = [(f"student {i}", f"QH{i:06}") for i in range(60)]
+        student_list += [("STUDENT 7", "qh000007"), ("student 7", "QH000007")]
+
+        # Every third row is valid, a few fail once and are retried at the end.
+        session = TransientSession(
+            valid={normalize_row(row) for row in student_list[:60:3]},
+            errors={normalize_row(row): 503 for row in student_list[1:60:7]})
+
+        outputs = []
+
+        for index in range(3):
+            req = DSTNListRequest(student_list=shard_rows(student_list, index, 3),
+                                  api_url="http://localhost/shard", headers={},
+                                  results={"rows": 10, "page": 1, "sord": "desc"},
+                                  retry={"max_retries": 0},
+                                  circuit_breaker={"enabled": False},
+                                  errors={"enabled": False, "retry_path": None},
+                                  ordered=False, workers=4, session=session)
+
+            output = io.StringIO()
+            get_exporter("csv", output, LIST_COLUMNS).write_all(req.stream())
+            output.seek(0)
+            outputs.append(iter_list_records(output, "csv"))
+
+        self.assertEqual(session.errors, {})
+
+        records = [record.asdict() for record in merge_shards(student_list, outputs)]
+
+        self.assertEqual([(r["name"], r["degree_id"]) for r in records], student_list)
+        self.assertEqual([r["status"] for r in records],
+                         [int(name.split()[1]) % 3 == 0 for name, _ in student_list])
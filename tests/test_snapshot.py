@@ -0,0 +1,106 @@
+"""Test for the offline snapshot"""
+
+import json
+import os
+import tempfile
+from unittest import TestCase
+from src.crawl import DSTNCrawlRequest
+from src.dstn import DSTNListRequest
+from src.snapshot import SnapshotStore, iter_json_records
+from .factory.session_factory import FakeSession
+from .factory.student_factory import StudentFactory
+from .test_dstn_list_request import CONFIG
+
+
+class TestSnapshotStore(TestCase):
+    """Test the SQLite snapshot store"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot.sqlite3")
+        self.students = [StudentFactory().create_student() for _ in range(5)]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_find(self) -> None:
+        """Test if a record is found by Student ID or by name, with its degree ID"""
+
+        store = SnapshotStore(path=self.path)
+        self.assertEqual(store.add(self.students), 5)
+
+        student = self.students[2]
+
+        for masv in [student["masv"], student["hoten"], student["hoten"].upper()]:
+            response_json = store.find({"masv": masv, "sobang": student["sobang"].lower()})
+
+            self.assertEqual(response_json, {"total": 1, "rows": [student]})
+
+        self.assertIsNone(store.find({"masv": student["masv"], "sobang": "SOBANG/0"}))
+        self.assertIsNone(store.find({"masv": student["masv"], "sobang": ""}))
+
+        store.close()
+
+    def test_find_order(self) -> None:
+        """Test if the records of a name are paged in a stable order"""
+
+        namesakes = [dict(self.students[0], masv=masv) for masv in ["2", "3", "1"]]
+
+        store = SnapshotStore(path=self.path)
+        store.add(namesakes)
+
+        query = {"masv": namesakes[0]["hoten"], "sobang": namesakes[0]["sobang"], "rows": 2}
+
+        pages = [[record["masv"] for record in store.find(dict(query, page=page))["rows"]]
+                 for page in (1, 2)]
+
+        self.assertEqual(pages, [["3", "2"], ["1"]])
+        self.assertEqual([record["masv"] for record in store.find(dict(query, sord="asc"))["rows"]],
+                         ["1", "2"])
+
+        store.close()
+
+    def test_iter_json_records(self) -> None:
+        """Test if records are read from API responses, lists and JSON Lines"""
+
+        response_path = os.path.join(self.directory.name, "response.json")
+        lines_path = os.path.join(self.directory.name, "records.jsonl")
+
+        with open(response_path, "w", encoding="utf8") as json_handler:
+            json.dump({"total": 2, "rows": self.students[:2]}, json_handler)
+
+        with open(lines_path, "w", encoding="utf8") as json_handler:
+            for student in self.students[2:]:
+                print(json.dumps(dict(student, language="vn")), file=json_handler)
+
+        self.assertEqual(list(iter_json_records(response_path)), self.students[:2])
+        self.assertEqual(list(iter_json_records(lines_path)), self.students[2:])
+
+    def test_list_request_falls_back_on_miss(self) -> None:
+        """Test if rows found in the snapshot are not sent to the API"""
+
+        SnapshotStore(path=self.path).add(self.students[:3])
+
+        student_list = [(student["hoten"], student["sobang"]) for student in self.students]
+        session = FakeSession(valid={student_list[4]})
+
+        req = DSTNListRequest(student_list=student_list, session=session, normalize=False,
+                              snapshot={"enabled": True, "path": self.path}, **CONFIG)
+
+        records = [record.asdict() for record in req.process()]
+
+        self.assertEqual([r["status"] for r in records], [True, True, True, False, True])
+        self.assertEqual([(call["masv"], call["sobang"]) for call in session.calls],
+                         student_list[3:])
+
+        req.snapshot.close()
+
+    def test_crawl(self) -> None:
+        """Test if a range of Student IDs is fetched, skipping the ones not found"""
+
+        session = FakeSession(valid={("20120001", ""), ("20120003", "")})
+        req = DSTNCrawlRequest(student_ids=[f"2012000{i}" for i in range(5)],
+                               session=session, workers=2, **CONFIG)
+
+        self.assertEqual([record["masv"] for record in req.process()], ["20120001", "20120003"])
+        self.assertEqual(len(session.calls), 5)